@@ -0,0 +1,98 @@
+"""Compare the memory of a list of segment dicts with the transcript aggregator.
+
+Run from the repository root:
+    python benchmarks/bench_segment_store.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from transcript_aggregator import TranscriptAggregator  # noqa: E402
+
+WORDS = "the of and to a in that is it you for was on are with as this be at we".split()
+
+
+def synthetic_archive(episodes: int, segments_per_episode: int = 600, seed: int = 0):
+    """Yield ``(file, segment)`` pairs like an archive of transcribed episodes."""
+    rng = random.Random(seed)
+    for episode in range(episodes):
+        path = f"D:/Podcasts/episode_{episode:04d}.mp3"
+        t = 0.0
+        for _ in range(segments_per_episode):
+            length = rng.uniform(2.0, 8.0)
+            # whisper hands out fresh strings for every segment
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25)))
+            yield path, {
+                "start": t,
+                "end": t + length,
+                "speaker": f"SPEAKER_{rng.randrange(4):02d}",
+                "text": text,
+            }
+            t += length
+
+
+def dict_list(archive):
+    """The previous aggregator layout: one copied dict per segment."""
+    segments = []
+    for path, seg in archive:
+        entry = seg.copy()
+        entry["file"] = path
+        segments.append(entry)
+    return segments
+
+
+def aggregator(archive):
+    """The aggregator as the app fills it, one file at a time.
+
+    Its ordered transcript is built too, as the transcript pane and the
+    exports read it.
+    """
+    result = TranscriptAggregator()
+    by_file = {}
+    for path, seg in archive:
+        by_file.setdefault(path, []).append(seg)
+    for path, segments in by_file.items():
+        result.add_segments(path, segments)
+        segments.clear()
+    result.get_transcript()
+    return result
+
+
+def measure(build, episodes: int):
+    """Return ``(bytes retained, seconds)`` for building ``episodes``.
+
+    Memory is traced while the archive is generated, so strings that only
+    the result keeps alive are counted and those the store copied are not.
+    The time is taken separately, without tracing, from a prepared list.
+    """
+    tracemalloc.start()
+    result = build(synthetic_archive(episodes))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    items = list(synthetic_archive(episodes))
+    began = time.perf_counter()
+    build(items)
+    return retained, time.perf_counter() - began
+
+
+def main() -> None:
+    print(f"{'episodes':>9} {'segments':>9} {'dicts MB':>9} {'agg MB':>9} {'ratio':>6} {'dicts s':>8} {'agg s':>8}")
+    for episodes in (10, 100, 500):
+        dicts, dict_s = measure(dict_list, episodes)
+        agg, agg_s = measure(aggregator, episodes)
+        print(
+            f"{episodes:>9} {episodes * 600:>9} {dicts / 2**20:>9.1f} {agg / 2**20:>9.1f} "
+            f"{dicts / agg:>6.1f} {dict_s:>8.2f} {agg_s:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
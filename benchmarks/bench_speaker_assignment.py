@@ -0,0 +1,71 @@
+"""Compare the linear speaker lookup with the interval-indexed one.
+
+Run from the repository root:
+    python benchmarks/bench_speaker_assignment.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from diarizer import Diarizer  # noqa: E402
+
+
+def synthetic_show(turns: int, seed: int = 0):
+    """Return ``(tracks, segments)`` for a panel show with ``turns`` speaker turns."""
+    rng = random.Random(seed)
+    tracks = []
+    t = 0.0
+    for _ in range(turns):
+        length = rng.uniform(1.0, 20.0)
+        tracks.append((t, t + length, f"SPEAKER_{rng.randrange(6):02d}"))
+        # occasional crosstalk overlaps the next turn
+        t += length - (rng.uniform(0.0, 1.0) if rng.random() < 0.2 else 0.0)
+    segments = []
+    s = 0.0
+    while s < t:
+        length = rng.uniform(2.0, 8.0)
+        segments.append({"start": s, "end": s + length, "speaker": "", "text": ""})
+        s += length
+    return tracks, segments
+
+
+def linear_labels(segments, tracks):
+    """The original nested-loop midpoint lookup."""
+    for seg in segments:
+        mid = (seg["start"] + seg["end"]) / 2
+        label = "Unknown"
+        for start, end, speaker in tracks:
+            if start <= mid < end:
+                label = speaker
+                break
+        seg["speaker"] = label
+    return segments
+
+
+def timed(func, *args) -> float:
+    begin = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    print(f"{'turns':>7} {'segments':>9} {'linear s':>10} {'midpoint s':>11} {'overlap s':>10}")
+    for turns in (500, 2000, 8000, 16000):
+        tracks, segments = synthetic_show(turns)
+        linear = timed(linear_labels, [dict(s) for s in segments], tracks)
+        indexed = timed(Diarizer.label_segments, [dict(s) for s in segments], tracks)
+        overlap = timed(Diarizer.label_segments, [dict(s) for s in segments], tracks, "overlap")
+        expected = [s["speaker"] for s in linear_labels([dict(s) for s in segments], tracks)]
+        got = [s["speaker"] for s in Diarizer.label_segments([dict(s) for s in segments], tracks)]
+        assert got == expected, "indexed lookup disagrees with the linear scan"
+        print(f"{turns:>7} {len(segments):>9} {linear:>10.3f} {indexed:>11.3f} {overlap:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
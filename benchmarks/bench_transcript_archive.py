@@ -0,0 +1,84 @@
+"""Compare loading an archive of transcripts from JSON and from the binary format.
+
+Run from the repository root:
+    python benchmarks/bench_transcript_archive.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_segment_store import synthetic_archive  # noqa: E402
+from transcript_aggregator import TranscriptAggregator  # noqa: E402
+from transcript_exporter import export_json  # noqa: E402
+
+
+def build(episodes: int) -> TranscriptAggregator:
+    aggregator = TranscriptAggregator()
+    by_file = {}
+    for path, seg in synthetic_archive(episodes):
+        by_file.setdefault(path, []).append(seg)
+    for path, segments in by_file.items():
+        aggregator.add_segments(path, segments)
+    return aggregator
+
+
+def load_json(path: str) -> TranscriptAggregator:
+    with open(path, "r", encoding="utf-8") as fh:
+        segments = json.load(fh)
+    aggregator = TranscriptAggregator()
+    by_file = {}
+    for seg in segments:
+        by_file.setdefault(seg.pop("file"), []).append(seg)
+    for audio_file, file_segments in by_file.items():
+        aggregator.add_segments(audio_file, file_segments)
+    return aggregator
+
+
+def measure(load, path: str):
+    """Return ``(seconds, bytes retained)`` to load ``path`` and read one segment.
+
+    The time is taken without tracing, which would slow the JSON parser
+    down far more than the archive.
+    """
+    began = time.perf_counter()
+    load(path).get_segment(0)["text"]
+    seconds = time.perf_counter() - began
+    tracemalloc.start()
+    aggregator = load(path)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del aggregator
+    return seconds, retained
+
+
+def main() -> None:
+    print(f"{'episodes':>9} {'segments':>9} {'json MB':>8} {'json s':>7} {'json heap MB':>14} "
+          f"{'pdta MB':>8} {'pdta s':>7} {'pdta heap MB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for episodes in (10, 100, 500):
+            aggregator = build(episodes)
+            json_path = os.path.join(tmp, "archive.json")
+            archive_path = os.path.join(tmp, "archive.pdta")
+            with open(json_path, "w", encoding="utf-8") as fh:
+                fh.write(export_json(aggregator.get_transcript()))
+            aggregator.save_archive(archive_path)
+            del aggregator
+            json_s, json_alloc = measure(load_json, json_path)
+            archive_s, archive_alloc = measure(TranscriptAggregator.load_archive, archive_path)
+            print(
+                f"{episodes:>9} {episodes * 600:>9} {os.path.getsize(json_path) / 2**20:>8.1f} {json_s:>7.3f} "
+                f"{json_alloc / 2**20:>14.1f} {os.path.getsize(archive_path) / 2**20:>8.1f} {archive_s:>7.3f} "
+                f"{archive_alloc / 2**20:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Split long recordings at silences and stitch chunk transcripts together.
+
+Usage:
+    from audio_chunks import detect_silences, plan_chunks, stitch_segments
+    duration, silences = detect_silences("episode.mp3")
+    chunks = plan_chunks(duration, silences, target=600)
+    # transcribe each chunk, then
+    segments = stitch_segments(chunks, [segments_for_chunk, ...])
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+Span = Tuple[float, float]
+
+_durations: Dict[Tuple[str, int, int], float] = {}
+_durations_lock = threading.Lock()
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def parse_silencedetect(stderr: str) -> List[Span]:
+    """Return ``(start, end)`` silences from ffmpeg ``silencedetect`` output."""
+    silences: List[Span] = []
+    start = None
+    for line in stderr.splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    return silences
+
+
+def find_silences(
+    audio_path: str,
+    noise_db: float = -35.0,
+    min_silence: float = 0.5,
+    **input_options,
+) -> List[Span]:
+    """Return the silent stretches of ``audio_path``.
+
+    ``input_options`` are passed to ``ffmpeg.input``, for example to read a
+    raw PCM file.
+    """
+    import ffmpeg  # imported lazily like the other heavy dependencies
+
+    stream = ffmpeg.input(audio_path, **input_options)
+    stream = stream.filter("silencedetect", noise=f"{noise_db}dB", d=min_silence)
+    _, err = stream.output("-", format="null").run(capture_stdout=True, capture_stderr=True)
+    silences = parse_silencedetect(err.decode("utf-8", errors="replace"))
+    logger.debug("Found %d silences in %s", len(silences), audio_path)
+    return silences
+
+
+def probe_duration(audio_path: str) -> float:
+    """Return the duration of ``audio_path`` in seconds as reported by ffprobe."""
+    import ffmpeg
+
+    return float(ffmpeg.probe(audio_path)["format"]["duration"])
+
+
+def cached_duration(audio_path: str, cache=None) -> float:
+    """Return :func:`probe_duration` of ``audio_path``, probing it only once.
+
+    Durations are remembered per path, size and modification time for the
+    session and, when a :class:`DiskCache` is given, across sessions.
+    """
+    st = os.stat(audio_path)
+    memo_key = (os.path.abspath(audio_path), st.st_size, st.st_mtime_ns)
+    with _durations_lock:
+        duration = _durations.get(memo_key)
+    if duration is not None:
+        return duration
+    key = cache.make_key("duration", *memo_key) if cache is not None else None
+    data = cache.get(key) if cache is not None else None
+    if data is not None:
+        duration = float(data)
+    else:
+        duration = probe_duration(audio_path)
+        if cache is not None:
+            cache.put(key, repr(duration).encode("ascii"))
+    with _durations_lock:
+        _durations[memo_key] = duration
+    return duration
+
+
+def detect_silences(
+    audio_path: str,
+    noise_db: float = -35.0,
+    min_silence: float = 0.5,
+) -> Tuple[float, List[Span]]:
+    """Return the duration of ``audio_path`` and its silent stretches."""
+    return probe_duration(audio_path), find_silences(audio_path, noise_db, min_silence)
+
+
+def plan_chunks(
+    duration: float,
+    silences: Sequence[Span],
+    target: float = 600.0,
+    overlap: float = 2.0,
+) -> List[Span]:
+    """Return ``(start, end)`` chunks of roughly ``target`` seconds.
+
+    Each cut is placed in the middle of the silence closest to the target
+    length. Where no silence is available within half a chunk of the target,
+    the cut is made at the target and both neighbouring chunks extend
+    ``overlap`` seconds past it so :func:`stitch_segments` can de-duplicate
+    words cut in half.
+    """
+    mids = sorted((s + e) / 2 for s, e in silences)
+    chunks: List[Span] = []
+    start = 0.0
+    cursor = 0.0
+    while duration - cursor > target * 1.5:
+        ideal = cursor + target
+        candidates = [m for m in mids if cursor + target / 2 <= m <= cursor + target * 1.5]
+        if candidates:
+            cut = min(candidates, key=lambda m: abs(m - ideal))
+            chunks.append((start, cut))
+            start = cut
+        else:
+            cut = ideal
+            chunks.append((start, min(duration, cut + overlap)))
+            start = max(0.0, cut - overlap)
+        cursor = cut
+    chunks.append((start, duration))
+    return chunks
+
+
+def extract_chunk(audio_path: str, start: float, end: float, dest_path: str) -> str:
+    """Write ``[start, end)`` of ``audio_path`` to ``dest_path`` as 16 kHz mono."""
+    import ffmpeg
+
+    stream = ffmpeg.input(audio_path, ss=start, to=end)
+    stream = stream.output(dest_path, ac=1, ar=16000)
+    stream.overwrite_output().run(capture_stdout=True, capture_stderr=True)
+    return dest_path
+
+
+def stitch_segments(chunks: Sequence[Span], results: Sequence[List[Dict]]) -> List[Dict]:
+    """Merge per-chunk segments back onto the timeline of the whole file.
+
+    Segment times are shifted by their chunk start. Where chunks overlap, each
+    segment belongs to the chunk whose half of the overlap holds its midpoint,
+    and a segment repeating the text of the one before it is dropped.
+    """
+    return list(iter_stitched(chunks, results))
+
+
+def iter_stitched(chunks: Sequence[Span], results: Iterable[List[Dict]]) -> Iterator[Dict]:
+    """Like :func:`stitch_segments`, but yield segments as results arrive."""
+    for _, _, segments in stitch_windows(chunks, results):
+        yield from segments
+
+
+def stitch_windows(
+    chunks: Sequence[Span],
+    results: Iterable[List[Dict]],
+) -> Iterator[Tuple[float, float, List[Dict]]]:
+    """Yield ``(start, end, segments)`` for each chunk as its result arrives.
+
+    ``start`` and ``end`` bound the part of the timeline the chunk owns: every
+    stitched segment has its midpoint in ``[start, end)``.
+    """
+    cuts = [(chunks[i][1] + chunks[i + 1][0]) / 2 for i in range(len(chunks) - 1)]
+    prev = None
+    for i, ((offset, _), segments) in enumerate(zip(chunks, results)):
+        lo = cuts[i - 1] if i > 0 else 0.0
+        hi = cuts[i] if i < len(cuts) else float("inf")
+        owned = []
+        for seg in segments:
+            entry = dict(seg)
+            entry["start"] = seg["start"] + offset
+            entry["end"] = seg["end"] + offset
+            mid = (entry["start"] + entry["end"]) / 2
+            if not lo <= mid < hi:
+                continue
+            if prev is not None and entry["text"] == prev["text"] and entry["start"] < prev["end"]:
+                continue
+            prev = entry
+            owned.append(entry)
+        yield lo, hi, owned
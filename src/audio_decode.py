@@ -0,0 +1,176 @@
+"""Decode audio files to 16 kHz mono PCM for the processing stages.
+
+Usage:
+    from audio_decode import PcmCache
+    cache = PcmCache(settings.cache_dir + "/pcm")
+    with cache.get("episode.mp3") as buffer:   # decoded once, then memory-mapped
+        samples = buffer.as_array()             # float32 numpy view, no copy
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+import threading
+from typing import Dict, List
+from logging_setup import get_logger
+from disk_cache import DiskCache
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+DEFAULT_MAX_BYTES = 4096 * 1024 * 1024
+
+
+def raw_pcm_input(sample_rate: int = SAMPLE_RATE) -> Dict:
+    """Return the ffmpeg input options for reading a cached PCM file."""
+    return {"f": "f32le", "ar": sample_rate, "ac": 1}
+
+
+def decode_pcm(audio_path: str, sample_rate: int = SAMPLE_RATE):
+    """Return ``audio_path`` as a float32 mono numpy array held in memory."""
+    import ffmpeg  # heavy dependencies are imported lazily
+    import numpy as np
+
+    logger.info("Decoding %s to %d Hz PCM", audio_path, sample_rate)
+    out, _ = (
+        ffmpeg.input(audio_path)
+        .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, dtype=np.float32)
+
+
+class PcmBuffer:
+    """Float32 mono samples of a decoded file, mapped into memory.
+
+    The mapping is copy-on-write: consumers get writable views without the
+    file ever being copied, and nothing they do is written back. Use the
+    buffer as a context manager so the mapping is released when the
+    consumer is done; a mapped file cannot be evicted on Windows.
+    """
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        with open(path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            # mmap cannot map an empty file
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY) if size else None
+
+    def __enter__(self) -> "PcmBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._mmap) // 4 if self._mmap is not None else 0
+
+    @property
+    def duration(self) -> float:
+        """Length of the audio in seconds."""
+        return len(self) / self.sample_rate
+
+    @property
+    def samples(self) -> memoryview:
+        """The samples as a float memoryview over the mapping."""
+        if self._mmap is None:
+            return memoryview(b"").cast("f")
+        return memoryview(self._mmap).cast("f")
+
+    def as_array(self):
+        """Return the samples as a float32 numpy array sharing the mapping."""
+        import numpy as np
+
+        if self._mmap is None:
+            return np.zeros(0, dtype=np.float32)
+        return np.frombuffer(self._mmap, dtype=np.float32)
+
+    def waveform(self) -> Dict:
+        """Return the samples in the in-memory form pyannote pipelines accept."""
+        import torch
+
+        return {"waveform": torch.from_numpy(self.as_array()).unsqueeze(0), "sample_rate": self.sample_rate}
+
+    def close(self) -> None:
+        """Release the mapping unless views of it are still in use."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                return  # arrays still share it; it goes away with them
+            self._mmap = None
+
+
+class PcmCache:
+    """Decode each audio file once into a PCM file shared by all consumers.
+
+    Entries are keyed by the source path, size and modification time, so an
+    edited source is decoded again, and the stale entry ages out through the
+    LRU eviction of the underlying :class:`DiskCache`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, sample_rate: int = SAMPLE_RATE):
+        self._files = DiskCache(directory, max_bytes=max_bytes, suffix=".f32")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # per-key decode lock and the number of callers holding or waiting for it
+        self._decode_locks: Dict[str, List] = {}
+
+    def key_for(self, audio_path: str) -> str:
+        st = os.stat(audio_path)
+        return DiskCache.make_key("pcm", os.path.abspath(audio_path), st.st_size, st.st_mtime_ns, self.sample_rate)
+
+    def get(self, audio_path: str) -> PcmBuffer:
+        """Return the decoded samples of ``audio_path``, decoding on first use.
+
+        Close the buffer, or use it in a ``with`` block, when done with it.
+        """
+        key = self.key_for(audio_path)
+        path = self._files.path(key)
+        with self._lock:
+            entry = self._decode_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            # transcription and diarization of a file may ask at the same time
+            with entry[0]:
+                if os.path.exists(path):
+                    self.hits += 1
+                    os.utime(path)
+                    buffer = PcmBuffer(path, self.sample_rate)
+                else:
+                    self.misses += 1
+                    self._decode(audio_path, path)
+                    # mapped before evicting, which never drops the new entry
+                    buffer = PcmBuffer(path, self.sample_rate)
+                    self._files.evict(keep=(key,))
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._decode_locks[key]
+        return buffer
+
+    def _decode(self, audio_path: str, dest: str) -> None:
+        import ffmpeg
+
+        logger.info("Decoding %s into the shared PCM cache", audio_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".tmp")
+        os.close(fd)
+        try:
+            (
+                ffmpeg.input(audio_path)
+                .output(tmp, format="f32le", acodec="pcm_f32le", ac=1, ar=self.sample_rate)
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
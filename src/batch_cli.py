@@ -0,0 +1,303 @@
+"""Headless batch processing of whole folders of recordings.
+
+Usage:
+    python src/run_app.py batch "D:/Podcasts/*.mp3" --workers 2
+    python src/batch_cli.py D:/Podcasts --formats json srt --force
+
+Each input gets ``<name>.txt``, ``<name>.json`` and ``<name>.srt`` written next
+to it. Files whose outputs already exist and are newer than the recording are
+skipped, so an interrupted run picks up where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Sequence, TextIO
+from logging_setup import get_logger
+from pipeline_scheduler import shortest_first
+
+logger = get_logger(__name__)
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus")
+FORMATS = ("txt", "json", "srt")
+
+
+def collect_inputs(targets: Sequence[str]) -> List[str]:
+    """Expand folders, glob patterns and file names into audio file paths.
+
+    Folders contribute their audio files (not recursively), sorted by name.
+    Duplicates are dropped while keeping the first position.
+    """
+    found: List[str] = []
+    for target in targets:
+        if os.path.isdir(target):
+            names = sorted(os.listdir(target))
+            found.extend(
+                os.path.join(target, n) for n in names if n.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        elif glob.has_magic(target):
+            found.extend(p for p in sorted(glob.glob(target)) if os.path.isfile(p))
+        else:
+            found.append(target)
+    seen = set()
+    inputs = []
+    for path in found:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            inputs.append(path)
+    return inputs
+
+
+def output_paths(audio_path: str, formats: Sequence[str] = FORMATS) -> Dict[str, str]:
+    """Return the export path for each format, next to ``audio_path``."""
+    stem = os.path.splitext(audio_path)[0]
+    return {fmt: f"{stem}.{fmt}" for fmt in formats}
+
+
+def is_complete(audio_path: str, formats: Sequence[str] = FORMATS) -> bool:
+    """Return whether every output exists and is newer than the recording."""
+    source_mtime = os.path.getmtime(audio_path)
+    for path in output_paths(audio_path, formats).values():
+        try:
+            if os.path.getmtime(path) < source_mtime:
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Write ``text`` so an interrupted run never leaves a partial output."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def process_file(audio_path: str, options: Dict) -> Dict:
+    """Transcribe, diarize, aggregate and export one file.
+
+    Runs inside a pool process, so everything it needs is built from the
+    plain ``options`` dict. Returns timing information for the summary.
+    """
+    from transcribe_worker import TranscribeWorker
+    from diarizer import Diarizer
+    from transcript_aggregator import TranscriptAggregator
+    from transcript_exporter import export_json, export_srt, export_txt
+    from disk_cache import DiskCache
+    from audio_decode import PcmCache
+    from cpu_budget import CpuBudget
+
+    began = time.perf_counter()
+    processing = options["processing"]
+    cache_dir = options.get("cache_dir")
+
+    def make_cache(name: str, size_option: str, cache_type=DiskCache):
+        max_mb = processing.get(size_option)
+        if not cache_dir or not max_mb:
+            return None
+        return cache_type(os.path.join(cache_dir, name), max_bytes=int(max_mb) * 1024 * 1024)
+
+    pcm_cache = make_cache("pcm", "pcm_cache_mb", PcmCache)
+    # stages run one after the other here, so each gets the process's cores
+    cpu_budget = CpuBudget(total=options.get("cpu_threads"), weights=processing.get("cpu_weights"))
+    worker = TranscribeWorker(
+        options["model"],
+        cache=make_cache("transcripts", "transcript_cache_mb"),
+        chunk_workers=processing.get("transcribe_chunk_workers", 1),
+        vad=processing.get("vad", False),
+        pcm_cache=pcm_cache,
+        cpu_budget=cpu_budget,
+    )
+    segments = worker.transcribe(audio_path)
+    diarizer = Diarizer(
+        idle_timeout=processing.get("diarization_idle_timeout"),
+        cache=make_cache("diarization", "diarization_cache_mb"),
+        assignment=processing.get("speaker_assignment", "midpoint"),
+        pcm_cache=pcm_cache,
+        cpu_budget=cpu_budget,
+    )
+    segments = diarizer.assign_speakers(audio_path, segments)
+    aggregator = TranscriptAggregator()
+    aggregator.add_segments(audio_path, segments)
+    transcript = aggregator.get_transcript()
+
+    # probed before the outputs exist, and never fatal: a file whose outputs
+    # are written counts as processed even when its length is unknown
+    audio_seconds = _duration_probe(options)(audio_path) or 0.0
+    exporters = {"txt": export_txt, "json": export_json, "srt": export_srt}
+    for fmt, path in output_paths(audio_path, options["formats"]).items():
+        _write_atomic(path, exporters[fmt](transcript))
+    return {
+        "path": audio_path,
+        "audio_seconds": audio_seconds,
+        "seconds": time.perf_counter() - began,
+        "segments": len(transcript),
+    }
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def format_summary(summary: Dict) -> str:
+    """Return the end-of-run throughput report."""
+    wall = summary["wall_seconds"]
+    audio = summary["audio_seconds"]
+    lines = [
+        f"Processed {summary['processed']} files "
+        f"({summary['skipped']} skipped, {summary['failed']} failed) "
+        f"in {_format_duration(wall)}",
+        f"Audio: {audio / 3600:.2f} h",
+    ]
+    if wall > 0 and summary["processed"]:
+        lines.append(
+            f"Throughput: {audio / wall:.1f}x realtime, "
+            f"{summary['processed'] * 3600 / wall:.1f} files/hour"
+        )
+    return "\n".join(lines)
+
+
+def _duration_probe(options: Dict):
+    """Return a function giving the cached duration of a file, or ``None``."""
+    from audio_chunks import cached_duration
+    from disk_cache import DiskCache
+
+    cache_dir = options.get("cache_dir")
+    max_mb = options["processing"].get("duration_cache_mb")
+    cache = None
+    if cache_dir and max_mb:
+        cache = DiskCache(os.path.join(cache_dir, "durations"), max_bytes=int(max_mb) * 1024 * 1024)
+
+    def duration(path: str) -> float | None:
+        try:
+            return cached_duration(path, cache)
+        except Exception:
+            logger.warning("Could not probe the duration of %s", path)
+            return None
+
+    return duration
+
+
+def run_batch(
+    inputs: Sequence[str],
+    options: Dict,
+    workers: int = 1,
+    force: bool = False,
+    out: TextIO = sys.stdout,
+) -> Dict:
+    """Process ``inputs`` in a pool of ``workers`` processes.
+
+    A file that fails, or does not exist, is reported and counted; it does
+    not stop the run.
+    Returns a summary with ``processed``, ``skipped``, ``failed``,
+    ``audio_seconds`` and ``wall_seconds``.
+    """
+    began = time.perf_counter()
+    formats = options["formats"]
+    missing = [p for p in inputs if not os.path.isfile(p)]
+    existing = [p for p in inputs if os.path.isfile(p)]
+    pending = [p for p in existing if force or not is_complete(p, formats)]
+    summary = {
+        "processed": 0,
+        "skipped": len(existing) - len(pending),
+        "failed": len(missing),
+        "audio_seconds": 0.0,
+        "wall_seconds": 0.0,
+    }
+    for path in missing:
+        logger.error("Input %s does not exist", path)
+        print(f"FAILED {path}: file not found", file=out)
+    if options["processing"].get("schedule") == "shortest_first":
+        pending = [pending[i] for i in shortest_first(pending, _duration_probe(options))]
+    if summary["skipped"]:
+        print(f"Skipping {summary['skipped']} files that are already done", file=out)
+    logger.info("Batch processing %d files with %d workers", len(pending), workers)
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+            futures = {pool.submit(process_file, path, options): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    logger.exception("Failed to process %s", path)
+                    summary["failed"] += 1
+                    print(f"FAILED {path}: {exc}", file=out)
+                    continue
+                summary["processed"] += 1
+                summary["audio_seconds"] += result["audio_seconds"]
+                print(
+                    f"done {path} ({_format_duration(result['audio_seconds'])} audio "
+                    f"in {_format_duration(result['seconds'])})",
+                    file=out,
+                )
+    summary["wall_seconds"] = time.perf_counter() - began
+    print(format_summary(summary), file=out)
+    return summary
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Parse ``argv`` and run the batch; returns the process exit code."""
+    from settings import Settings
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        prog="batch", description="Transcribe and diarize recordings without the GUI."
+    )
+    parser.add_argument("targets", nargs="+", help="audio files, folders or glob patterns")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.processing.get("batch_workers", 1),
+        help="files processed in parallel (default from settings)",
+    )
+    parser.add_argument(
+        "--model",
+        default=settings.processing.get("transcribe_model", "base"),
+        help="Whisper model (default from settings, as in the GUI)",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", choices=FORMATS, default=list(FORMATS), help="outputs to write"
+    )
+    parser.add_argument("--force", action="store_true", help="reprocess files that are already done")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.targets)
+    if not inputs:
+        print("No audio files found", file=sys.stderr)
+        return 2
+    # every pool process gets an equal slice of the machine
+    cores = settings.processing.get("cpu_threads") or os.cpu_count() or 1
+    options = {
+        "cpu_threads": max(1, cores // max(1, args.workers)),
+        "model": args.model,
+        "formats": args.formats,
+        "processing": dict(settings.processing),
+        "cache_dir": settings.cache_dir,
+    }
+    summary = run_batch(inputs, options, workers=args.workers, force=args.force)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual launch
+    import multiprocessing
+    from logging_setup import setup_logging
+
+    multiprocessing.freeze_support()
+    setup_logging()
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Checkpoint the progress of a processing run so it survives a crash.
+
+Usage:
+    from checkpoint import RunCheckpoint
+    checkpoint = RunCheckpoint(settings.checkpoint_dir)
+    paths = checkpoint.pending_paths()      # unfinished run from last time, or None
+    checkpoint.start(paths, resume=True, options={"transcribed": {"model": "base"}})
+    checkpoint.save_transcript(0, segments) # written on a background thread
+    checkpoint.save_tracks(0, tracks)
+    checkpoint.mark_aggregated(0)
+    checkpoint.flush()                      # wait until they are on disk
+    checkpoint.clear()                      # the run finished
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Sequence
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST = "run.json"
+MANIFEST_VERSION = 1
+
+QUEUED = "queued"
+TRANSCRIBED = "transcribed"
+DIARIZED = "diarized"
+AGGREGATED = "aggregated"
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write ``data`` to ``path`` so a crash leaves the old or the new file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _fingerprint(path: str) -> List[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class RunCheckpoint:
+    """Per-file stage state and intermediate results of one run.
+
+    The manifest lists the files of the run with the stages each one has
+    completed; transcripts and speaker tracks are stored next to it, one file
+    per stage result. Results are written before the manifest mentions them,
+    so after a crash every stage the manifest records can be reused. A file
+    that changed on disk since the checkpoint starts over, and so does every
+    stage whose processing options changed.
+
+    Results are written and synced on a background thread in the order they
+    were saved, so the caller never waits for the disk; results still queued
+    when the run is cleared or restarted are dropped.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._files: List[Dict[str, Any]] = []
+        self._options: Dict[str, Any] = {}
+        # bumped whenever the run is cleared or restarted
+        self._generation = 0
+        self._writes: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST)
+
+    def _result_path(self, index: int, stage: str) -> str:
+        return os.path.join(self.directory, f"{index}.{stage}.json")
+
+    def _load_manifest(self) -> Dict[str, Any] | None:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable checkpoint in %s", self.directory)
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return data
+
+    def _write_manifest(self) -> None:
+        data = {"version": MANIFEST_VERSION, "options": self._options, "files": self._files}
+        write_atomic(self._manifest_path(), json.dumps(data).encode("utf-8"))
+
+    def pending_paths(self) -> List[str] | None:
+        """Return the files of an unfinished run, or ``None`` if there is none."""
+        data = self._load_manifest()
+        files = data["files"] if data is not None else None
+        if not files or all(AGGREGATED in f["stages"] for f in files):
+            return None
+        return [f["path"] for f in files]
+
+    def start(
+        self, paths: Sequence[str], resume: bool = False, options: Dict[str, Dict[str, Any]] | None = None
+    ) -> None:
+        """Begin checkpointing a run of ``paths``.
+
+        ``options`` maps a stage to the processing options its results
+        depend on. With ``resume`` the stages recorded for the same files are
+        kept, except for files that changed since and stages whose options
+        differ; otherwise the old checkpoint is discarded.
+        """
+        options = json.loads(json.dumps(options or {}))
+        data = self._load_manifest() if resume else None
+        previous = data["files"] if data is not None else None
+        if previous is not None and [f["path"] for f in previous] != list(paths):
+            logger.info("File list changed; not resuming the checkpointed run")
+            previous = None
+        if previous is None:
+            self.clear()
+        stale = set()
+        if previous is not None:
+            old_options = data.get("options", {})
+            stale = {
+                stage for stage in (TRANSCRIBED, DIARIZED) if old_options.get(stage) != options.get(stage)
+            }
+            if stale:
+                logger.info("Options of %s changed; running those stages again", sorted(stale))
+                # files have to be aggregated again from the new results
+                stale.add(AGGREGATED)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._generation += 1
+            self._options = options
+            self._files = []
+            for index, path in enumerate(paths):
+                stages: List[str] = []
+                fingerprint = _fingerprint(path)
+                if previous is not None and previous[index]["fingerprint"] == fingerprint:
+                    stages = [stage for stage in previous[index]["stages"] if stage not in stale]
+                elif previous is not None:
+                    logger.info("%s changed since the checkpoint; processing it again", path)
+                self._files.append({"path": path, "fingerprint": fingerprint, "stages": stages})
+            self._write_manifest()
+        if previous is not None:
+            logger.info("Resuming run: %s", [self.state(i) for i in range(len(paths))])
+
+    def state(self, index: int) -> str:
+        """Return how far file ``index`` got: queued, transcribed, diarized or aggregated.
+
+        ``diarized`` means both stages are done; a file whose speaker tracks
+        finished before its transcript is still ``queued``.
+        """
+        with self._lock:
+            stages = self._files[index]["stages"]
+        if AGGREGATED in stages:
+            return AGGREGATED
+        if TRANSCRIBED in stages and DIARIZED in stages:
+            return DIARIZED
+        if TRANSCRIBED in stages:
+            return TRANSCRIBED
+        return QUEUED
+
+    def _save(self, index: int, stage: str, result: Any) -> None:
+        self._queue(index, stage, json.dumps(result).encode("utf-8"))
+
+    def _queue(self, index: int, stage: str, data: bytes | None) -> None:
+        with self._lock:
+            self._writes.put((self._generation, index, stage, data))
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_queued, name="checkpoint-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_queued(self) -> None:
+        while True:
+            generation, index, stage, data = self._writes.get()
+            try:
+                if generation != self._generation:
+                    continue
+                if data is not None:
+                    write_atomic(self._result_path(index, stage), data)
+                self._mark(generation, index, stage)
+            except OSError:
+                logger.warning("Could not checkpoint the %s result of file %d", stage, index, exc_info=True)
+            finally:
+                self._writes.task_done()
+
+    def _mark(self, generation: int, index: int, stage: str) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            stages = self._files[index]["stages"]
+            if stage not in stages:
+                stages.append(stage)
+                self._write_manifest()
+
+    def flush(self) -> None:
+        """Wait until every result saved so far is on disk."""
+        self._writes.join()
+
+    def _load(self, index: int, stage: str) -> Any:
+        with self._lock:
+            if not self._files or stage not in self._files[index]["stages"]:
+                return None
+        try:
+            with open(self._result_path(index, stage), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            logger.warning("Checkpointed %s result of file %d is unreadable", stage, index)
+            return None
+
+    def save_transcript(self, index: int, segments: List[Dict]) -> None:
+        self._save(index, TRANSCRIBED, segments)
+
+    def save_tracks(self, index: int, tracks: List) -> None:
+        self._save(index, DIARIZED, [list(track) for track in tracks])
+
+    def mark_aggregated(self, index: int) -> None:
+        self._queue(index, AGGREGATED, None)
+
+    def transcript(self, index: int) -> List[Dict] | None:
+        """Return the checkpointed segments of file ``index``, if transcribed."""
+        return self._load(index, TRANSCRIBED)
+
+    def tracks(self, index: int) -> List | None:
+        """Return the checkpointed speaker tracks of file ``index``, if diarized."""
+        tracks = self._load(index, DIARIZED)
+        return None if tracks is None else [tuple(track) for track in tracks]
+
+    def clear(self) -> None:
+        """Forget the checkpointed run and drop the results still queued."""
+        with self._lock:
+            self._generation += 1
+            self._files = []
+        shutil.rmtree(self.directory, ignore_errors=True)
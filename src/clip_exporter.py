@@ -1,16 +1,42 @@
+import wave
 import ffmpeg
 from logging_setup import get_logger
 
 logger = get_logger(__name__)
 
 class ClipExporter:
-    """Export a clipped portion of an audio file using ffmpeg-python."""
+    """Export a clipped portion of an audio file using ffmpeg-python.
+
+    With a ``PcmCache``, clips are cut straight from the file's shared
+    16 kHz mono samples and written as WAV without running ffmpeg. Without
+    one, clips keep the quality and channels of the source.
+    """
+
+    def __init__(self, pcm_cache=None):
+        self.pcm_cache = pcm_cache
 
     def export_clip(self, audio_path: str, start: float, end: float, dest_path: str) -> str:
         """Clip audio between ``start`` and ``end`` seconds and save to ``dest_path``."""
         logger.info("Exporting clip from %s to %s - %s", audio_path, start, end)
+        if self.pcm_cache is not None:
+            return self._export_pcm(audio_path, start, end, dest_path)
         stream = ffmpeg.input(audio_path, ss=start, to=end)
         stream = stream.output(dest_path)
         stream = stream.overwrite_output()
         stream.run()
         return dest_path
+
+    def _export_pcm(self, audio_path: str, start: float, end: float, dest_path: str) -> str:
+        import numpy as np
+
+        with self.pcm_cache.get(audio_path) as buffer:
+            rate = buffer.sample_rate
+            samples = buffer.as_array()[int(start * rate):int(end * rate)]
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+            del samples
+        with wave.open(dest_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(rate)
+            out.writeframes(pcm.tobytes())
+        return dest_path
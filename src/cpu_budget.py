@@ -0,0 +1,183 @@
+"""Share the CPU cores between the transcription and diarization stages.
+
+Usage:
+    from cpu_budget import CpuBudget
+    budget = CpuBudget(weights={"transcribe": 2, "diarize": 1})
+    with budget.stage("transcribe", apply=worker.set_threads) as threads:
+        ...                      # apply() is called again on every rebalance
+    budget.utilization()         # {"transcribe": {"busy": 0.9, ...}, ...}
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WEIGHTS = {"transcribe": 2.0, "diarize": 1.0}
+
+
+class _Job:
+    __slots__ = ("stage", "apply", "threads", "pooled")
+
+    def __init__(self, stage: str, apply: Callable[[int], None] | None, pooled: bool = False) -> None:
+        self.stage = stage
+        self.apply = apply
+        self.threads = 0
+        self.pooled = pooled
+
+
+class CpuBudget:
+    """Split ``total`` cores between the stages that currently have work.
+
+    Each busy stage gets a share of the cores proportional to its weight, so
+    when diarization goes idle transcription gets every core and vice versa.
+    A stage's share is divided evenly between its running jobs. Jobs are told
+    their thread count through their ``apply`` callback when they start and
+    whenever the split changes.
+
+    Jobs started with ``pooled=True`` run on one process-wide thread pool,
+    such as torch's, so their ``apply`` is given the whole stage's share and
+    is only called when that share changes.
+    """
+
+    def __init__(self, total: int | None = None, weights: Dict[str, float] | None = None):
+        self.total = max(1, int(total or os.cpu_count() or 1))
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self._jobs: List[_Job] = []
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._last_change = self._created
+        self._busy: Dict[str, float] = {name: 0.0 for name in self.weights}
+        self._thread_seconds: Dict[str, float] = {name: 0.0 for name in self.weights}
+        # share last applied to the process-wide pool of each pooled stage
+        self._pool_threads: Dict[str, int] = {}
+
+    def _shares(self, jobs: List[_Job]) -> Dict[str, int]:
+        """Return the cores given to each busy stage."""
+        busy = {job.stage for job in jobs}
+        if not busy:
+            return {}
+        weight_total = sum(self.weights.get(name, 1.0) for name in busy)
+        exact = {name: self.total * self.weights.get(name, 1.0) / weight_total for name in busy}
+        shares = {name: int(share) for name, share in exact.items()}
+        # largest remainder: the cores left by rounding down go to the stages
+        # closest to their next core, so together the shares use every core
+        by_remainder = sorted(
+            busy, key=lambda name: (shares[name] - exact[name], -self.weights.get(name, 1.0), name)
+        )
+        for name in by_remainder[:self.total - sum(shares.values())]:
+            shares[name] += 1
+        # every busy stage needs a core; take it from the largest share
+        for name in busy:
+            if shares[name] == 0:
+                largest = max(shares, key=shares.get)
+                if shares[largest] > 1:
+                    shares[largest] -= 1
+                shares[name] = 1
+        return shares
+
+    def _threads_per_job(self, jobs: List[_Job]) -> Dict[str, int]:
+        shares = self._shares(jobs)
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.stage] = counts.get(job.stage, 0) + 1
+        return {name: max(1, shares[name] // counts[name]) for name in shares}
+
+    def threads_for(self, stage: str) -> int:
+        """Return the threads a new ``stage`` job would get right now."""
+        with self._lock:
+            return self._threads_per_job(self._jobs + [_Job(stage, None)])[stage]
+
+    def _account(self, now: float) -> None:
+        """Add the time since the last change to the utilization counters."""
+        elapsed = now - self._last_change
+        for name in {job.stage for job in self._jobs}:
+            self._busy[name] = self._busy.get(name, 0.0) + elapsed
+        for job in self._jobs:
+            self._thread_seconds[job.stage] = self._thread_seconds.get(job.stage, 0.0) + elapsed * job.threads
+        self._last_change = now
+
+    def _rebalance(self) -> List[_Job]:
+        """Recompute thread counts; return the jobs whose count changed."""
+        per_job = self._threads_per_job(self._jobs)
+        changed = []
+        for job in self._jobs:
+            threads = per_job[job.stage]
+            if threads != job.threads:
+                job.threads = threads
+                changed.append(job)
+        return changed
+
+    def _pool_changes(self) -> List[Tuple[Callable[[int], None], int]]:
+        """Return one ``(apply, share)`` per pooled stage whose share changed."""
+        shares = self._shares(self._jobs)
+        changes = []
+        for job in self._jobs:
+            if job.pooled and job.apply is not None and self._pool_threads.get(job.stage) != shares[job.stage]:
+                self._pool_threads[job.stage] = shares[job.stage]
+                changes.append((job.apply, shares[job.stage]))
+        return changes
+
+    def _notify(self, jobs: List[_Job], pool_changes: List[Tuple[Callable[[int], None], int]]) -> None:
+        for job in jobs:
+            if job.apply is not None and not job.pooled:
+                job.apply(job.threads)
+        for apply, threads in pool_changes:
+            apply(threads)
+
+    @contextmanager
+    def stage(
+        self, name: str, apply: Callable[[int], None] | None = None, pooled: bool = False
+    ) -> Iterator[int]:
+        """Run a job of stage ``name`` and yield its initial thread count.
+
+        For a ``pooled`` job that is the stage's whole share.
+        """
+        job = _Job(name, apply, pooled)
+        with self._lock:
+            self._account(time.monotonic())
+            self._jobs.append(job)
+            changed = self._rebalance()
+            pool_changes = self._pool_changes()
+            threads = self._shares(self._jobs)[name] if pooled else job.threads
+        logger.debug("Stage %s started with %d threads", name, threads)
+        self._notify(changed, pool_changes)
+        try:
+            yield threads
+        finally:
+            with self._lock:
+                self._account(time.monotonic())
+                self._jobs.remove(job)
+                changed = self._rebalance()
+                pool_changes = self._pool_changes()
+            self._notify(changed, pool_changes)
+
+    def utilization(self) -> Dict[str, Dict[str, float]]:
+        """Return per-stage usage since the budget was created.
+
+        ``busy`` is the fraction of wall time the stage had work, ``cores``
+        the average number of cores it was given and ``threads`` what its
+        running jobs hold right now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._account(now)
+            wall = max(now - self._created, 1e-9)
+            current: Dict[str, int] = {}
+            for job in self._jobs:
+                current[job.stage] = current.get(job.stage, 0) + job.threads
+            return {
+                name: {
+                    "busy": self._busy.get(name, 0.0) / wall,
+                    "cores": self._thread_seconds.get(name, 0.0) / wall,
+                    "threads": current.get(name, 0),
+                }
+                for name in self._busy
+            }
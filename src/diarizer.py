@@ -1,38 +1,314 @@
-from typing import List, Dict
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Tuple
 from logging_setup import get_logger
+from disk_cache import DiskCache, file_digest
+from interval_index import IntervalIndex
+from audio_decode import PcmCache
+from cpu_budget import CpuBudget
 
 logger = get_logger(__name__)
 
 # pyannote.audio is heavy, so we import lazily
 
-class Diarizer:
-    """Assigns speaker labels using a pyannote.audio pipeline."""
+DEFAULT_MODEL = "pyannote/speaker-diarization"
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+# (start, end, speaker label) as produced by Diarizer.diarize
+Track = Tuple[float, float, str]
+
+ASSIGNMENT_MODES = ("midpoint", "overlap")
+
+# Cached track lists: header, label table, then start/end float64 columns
+# and a uint16 label index column, all little-endian.
+TRACKS_MAGIC = b"DTRK"
+TRACKS_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def pack_tracks(tracks: List[Track]) -> bytes:
+    """Serialise speaker tracks into the compact cache format."""
+    labels: Dict[str, int] = {}
+    for _, _, label in tracks:
+        labels.setdefault(label, len(labels))
+    parts = [_HEADER.pack(TRACKS_MAGIC, TRACKS_VERSION, len(labels), len(tracks))]
+    for label in labels:
+        encoded = label.encode("utf-8")
+        parts.append(struct.pack("<H", len(encoded)))
+        parts.append(encoded)
+    parts.append(_le(array("d", (t[0] for t in tracks))))
+    parts.append(_le(array("d", (t[1] for t in tracks))))
+    parts.append(_le(array("H", (labels[t[2]] for t in tracks))))
+    return b"".join(parts)
+
+
+def unpack_tracks(data: bytes) -> List[Track]:
+    """Inverse of :func:`pack_tracks`.
+
+    Raises ``ValueError`` or ``struct.error`` for truncated or corrupt data.
+    """
+    magic, version, n_labels, n_tracks = _HEADER.unpack_from(data)
+    if magic != TRACKS_MAGIC or version != TRACKS_VERSION:
+        raise ValueError("Unsupported diarization cache entry")
+    offset = _HEADER.size
+    labels = []
+    for _ in range(n_labels):
+        (length,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        labels.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    # two float64 columns and one uint16 column follow the labels
+    if offset + n_tracks * (8 + 8 + 2) != len(data):
+        raise ValueError("Truncated diarization cache entry")
+    columns = []
+    for typecode in ("d", "d", "H"):
+        column = array(typecode)
+        size = column.itemsize * n_tracks
+        column.frombytes(data[offset:offset + size])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    starts, ends, label_ids = columns
+    if label_ids and max(label_ids) >= n_labels:
+        raise ValueError("Corrupt diarization cache entry")
+    return [(starts[i], ends[i], labels[label_ids[i]]) for i in range(n_tracks)]
+
+
+class SharedPipeline:
+    """A pyannote pipeline shared by every :class:`Diarizer` of one model.
 
-    def __init__(self, model_name: str = "pyannote/speaker-diarization"):
+    The pipeline can be warmed up on a background thread with :meth:`preload`
+    and is unloaded again once it has been idle for ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, model_name: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
         self.model_name = model_name
+        self.idle_timeout = idle_timeout
         self.pipeline = None
+        self._lock = threading.Lock()
+        self._users = 0
+        self._timer: threading.Timer | None = None
+
+    def load(self):
+        """Load the pyannote pipeline if it is not already in memory."""
+        with self._lock:
+            if self.pipeline is None:
+                logger.info("Loading diarization pipeline: %s", self.model_name)
+                from pyannote.audio import Pipeline
+                self.pipeline = Pipeline.from_pretrained(self.model_name)
+            return self.pipeline
+
+    def preload(self) -> threading.Thread:
+        """Load the pipeline on a background thread and return that thread."""
+
+        def run() -> None:
+            try:
+                self.load()
+            except Exception:  # pragma: no cover - logged for diagnosis
+                logger.exception("Preloading %s failed", self.model_name)
+                return
+            with self._lock:
+                if self._users == 0:
+                    self._schedule_unload()
+
+        thread = threading.Thread(target=run, name="diarizer-preload", daemon=True)
+        thread.start()
+        return thread
+
+    @contextmanager
+    def use(self) -> Iterator:
+        """Yield the loaded pipeline and keep it alive while in use."""
+        with self._lock:
+            self._users += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        try:
+            yield self.load()
+        finally:
+            with self._lock:
+                self._users -= 1
+                if self._users == 0:
+                    self._schedule_unload()
+
+    def _schedule_unload(self) -> None:
+        if self.idle_timeout is None or self.idle_timeout < 0:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.idle_timeout, self.unload)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def unload(self) -> None:
+        """Release the pipeline unless a diarization is running."""
+        with self._lock:
+            self._timer = None
+            if self._users == 0 and self.pipeline is not None:
+                logger.info("Unloading idle diarization pipeline: %s", self.model_name)
+                self.pipeline = None
+
+
+_shared_pipelines: Dict[str, SharedPipeline] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_pipeline(model_name: str = DEFAULT_MODEL, idle_timeout: float | None = None) -> SharedPipeline:
+    """Return the process-wide :class:`SharedPipeline` for ``model_name``."""
+    with _shared_lock:
+        shared = _shared_pipelines.get(model_name)
+        if shared is None:
+            shared = SharedPipeline(model_name)
+            _shared_pipelines[model_name] = shared
+        if idle_timeout is not None:
+            shared.idle_timeout = idle_timeout
+        return shared
+
+
+def _set_torch_threads(n_threads: int) -> None:
+    """Resize torch's intra-op thread pool, which pyannote runs on."""
+    import torch
+
+    torch.set_num_threads(n_threads)
+
+
+def _max_overlap_label(index: IntervalIndex, tracks: List[Track], start: float, end: float) -> str | None:
+    """Return the label with the most overlap with ``[start, end)``."""
+    totals: Dict[str, float] = {}
+    for i in sorted(index.overlapping(start, end)):
+        t_start, t_end, label = tracks[i]
+        overlap = min(end, t_end) - max(start, t_start)
+        if overlap > 0:
+            totals[label] = totals.get(label, 0.0) + overlap
+    if not totals:
+        return None
+    # dicts keep insertion order, so ties go to the earliest track
+    return max(totals, key=totals.get)
+
+
+class Diarizer:
+    """Assigns speaker labels using a pyannote.audio pipeline.
+
+    When a :class:`DiskCache` is given, the raw speaker tracks are stored
+    under the audio hash and model name so later runs on the same file, for
+    example after re-transcribing it with another Whisper model, skip the
+    pipeline entirely.
+
+    With a :class:`PcmCache`, the pipeline is fed the file's shared decoded
+    samples as an in-memory waveform instead of decoding the file itself.
+
+    With a :class:`CpuBudget`, diarization runs as a ``"diarize"`` stage job
+    and torch's intra-op thread pool is resized to the job's share of the
+    cores whenever the split changes.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        idle_timeout: float | None = None,
+        cache: DiskCache | None = None,
+        assignment: str = "midpoint",
+        pcm_cache: PcmCache | None = None,
+        cpu_budget: CpuBudget | None = None,
+    ):
+        self.model_name = model_name
+        self.shared = get_shared_pipeline(model_name, idle_timeout)
+        self.cache = cache
+        self.assignment = assignment
+        self.pcm_cache = pcm_cache
+        self.cpu_budget = cpu_budget
+
+    @property
+    def pipeline(self):
+        """The shared pipeline, or ``None`` when it is not loaded."""
+        return self.shared.pipeline
+
+    def preload(self) -> threading.Thread:
+        """Warm up the shared pipeline in the background."""
+        return self.shared.preload()
 
     def _load_pipeline(self):
         """Load the pyannote pipeline when first needed."""
-        if self.pipeline is None:
-            logger.info("Loading diarization pipeline: %s", self.model_name)
-            from pyannote.audio import Pipeline
-            self.pipeline = Pipeline.from_pretrained(self.model_name)
-        return self.pipeline
+        return self.shared.load()
 
-    def assign_speakers(self, audio_path: str, segments: List[Dict]) -> List[Dict]:
-        """Return segments with speaker labels filled in."""
-        logger.info("Assigning speakers for %s", audio_path)
-        self._load_pipeline()
-        diarization = self.pipeline(audio_path)
+    def diarize(self, audio_path: str) -> List[Track]:
+        """Run the pipeline on ``audio_path`` and return its speaker tracks.
+
+        Each track is a ``(start, end, label)`` tuple. The result does not
+        depend on the transcript, so this can run while the file is still
+        being transcribed.
+        """
+        key = None
+        if self.cache is not None:
+            key = DiskCache.make_key("tracks", TRACKS_VERSION, file_digest(audio_path), self.model_name)
+            data = self.cache.get(key)
+            if data is not None:
+                try:
+                    tracks = unpack_tracks(data)
+                except (ValueError, struct.error) as exc:
+                    # a damaged entry is a miss: drop it and diarize again
+                    logger.warning("Discarding unreadable cached tracks for %s: %s", audio_path, exc)
+                    self.cache.discard(key)
+                else:
+                    logger.info("Using cached speaker tracks for %s", audio_path)
+                    return tracks
+        logger.info("Diarizing %s", audio_path)
+        buffer = self.pcm_cache.get(audio_path) if self.pcm_cache is not None else nullcontext()
+        stage = nullcontext()
+        if self.cpu_budget is not None:
+            # torch's thread pool is process-wide, so it is sized for all diarize jobs
+            stage = self.cpu_budget.stage("diarize", apply=_set_torch_threads, pooled=True)
+        with buffer, stage, self.shared.use() as pipeline:
+            audio = buffer.waveform() if self.pcm_cache is not None else audio_path
+            diarization = pipeline(audio)
+            del audio
         # diarization.itertracks(yield_label=True) yields (segment, track, label)
-        tracks = list(diarization.itertracks(yield_label=True))
+        tracks = [
+            (float(ts.start), float(ts.end), speaker)
+            for ts, _, speaker in diarization.itertracks(yield_label=True)
+        ]
+        if key is not None:
+            self.cache.put(key, pack_tracks(tracks))
+        return tracks
+
+    @staticmethod
+    def label_segments(
+        segments: List[Dict],
+        tracks: List[Track],
+        mode: str = "midpoint",
+    ) -> List[Dict]:
+        """Label each segment with a speaker from ``tracks``.
+
+        ``mode="midpoint"`` picks the first track containing the segment
+        midpoint. ``mode="overlap"`` picks the speaker with the most total
+        overlap with the segment, falling back to the midpoint rule when the
+        segment overlaps no track.
+        """
+        if mode not in ASSIGNMENT_MODES:
+            raise ValueError(f"Unknown speaker assignment mode: {mode}")
+        index = IntervalIndex((start, end, i) for i, (start, end, _) in enumerate(tracks))
         for seg in segments:
-            mid = (seg["start"] + seg["end"]) / 2
-            label = "Unknown"
-            for ts, _, speaker in tracks:
-                if ts.start <= mid < ts.end:
-                    label = speaker
-                    break
+            label = None
+            if mode == "overlap":
+                label = _max_overlap_label(index, tracks, seg["start"], seg["end"])
+            if label is None:
+                hits = index.at((seg["start"] + seg["end"]) / 2)
+                label = tracks[min(hits)][2] if hits else "Unknown"
             seg["speaker"] = label
         return segments
+
+    def assign_speakers(self, audio_path: str, segments: List[Dict]) -> List[Dict]:
+        """Return segments with speaker labels filled in."""
+        logger.info("Assigning speakers for %s", audio_path)
+        return self.label_segments(segments, self.diarize(audio_path), self.assignment)
@@ -0,0 +1,153 @@
+"""Content-addressed on-disk cache for processing results.
+
+Usage:
+    from disk_cache import DiskCache, file_digest
+    cache = DiskCache(settings.cache_dir + "/transcripts", max_bytes=512 * 1024 * 1024)
+    key = cache.make_key(file_digest("episode.mp3"), "large")
+    data = cache.get(key)
+    if data is None:
+        cache.put(key, b"...")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Tuple
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 of the file contents as a hex string.
+
+    Digests are remembered per path, size and modification time so a file is
+    only read once per session.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(memo_key)
+    if digest is not None:
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _digests_lock:
+        _digests[memo_key] = digest
+    return digest
+
+
+class DiskCache:
+    """Store byte blobs under hashed keys with size-based LRU eviction.
+
+    The modification time of each entry doubles as its last access time, so
+    the least recently used entries are removed first once the directory grows
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, suffix: str = ".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Return a stable key for the JSON-serialisable ``parts``."""
+        blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        """Return the file that holds, or would hold, the entry for ``key``."""
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached bytes for ``key`` or ``None``."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:  # pragma: no cover - entry evicted concurrently
+            pass
+        return data
+
+    def discard(self, key: str) -> None:
+        """Delete the entry for ``key``, e.g. one that could not be read back."""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key`` and evict old entries if needed."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.evict()
+
+    def evict(self, keep: Iterable[str] = ()) -> None:
+        """Delete the least recently used entries until under ``max_bytes``.
+
+        The entries of the keys in ``keep`` are never deleted, even when they
+        alone are over the limit.
+        """
+        kept = {self.path(key) for key in keep}
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(self.suffix):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:  # pragma: no cover - raced
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, path))
+                    total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path in kept:
+                    # still counted, so older entries make room for it
+                    continue
+                logger.info("Evicting cache entry %s", path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:  # pragma: no cover - raced
+                    pass
+                except OSError as exc:
+                    # e.g. a file still mapped by a reader on Windows
+                    logger.warning("Could not evict cache entry %s: %s", path, exc)
+                    continue
+                total -= size
@@ -0,0 +1,69 @@
+"""Static index for overlap and point queries over time intervals.
+
+Usage:
+    from interval_index import IntervalIndex
+    index = IntervalIndex([(0.0, 1.5, "a"), (1.0, 3.0, "b")])
+    index.at(1.2)              # ["a", "b"]
+    index.overlapping(2.0, 4)  # ["b"]
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Tuple
+
+
+class IntervalIndex:
+    """Answer interval queries in ``O((k + 1) log n)`` time for ``k`` hits.
+
+    Intervals are half-open ``[start, end)``. They are kept sorted by start
+    and a max-end tree over that order lets queries skip every subtree whose
+    intervals all end before the query begins; each hit costs at most one
+    root-to-leaf path. Results are returned in start order (ties keep their
+    input order).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]]):
+        items = sorted(intervals, key=lambda iv: iv[0])
+        self._starts = [float(iv[0]) for iv in items]
+        self._ends = [float(iv[1]) for iv in items]
+        self._payloads = [iv[2] for iv in items]
+        size = 1
+        while size < len(items):
+            size *= 2
+        self._size = size
+        tree = [float("-inf")] * (2 * size)
+        tree[size:size + len(items)] = self._ends
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._max_end = tree
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _collect(self, limit: int, after: float) -> List[Any]:
+        """Return payloads among the first ``limit`` intervals ending after ``after``."""
+        found: List[int] = []
+        if limit <= 0:
+            return []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self._max_end[node] <= after:
+                continue
+            if node >= self._size:
+                found.append(lo)
+                continue
+            mid = (lo + hi) // 2
+            # push the right child first so results come out in start order
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return [self._payloads[i] for i in found]
+
+    def at(self, point: float) -> List[Any]:
+        """Return payloads of intervals containing ``point``."""
+        return self._collect(bisect_right(self._starts, point), point)
+
+    def overlapping(self, start: float, end: float) -> List[Any]:
+        """Return payloads of intervals that overlap ``[start, end)``."""
+        return self._collect(bisect_left(self._starts, end), start)
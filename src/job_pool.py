@@ -0,0 +1,182 @@
+"""Run background jobs on a bounded pool of Qt worker threads.
+
+Usage:
+    from job_pool import Job, JobPool
+    pool = JobPool(max_workers=3)
+    job_id = pool.submit(job, priority=JobPool.HIGH)
+    pool.cancel(job_id)          # queued jobs are dropped, running ones asked to stop
+    pool.cancel_all()
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from PySide6 import QtCore
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside :meth:`Job.run` when the job was asked to stop."""
+
+
+class Job(QtCore.QObject):
+    """Unit of background work run by a :class:`JobPool`.
+
+    Subclasses implement :meth:`run` and declare their own result signals.
+    Long-running jobs call :meth:`check_cancelled` between steps so that
+    cancelling takes effect at the next step; a job that raises
+    :class:`JobCancelled` ends quietly. ``ended`` is emitted last with the
+    job id, whether the job finished, failed or was cancelled.
+    """
+
+    failed = QtCore.Signal(str)
+    ended = QtCore.Signal(int)
+
+    def __init__(self, name: str = "") -> None:
+        super().__init__()
+        self.name = name or type(self).__name__
+        self.id: int | None = None
+        self.priority = 0
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next :meth:`check_cancelled`."""
+        self._cancel.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    def run(self) -> None:
+        raise NotImplementedError
+
+
+class _Runner(QtCore.QRunnable):
+    def __init__(self, pool: "JobPool", job: Job) -> None:
+        super().__init__()
+        self._pool = pool
+        self._job = job
+
+    def run(self) -> None:
+        # the pool keeps the job alive; the runner is deleted on its thread
+        job, self._job = self._job, None
+        self._pool._execute(job)
+
+
+class JobPool(QtCore.QObject):
+    """Run at most ``max_workers`` jobs at a time, highest priority first.
+
+    Jobs wait in a priority queue (ties keep submission order) and are handed
+    to a ``QThreadPool`` only when a worker is free, so a cancelled job that
+    has not started never runs. Finished, failed and cancelled jobs are
+    dropped from the pool when their ``ended`` signal reaches the pool's
+    thread, so their last signals are delivered before they go away.
+    """
+
+    LOW = -1
+    NORMAL = 0
+    HIGH = 1
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        super().__init__()
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self._pool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(self.max_workers)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: List[Tuple[int, int, Job]] = []
+        self._running: Dict[int, Job] = {}
+
+    def submit(self, job: Job, priority: int = NORMAL) -> int:
+        """Queue ``job`` and return its id."""
+        with self._lock:
+            job.id = next(self._ids)
+            job.priority = priority
+            heapq.heappush(self._pending, (-priority, job.id, job))
+        job.ended.connect(self._on_job_ended)
+        logger.debug("Queued job %d (%s) with priority %d", job.id, job.name, priority)
+        self._dispatch()
+        return job.id
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job; return whether it was found."""
+        with self._lock:
+            job = self._running.get(job_id)
+            if job is None:
+                for i, (_, _, queued) in enumerate(self._pending):
+                    if queued.id == job_id:
+                        job = queued
+                        self._pending.pop(i)
+                        heapq.heapify(self._pending)
+                        break
+        if job is None:
+            return False
+        logger.info("Cancelling job %d (%s)", job_id, job.name)
+        job.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        """Drop every queued job and ask the running ones to stop."""
+        with self._lock:
+            jobs = [job for _, _, job in self._pending] + list(self._running.values())
+            self._pending.clear()
+        logger.info("Cancelling %d jobs", len(jobs))
+        for job in jobs:
+            job.cancel()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def running_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def jobs(self) -> Dict[int, str]:
+        """Return the name of every queued or running job by id."""
+        with self._lock:
+            jobs = {job.id: job.name for _, _, job in self._pending}
+            jobs.update((job_id, job.name) for job_id, job in self._running.items())
+            return jobs
+
+    def wait(self, timeout_ms: int = -1) -> bool:
+        """Block until the running jobs finish; return whether they did."""
+        return self._pool.waitForDone(timeout_ms)
+
+    def _dispatch(self) -> None:
+        starting = []
+        with self._lock:
+            while self._pending and len(self._running) < self.max_workers:
+                _, _, job = heapq.heappop(self._pending)
+                self._running[job.id] = job
+                starting.append(job)
+        for job in starting:
+            self._pool.start(_Runner(self, job))
+
+    def _execute(self, job: Job) -> None:
+        try:
+            job.check_cancelled()
+            job.run()
+        except JobCancelled:
+            logger.info("Job %d (%s) cancelled", job.id, job.name)
+        except Exception as exc:
+            logger.exception("Job %d (%s) failed", job.id, job.name)
+            job.failed.emit(str(exc))
+        finally:
+            job.ended.emit(job.id)
+
+    def _on_job_ended(self, job_id: int) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
+        self._dispatch()
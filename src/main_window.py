@@ -2,7 +2,14 @@ from __future__ import annotations
 
 """PySide6 GUI for the Podcast Assistant."""
 
-from PySide6 import QtWidgets, QtCore
+import os
+from bisect import bisect_left
+from contextlib import closing
+from heapq import merge
+from itertools import groupby, islice
+from operator import itemgetter
+
+from PySide6 import QtWidgets, QtCore, QtGui
 from logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -14,43 +21,136 @@ from settings import Settings
 from keyword_index import KeywordIndex
 
 from transcribe_worker import TranscribeWorker
+from model_registry import get_registry
+from disk_cache import DiskCache
+from audio_decode import PcmCache
 from diarizer import Diarizer
 from transcript_aggregator import TranscriptAggregator
+from pipeline_scheduler import PipelineScheduler, shortest_first
+from job_pool import Job, JobPool
+from checkpoint import TRANSCRIBED, RunCheckpoint
+from project_store import DONE_STATES, PAGE_SIZE, PROJECT_EXTENSION, QUEUED, REFINED, ProjectStore
+from cpu_budget import CpuBudget
+from memory_budget import MemoryAdmission, estimate_job_memory, total_memory
+from audio_chunks import cached_duration
 
 
-class TranscriberThread(QtCore.QThread):
-    """Thread wrapper around :class:`TranscribeWorker`."""
+class TranscriberJob(Job):
+    """Job wrapper around :meth:`TranscribeWorker.transcribe_stream`.
+
+    ``segment`` fires for each segment as soon as it is transcribed and
+    ``progress`` follows the position in the audio.
+    """
 
     progress = QtCore.Signal(float)
+    segment = QtCore.Signal(dict)
     finished = QtCore.Signal(list)
 
-    def __init__(self, audio_path: str, model: str = "base", parent=None) -> None:
-        super().__init__(parent)
+    def __init__(
+        self,
+        audio_path: str,
+        model: str = "base",
+        cache: DiskCache | None = None,
+        chunk_workers: int = 1,
+        vad: bool = False,
+        pcm_cache: PcmCache | None = None,
+        stream_seconds: float = 60.0,
+        cpu_budget: CpuBudget | None = None,
+    ) -> None:
+        super().__init__(f"transcribe {os.path.basename(audio_path)}")
         self.audio_path = audio_path
-        self.worker = TranscribeWorker(model)
+        self.worker = TranscribeWorker(
+            model,
+            cache=cache,
+            chunk_workers=chunk_workers,
+            vad=vad,
+            pcm_cache=pcm_cache,
+            stream_seconds=stream_seconds,
+            cpu_budget=cpu_budget,
+        )
 
-    def run(self) -> None:  # pragma: no cover - not exercised in tests
-        segments = self.worker.transcribe(self.audio_path)
-        self.progress.emit(1.0)
+    def run(self) -> None:
+        segments = []
+        stream = self.worker.transcribe_stream(self.audio_path, on_progress=self.progress.emit)
+        with closing(stream):
+            for seg in stream:
+                self.check_cancelled()
+                segments.append(seg)
+                self.segment.emit(seg)
         self.finished.emit(segments)
 
 
-class DiarizerThread(QtCore.QThread):
-    """Thread wrapper around :class:`Diarizer`."""
+class RefinerJob(TranscriberJob):
+    """Re-transcribes a file with a larger model in the background.
+
+    ``refined`` carries each finished window as ``(start, end, segments)``
+    so the draft segments of just that span can be swapped out, and
+    ``completed`` fires once every window has been refined.
+    """
+
+    refined = QtCore.Signal(float, float, list)
+    completed = QtCore.Signal()
+
+    def run(self) -> None:
+        windows = self.worker.transcribe_windows(self.audio_path, on_progress=self.progress.emit)
+        with closing(windows):
+            for start, end, segments in windows:
+                self.check_cancelled()
+                self.refined.emit(start, end, segments)
+        self.completed.emit()
+
+
+class DiarizerJob(Job):
+    """Job wrapper around :meth:`Diarizer.diarize`."""
 
     progress = QtCore.Signal(float)
     finished = QtCore.Signal(list)
 
-    def __init__(self, audio_path: str, segments: list, parent=None) -> None:
-        super().__init__(parent)
+    def __init__(
+        self,
+        audio_path: str,
+        idle_timeout: float | None = None,
+        cache: DiskCache | None = None,
+        pcm_cache: PcmCache | None = None,
+        cpu_budget: CpuBudget | None = None,
+    ) -> None:
+        super().__init__(f"diarize {os.path.basename(audio_path)}")
         self.audio_path = audio_path
-        self.segments = segments
-        self.worker = Diarizer()
+        self.worker = Diarizer(
+            idle_timeout=idle_timeout, cache=cache, pcm_cache=pcm_cache, cpu_budget=cpu_budget
+        )
 
     def run(self) -> None:  # pragma: no cover - not exercised in tests
-        labeled = self.worker.assign_speakers(self.audio_path, self.segments)
+        tracks = self.worker.diarize(self.audio_path)
+        # pyannote cannot be interrupted; drop the result instead
+        self.check_cancelled()
         self.progress.emit(1.0)
-        self.finished.emit(labeled)
+        self.finished.emit(tracks)
+
+
+class DurationJob(Job):
+    """Probe the duration of files off the GUI thread.
+
+    ``finished`` carries ``{path: seconds}`` for the files that could be
+    probed; the others are left out.
+    """
+
+    finished = QtCore.Signal(dict)
+
+    def __init__(self, paths: list[str], cache: DiskCache | None = None) -> None:
+        super().__init__(f"probe {len(paths)} files")
+        self.paths = list(paths)
+        self.cache = cache
+
+    def run(self) -> None:
+        durations = {}
+        for path in self.paths:
+            self.check_cancelled()
+            try:
+                durations[path] = cached_duration(path, self.cache)
+            except Exception:  # unreadable or no ffprobe
+                logger.warning("Could not probe the duration of %s", path)
+        self.finished.emit(durations)
 
 
 class SettingsDialog(QtWidgets.QDialog):
@@ -128,20 +228,59 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings_button = QtWidgets.QPushButton("Settings")
         layout.addWidget(self.settings_button)
 
+        self.project_button = QtWidgets.QPushButton("Open Project")
+        layout.addWidget(self.project_button)
+
         self.process_button = QtWidgets.QPushButton("Process Files")
         layout.addWidget(self.process_button)
 
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        layout.addWidget(self.cancel_button)
+
         self.transcript = QtWidgets.QPlainTextEdit()
         layout.addWidget(self.transcript)
 
         self.results = QtWidgets.QPlainTextEdit()
         layout.addWidget(self.results)
 
-        # Maintain running threads and aggregated transcript
-        self.threads: list[QtCore.QThread] = []
+        # Background jobs and aggregated transcript
+        self.jobs = JobPool(self._job_workers())
         self.aggregator = TranscriptAggregator()
+        self._watch_aggregator()
         self.clip_exporter = ClipExporter()
-        self.current_index = 0
+        self.transcript_cache = self._make_cache("transcripts", "transcript_cache_mb", 512)
+        self.tracks_cache = self._make_cache("diarization", "diarization_cache_mb", 64)
+        # decoded audio shared by transcription and diarization
+        self.pcm_cache = self._make_cache("pcm", "pcm_cache_mb", 4096, PcmCache)
+        self.duration_cache = self._make_cache("durations", "duration_cache_mb", 1)
+        # cores shared by the transcription and diarization threads
+        self.cpu_budget = CpuBudget(
+            total=self._processing_option("cpu_threads", 0) or None,
+            weights=self._processing_option("cpu_weights", None),
+        )
+        self.memory_admission = self._make_memory_admission()
+        checkpoint_dir = getattr(self.settings, "checkpoint_dir", None)
+        self.checkpoint = RunCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        self.scheduler: PipelineScheduler | None = None
+        # files of the current run, and their durations once a DurationJob
+        # has probed them
+        self._run_paths: list[str] | None = None
+        # checkpoint index of each file in the run
+        self._checkpoint_indices: list[int] = []
+        self._durations: dict[str, float] = {}
+        # (start, segment id) of each transcript line, None when the pane
+        # holds lines that are not in the aggregator
+        self._display_rows: list | None = []
+        self._tracks: dict[str, list] = {}
+        self._refine_queue: list[str] = []
+        self.refiner: RefinerJob | None = None
+        self.project: ProjectStore | None = None
+        self._project_pages = None
+        self._project_loaded = 0
+        # the resume flag of a start requested while the project was loading
+        self._start_when_loaded: bool | None = None
+        self._progress_bars: list = []
+        self._stage_progress: list[list[float]] = []
         self.processing = False
 
         self.search_button.clicked.connect(self._on_search)
@@ -152,7 +291,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.export_segment_button.clicked.connect(self._on_export_segment)
         self.rename_button.clicked.connect(self._on_rename_speakers)
         self.settings_button.clicked.connect(self._on_settings)
+        self.project_button.clicked.connect(self._on_open_project)
         self.process_button.clicked.connect(self.start_processing)
+        self.cancel_button.clicked.connect(self.cancel_processing)
+
+        last_project = getattr(self.settings, "ui", {}).get("project")
+        if last_project and os.path.exists(last_project):
+            self.open_project(last_project)
+        if self.checkpoint is not None and self.checkpoint.pending_paths():
+            # ask once the window is up
+            QtCore.QTimer.singleShot(0, self.offer_resume)
 
     # Drag and drop events
     def dragEnterEvent(self, event):  # pragma: no cover - relies on GUI runtime
@@ -178,60 +326,489 @@ class MainWindow(QtWidgets.QMainWindow):
         item.setData(QtCore.Qt.UserRole, (path, progress))
         self.file_list.addItem(item)
         self.file_list.setItemWidget(item, widget)
+        if self.project is not None and self.project.file_state(path) is None:
+            self.project.set_state(path, QUEUED)
 
-    def start_processing(self) -> None:
-        """Begin processing files in the current list order."""
+    def offer_resume(self) -> None:
+        """Offer to resume a run that did not finish, e.g. after a crash."""
+        paths = self.checkpoint.pending_paths() if self.checkpoint is not None else None
+        if not paths or self.processing:
+            return
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Resume Processing",
+            f"Processing of {len(paths)} files did not finish. Resume where it stopped?",
+        )
+        if answer != QtWidgets.QMessageBox.Yes:
+            self.checkpoint.clear()
+            return
+        # the checkpoint only matches the run's own file list
+        self.file_list.clear()
+        for path in paths:
+            self.add_file(path)
+        self.start_processing(resume=True)
+
+    def start_processing(self, resume: bool = False) -> None:
+        """Begin processing files in the current list order.
+
+        With ``resume`` the stages checkpointed by an interrupted run of the
+        same files are reused instead of being run again.
+        """
         if self.processing:
             return
+        if self._project_pages is not None:
+            # the project's transcripts go into the aggregator first, so
+            # they cannot interleave with the new run's segments
+            logger.info("Processing starts once the project has loaded")
+            self._start_when_loaded = resume
+            return
         logger.info("Starting processing of file list")
         self.processing = True
-        self.current_index = 0
-        self._process_next()
+        entries = [
+            self.file_list.item(i).data(QtCore.Qt.UserRole)
+            for i in range(self.file_list.count())
+        ]
+        run = list(range(len(entries)))
+        if self.project is not None:
+            # files the project already holds are not processed again
+            run = [i for i in run if self.project.file_state(entries[i][0]) not in DONE_STATES]
+        if self.checkpoint is not None:
+            # the checkpoint covers the whole list, so a resumed run still
+            # matches it; the files skipped here count as aggregated
+            self.checkpoint.start(
+                [path for path, _ in entries], resume=resume, options=self._checkpoint_options()
+            )
+            for i in sorted(set(range(len(entries))) - set(run)):
+                self.checkpoint.mark_aggregated(i)
+        self._checkpoint_indices = run
+        # only files still waiting for their refinement need their tracks
+        refining = set(self._refine_queue)
+        if self.refiner is not None:
+            refining.add(self.refiner.audio_path)
+        self._tracks = {path: tracks for path, tracks in self._tracks.items() if path in refining}
+        entries = [entries[i] for i in run]
+        self._progress_bars = [progress for _, progress in entries]
+        self._stage_progress = [[0.0, 0.0] for _ in entries]
+        # warm up the shared diarization pipeline while the first file is
+        # still being transcribed
+        Diarizer(idle_timeout=self._diarization_idle_timeout()).preload()
+        paths = [path for path, _ in entries]
+        self._run_paths = paths
+        self._durations = {}
+        probe = DurationJob(paths, self.duration_cache)
+        probe.finished.connect(lambda durations: self._on_durations(paths, durations))
+        if self._processing_option("schedule", "list") == "shortest_first":
+            # the order needs every duration, so the scheduler starts once they are in
+            self.scheduler = None
+            self.jobs.submit(probe, priority=JobPool.HIGH)
+            return
+        # files are admitted with a conservative estimate until the probe is done
+        scheduler = self._make_scheduler(paths)
+        self.jobs.submit(probe, priority=JobPool.HIGH)
+        scheduler.start()
+
+    def _make_scheduler(self, paths: list[str]) -> PipelineScheduler:
+        self.scheduler = PipelineScheduler(
+            paths,
+            self._start_transcribe_stage,
+            self._start_diarize_stage,
+            self._on_file_ready,
+            merge=self._merge_speakers,
+            on_finished=self._on_processing_finished,
+            transcribe_workers=self._processing_option("transcribe_workers", 1),
+            diarize_workers=self._processing_option("diarize_workers", 1),
+            queue_size=self._processing_option("stage_queue_size", 2),
+            admit=self._admit_file,
+            release=self._release_file,
+            order=self._processing_order(paths),
+            on_failed=self._on_file_failed,
+        )
+        return self.scheduler
+
+    def cancel_processing(self) -> None:
+        """Stop processing the file list.
 
-    def _process_next(self) -> None:
-        if self.current_index >= self.file_list.count():
-            self.processing = False
+        Queued jobs are dropped and running ones stop at their next segment;
+        whatever they report afterwards is ignored.
+        """
+        if not self.processing:
             return
-        item = self.file_list.item(self.current_index)
-        path, progress = item.data(QtCore.Qt.UserRole)
-        logger.debug("Processing file %s", path)
-        t_thread = TranscriberThread(path, parent=self)
-        self.threads.append(t_thread)
-        t_thread.progress.connect(lambda p: progress.setValue(int(p * 50)))
-
-        def on_transcribed(segs: list) -> None:
-            d_thread = DiarizerThread(path, segs, parent=self)
-            self.threads.append(d_thread)
-            d_thread.progress.connect(
-                lambda p: progress.setValue(50 + int(p * 50))
-            )
-            d_thread.finished.connect(
-                lambda labeled: self._on_diarized(path, labeled, progress)
-            )
-            d_thread.start()
+        logger.info("Cancelling processing of file list")
+        self.jobs.cancel_all()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        self.scheduler = None
+        self._run_paths = None
+        self._refine_queue.clear()
+        self.refiner = None
+        self._tracks.clear()
+        # reservations of the abandoned files are never released
+        self.memory_admission = self._make_memory_admission()
+        self.processing = False
+
+    def _processing_option(self, name: str, default):
+        """Return a processing option from settings or ``default``."""
+        return getattr(self.settings, "processing", {}).get(name, default)
+
+    def _checkpoint_options(self) -> dict:
+        """Return the options the checkpointed stage results depend on."""
+        return {
+            TRANSCRIBED: {
+                "model": self._processing_option("transcribe_model", "base"),
+                "vad": self._processing_option("vad", False),
+                # chunked files are cut into windows of their own
+                "chunked": self._processing_option("transcribe_chunk_workers", 1) > 1,
+                "stream_seconds": self._processing_option("stream_seconds", 60.0),
+            },
+        }
+
+    def _make_cache(self, name: str, size_option: str, default_mb: int, cache_type=DiskCache):
+        """Return a cache under the settings cache directory, if there is one.
+
+        A size of zero disables the cache.
+        """
+        cache_dir = getattr(self.settings, "cache_dir", None)
+        max_mb = self._processing_option(size_option, default_mb)
+        if not cache_dir or not max_mb:
+            return None
+        return cache_type(os.path.join(cache_dir, name), max_bytes=int(max_mb) * 1024 * 1024)
+
+    def _job_workers(self) -> int:
+        """Return how many background jobs may run at once.
+
+        Zero means one per stage worker plus one for the refinement pass.
+        """
+        workers = self._processing_option("job_workers", 0)
+        if workers:
+            return int(workers)
+        return (
+            int(self._processing_option("transcribe_workers", 1))
+            + int(self._processing_option("diarize_workers", 1))
+            + 1
+        )
+
+    def _processing_order(self, paths: list[str]) -> list[int] | None:
+        """Return the order in which files enter the pipeline.
+
+        With the ``shortest_first`` schedule short files no longer wait
+        behind long ones; files that could not be probed go last. ``None``
+        keeps the list order.
+        """
+        if self._processing_option("schedule", "list") != "shortest_first":
+            return None
+        order = shortest_first(paths, self._durations.get)
+        logger.info("Processing shortest files first: %s", [paths[i] for i in order])
+        return order
+
+    def _on_durations(self, paths: list[str], durations: dict) -> None:
+        if paths is not self._run_paths:  # cancelled run
+            return
+        self._durations.update(durations)
+        if self.scheduler is None:
+            self._make_scheduler(paths).start()
+        else:
+            # files held back on the estimate may fit now
+            self.scheduler.retry_admission()
+
+    def _make_memory_admission(self) -> MemoryAdmission | None:
+        """Return the admission control for the configured memory ceiling.
+
+        A ceiling of zero means 80% of the physical memory.
+        """
+        ceiling_mb = self._processing_option("memory_ceiling_mb", 0)
+        if ceiling_mb:
+            return MemoryAdmission(int(ceiling_mb) * 1024 * 1024)
+        total = total_memory()
+        return MemoryAdmission(int(total * 0.8)) if total else None
+
+    def _admit_file(self, index: int, path: str) -> bool:
+        """Let a file into the pipeline only if its estimated memory fits.
+
+        A file whose duration has not been probed yet is estimated at the
+        conservative default length.
+        """
+        if self.memory_admission is None:
+            return True
+        model = self._processing_option("transcribe_model", "base")
+        estimate = estimate_job_memory(
+            model, self._durations.get(path), model_loaded=model in get_registry().stats()["models"]
+        )
+        return self.memory_admission.try_admit(index, estimate)
+
+    def _release_file(self, index: int, path: str) -> None:
+        if self.memory_admission is not None:
+            self.memory_admission.release(index)
+
+    def _diarization_idle_timeout(self) -> float:
+        return float(self._processing_option("diarization_idle_timeout", 600.0))
+
+    def _merge_speakers(self, segments: list, tracks: list) -> list:
+        mode = self._processing_option("speaker_assignment", "midpoint")
+        return Diarizer.label_segments(segments, tracks, mode)
+
+    def _set_stage_progress(self, index: int, stage: int, value: float) -> None:
+        """Show the combined transcription and diarization progress of a file."""
+        self._stage_progress[index][stage] = value
+        self._progress_bars[index].setValue(int(sum(self._stage_progress[index]) * 50))
+
+    def _start_transcribe_stage(self, index: int, path: str) -> None:
+        scheduler = self.scheduler
+        segments = None
+        if self.checkpoint is not None:
+            segments = self.checkpoint.transcript(self._checkpoint_indices[index])
+        if segments is not None:
+            logger.info("Reusing the checkpointed transcript of %s", path)
+            self._set_stage_progress(index, 0, 1.0)
+            scheduler.transcribed(index, segments)
+            return
+        logger.debug("Transcribing file %s", path)
+        job = TranscriberJob(
+            path,
+            model=self._processing_option("transcribe_model", "base"),
+            cache=self.transcript_cache,
+            chunk_workers=self._processing_option("transcribe_chunk_workers", 1),
+            vad=self._processing_option("vad", False),
+            pcm_cache=self.pcm_cache,
+            stream_seconds=self._processing_option("stream_seconds", 60.0),
+            cpu_budget=self.cpu_budget,
+        )
+        job.progress.connect(lambda p: self._set_stage_progress(index, 0, p))
+        job.segment.connect(lambda seg: self._on_draft_segment(scheduler, path, seg))
+        job.finished.connect(lambda segs: self._on_transcribed(scheduler, index, segs))
+        job.failed.connect(
+            lambda error: self._on_stage_failed(scheduler, index, PipelineScheduler.TRANSCRIBE, error)
+        )
+        self.jobs.submit(job)
+
+    def _start_diarize_stage(self, index: int, path: str) -> None:
+        scheduler = self.scheduler
+        tracks = None
+        if self.checkpoint is not None:
+            tracks = self.checkpoint.tracks(self._checkpoint_indices[index])
+        if tracks is not None:
+            logger.info("Reusing the checkpointed speaker tracks of %s", path)
+            self._set_stage_progress(index, 1, 1.0)
+            self._tracks[path] = tracks
+            scheduler.diarized(index, tracks)
+            return
+        logger.debug("Diarizing file %s", path)
+        job = DiarizerJob(
+            path,
+            idle_timeout=self._diarization_idle_timeout(),
+            cache=self.tracks_cache,
+            pcm_cache=self.pcm_cache,
+            cpu_budget=self.cpu_budget,
+        )
+        job.progress.connect(lambda p: self._set_stage_progress(index, 1, p))
+        job.finished.connect(lambda tracks: self._on_tracks(scheduler, index, path, tracks))
+        job.failed.connect(
+            lambda error: self._on_stage_failed(scheduler, index, PipelineScheduler.DIARIZE, error)
+        )
+        self.jobs.submit(job)
 
-        t_thread.finished.connect(on_transcribed)
-        t_thread.start()
+    def _on_transcribed(self, scheduler: PipelineScheduler, index: int, segments: list) -> None:
+        if scheduler is not self.scheduler:  # cancelled run
+            return
+        if self.checkpoint is not None:
+            self.checkpoint.save_transcript(self._checkpoint_indices[index], segments)
+        scheduler.transcribed(index, segments)
 
-    def _on_diarized(self, path: str, segments: list, progress: QtWidgets.QProgressBar) -> None:
-        """Handle diarization completion for a file."""
-        logger.info("Diarization finished for %s", path)
-        self.aggregator.add_segments(path, segments)
-        self.display_segments(segments)
-        progress.setValue(100)
-        self.current_index += 1
-        self._process_next()
+    def _on_tracks(self, scheduler: PipelineScheduler, index: int, path: str, tracks: list) -> None:
+        if scheduler is not self.scheduler:  # cancelled run
+            return
+        if self.checkpoint is not None:
+            self.checkpoint.save_tracks(self._checkpoint_indices[index], tracks)
+        # kept so the refinement pass can label its segments too
+        self._tracks[path] = tracks
+        scheduler.diarized(index, tracks)
+
+    def _on_stage_failed(self, scheduler: PipelineScheduler, index: int, stage: str, error: str) -> None:
+        if scheduler is not self.scheduler:  # cancelled run
+            return
+        scheduler.failed(index, stage, error)
+
+    def _on_file_failed(self, index: int, path: str, error: str) -> None:
+        """Drop a file whose stage failed; the rest of the run carries on."""
+        logger.warning("Skipping %s: %s", path, error)
+        self._progress_bars[index].setValue(0)
+        self._tracks.pop(path, None)
+        # its streamed drafts are all that is left of it
+        self.aggregator.replace_segments(path, [])
+
+    def _on_draft_segment(self, scheduler: PipelineScheduler, path: str, segment: dict) -> None:
+        """Show a segment while its file is still being transcribed.
+
+        Drafts are searchable right away and are replaced by the
+        speaker-labelled segments once the file is ready.
+        """
+        if scheduler is not self.scheduler:  # cancelled run
+            return
+        self.aggregator.add_segments(path, [segment])
+
+    def _on_file_ready(self, index: int, path: str, segments: list) -> None:
+        """Aggregate a finished file; called in file list order."""
+        logger.info("Processing finished for %s", path)
+        logger.info("Model registry: %s", get_registry().stats())
+        self.aggregator.replace_segments(path, segments)
+        self._progress_bars[index].setValue(100)
+        if self.checkpoint is not None:
+            self.checkpoint.mark_aggregated(self._checkpoint_indices[index])
+        if self.project is not None:
+            self.project.save_file(path, self.aggregator.file_segments(path))
+        if self._processing_option("two_pass", False):
+            self._queue_refinement(path)
+        else:
+            self._tracks.pop(path, None)
+
+    def _queue_refinement(self, path: str) -> None:
+        """Schedule the large-model pass; files are refined one at a time."""
+        self._refine_queue.append(path)
+        if self.refiner is None:
+            self._start_next_refinement()
+
+    def _start_next_refinement(self) -> None:
+        if not self._refine_queue:
+            self.refiner = None
+            return
+        path = self._refine_queue.pop(0)
+        model = self._processing_option("refine_model", "large")
+        logger.info("Refining %s with the %s model", path, model)
+        job = RefinerJob(
+            path,
+            model=model,
+            cache=self.transcript_cache,
+            chunk_workers=self._processing_option("transcribe_chunk_workers", 1),
+            vad=self._processing_option("vad", False),
+            pcm_cache=self.pcm_cache,
+            stream_seconds=self._processing_option("stream_seconds", 60.0),
+            cpu_budget=self.cpu_budget,
+        )
+        self.refiner = job
+        job.refined.connect(lambda start, end, segs: self._on_refined(path, start, end, segs))
+        job.completed.connect(lambda: self._on_refinement_done(path))
+        # ended also follows a failed or cancelled refinement
+        job.ended.connect(self._on_refiner_ended)
+        # the draft is already usable, so new files go first
+        self.jobs.submit(job, priority=JobPool.LOW)
+
+    def _on_refinement_done(self, path: str) -> None:
+        if self.project is not None:
+            self.project.save_file(path, self.aggregator.file_segments(path), state=REFINED)
+
+    def _on_refiner_ended(self, job_id: int) -> None:
+        if self.refiner is None or self.refiner.id != job_id:  # cancelled run
+            return
+        path = self.refiner.audio_path
+        if path not in self._refine_queue:
+            self._tracks.pop(path, None)
+        self._start_next_refinement()
+
+    def _on_refined(self, path: str, start: float, end: float, segments: list) -> None:
+        """Swap the draft segments of ``[start, end)`` for refined ones."""
+        tracks = self._tracks.get(path)
+        if tracks is not None:
+            # label like the draft, then keep the speakers' new names
+            segments = [
+                dict(seg, speaker=self.aggregator.speaker_name(seg["speaker"])) if "speaker" in seg else seg
+                for seg in self._merge_speakers(segments, tracks)
+            ]
+        self.aggregator.replace_span(path, start, end, segments)
+
+    def _watch_aggregator(self) -> None:
+        self.aggregator.add_listener(self._on_transcript_change)
+
+    def _on_transcript_change(self, change) -> None:
+        """Keep the transcript pane and the project in step with the aggregator."""
+        keys = list(zip(change.starts, change.ids))
+        if change.kind == TranscriptAggregator.INSERTED:
+            self._apply_transcript_changes([], change.ids)
+        elif change.kind == TranscriptAggregator.REMOVED:
+            self._apply_transcript_changes(keys, [])
+        elif change.kind == TranscriptAggregator.RENAMED:
+            if self.project is not None:
+                self.project.rename_speakers(change.speakers)
+            # redraw just the lines of the renamed speakers
+            self._apply_transcript_changes(keys, change.ids)
+        elif change.kind == TranscriptAggregator.RENUMBERED:
+            # the order is kept, so the pane's lines stay as they are
+            if self._display_rows is not None:
+                renumbered = change.renumbered
+                self._display_rows = [(start, renumbered[seg_id]) for start, seg_id in self._display_rows]
+
+    def _apply_transcript_changes(self, removed: list, added: list) -> None:
+        """Update only the transcript lines of the removed and added segments.
+
+        ``removed`` holds the ``(start, id)`` keys of the lines to drop and
+        ``added`` the ids of the segments to show.
+        """
+        if self._display_rows is None:
+            self._refresh_transcript_display()
+            return
+        # from the bottom up, so the rows still to remove keep their number
+        for key in sorted(removed, reverse=True):
+            row = bisect_left(self._display_rows, key)
+            if row < len(self._display_rows) and self._display_rows[row] == key:
+                self._remove_transcript_row(row)
+                del self._display_rows[row]
+        for seg_id in added:
+            seg = self.aggregator.get_segment(seg_id)
+            key = (seg.get("start", 0.0), seg_id)
+            row = bisect_left(self._display_rows, key)
+            self._insert_transcript_row(row, self._format_line(seg))
+            self._display_rows.insert(row, key)
+
+    def _remove_transcript_row(self, row: int) -> None:
+        doc = self.transcript.document()
+        block = doc.findBlockByNumber(row)
+        cursor = QtGui.QTextCursor(block)
+        following = block.next()
+        if following.isValid():
+            # take the line together with the separator after it
+            cursor.setPosition(following.position(), QtGui.QTextCursor.KeepAnchor)
+        else:
+            if row > 0:
+                cursor.setPosition(block.position() - 1)
+            cursor.setPosition(block.position() + block.length() - 1, QtGui.QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def _insert_transcript_row(self, row: int, text: str) -> None:
+        if row >= len(self._display_rows):
+            self.transcript.appendPlainText(text)
+            return
+        cursor = QtGui.QTextCursor(self.transcript.document().findBlockByNumber(row))
+        cursor.insertText(text + "\n")
+
+    @staticmethod
+    def _format_line(seg: dict) -> str:
+        return f"[{seg.get('speaker', '')}] {seg.get('text', '')}"
+
+    def _on_processing_finished(self) -> None:
+        logger.info("Finished processing file list")
+        logger.info("CPU utilization by stage: %s", self.cpu_budget.utilization())
+        if self.memory_admission is not None:
+            logger.info("Memory admission: %s", self.memory_admission.stats())
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        self.processing = False
 
     # Placeholder hooks for workers
     def start_transcription(self, path: str) -> None:
         """Start transcribing a file."""
         logger.info("Starting single transcription for %s", path)
-        thread = TranscriberThread(path, parent=self)
-        thread.finished.connect(lambda segs: self.display_segments(segs))
-        thread.start()
+        job = TranscriberJob(
+            path,
+            cache=self.transcript_cache,
+            pcm_cache=self.pcm_cache,
+            stream_seconds=self._processing_option("stream_seconds", 60.0),
+            cpu_budget=self.cpu_budget,
+        )
+        job.segment.connect(lambda seg: self.display_segments([seg]))
+        # started by hand, so it goes ahead of queued pipeline work
+        self.jobs.submit(job, priority=JobPool.HIGH)
 
     def display_segments(self, segments: list) -> None:
         """Append segments to the transcript display."""
+        self._display_rows = None
         for seg in segments:
             text = f"[{seg.get('speaker', '')}] {seg.get('text', '')}\n"
             self.transcript.appendPlainText(text)
@@ -258,21 +835,25 @@ class MainWindow(QtWidgets.QMainWindow):
             text = f"[{seg.get('speaker', '')}] {seg.get('text', '')}\n"
             self.results.appendPlainText(text)
 
-    def _refresh_transcript_display(self) -> None:
-        """Refresh the transcript pane to reflect stored segments."""
+    def _clear_transcript_pane(self) -> None:
         if hasattr(self.transcript, "clear"):
             self.transcript.clear()
         else:  # test stub
             self.transcript._text = ""
-        for seg in self.aggregator.get_transcript():
-            text = f"[{seg.get('speaker', '')}] {seg.get('text', '')}"
-            self.transcript.appendPlainText(text)
+        self._display_rows = []
+
+    def _refresh_transcript_display(self) -> None:
+        """Refresh the transcript pane to reflect stored segments."""
+        self._clear_transcript_pane()
+        for seg_id in self.aggregator.transcript_ids():
+            seg = self.aggregator.get_segment(seg_id)
+            self.transcript.appendPlainText(self._format_line(seg))
+            self._display_rows.append((seg.get("start", 0.0), seg_id))
 
     def _on_rename_speakers(self) -> None:
         """Prompt user to rename each detected speaker."""
-        segments = self.aggregator.get_transcript()
-        names = sorted({seg.get("speaker", "") for seg in segments})
-        for name in names:
+        mapping = {}
+        for name in self.aggregator.speakers():
             new, ok = QtWidgets.QInputDialog.getText(
                 self,
                 "Rename Speaker",
@@ -280,8 +861,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 text=name,
             )
             if ok and new and new != name:
-                self.aggregator.rename_speaker(name, new)
-        self._refresh_transcript_display()
+                mapping[name] = new
+        if not mapping:
+            return
+        self.aggregator.rename_speakers(mapping)
 
     # Export helpers
     def _export_transcript(self, exporter, filter_mask: str) -> None:
@@ -306,6 +889,11 @@ class MainWindow(QtWidgets.QMainWindow):
     def _selected_segment(self):
         cursor = self.transcript.textCursor()
         line = cursor.blockNumber()
+        if self._display_rows is not None:
+            # the pane mirrors the aggregator, so the line maps straight to an id
+            if 0 <= line < len(self._display_rows):
+                return self.aggregator.get_segment(self._display_rows[line][1])
+            return None
         segments = self.aggregator.get_transcript()
         if 0 <= line < len(segments):
             return segments[line]
@@ -325,6 +913,80 @@ class MainWindow(QtWidgets.QMainWindow):
         audio_path = path.rsplit(".", 1)[0] + ".wav"
         self.clip_exporter.export_clip(seg.get("file", ""), seg.get("start", 0.0), seg.get("end", 0.0), audio_path)
 
+    def _on_open_project(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Open or Create Project",
+            "",
+            f"Podcast Projects (*{PROJECT_EXTENSION})",
+            options=QtWidgets.QFileDialog.DontConfirmOverwrite,
+        )
+        if path:
+            self.open_project(path)
+
+    def open_project(self, path: str) -> None:
+        """Switch to the project file ``path``, creating it if needed.
+
+        The file list is restored at once; transcripts are read back a page
+        at a time between GUI events, so the window stays responsive while
+        a large project loads. The files' segments are merged by start time
+        as they are read, so every line is appended to the end of the pane.
+        """
+        if self.processing:
+            logger.warning("Not opening project %s while files are being processed", path)
+            QtWidgets.QMessageBox.information(
+                self, "Open Project", "Wait for processing to finish before opening a project."
+            )
+            return
+        logger.info("Opening project %s", path)
+        if self.project is not None:
+            self.project.close()
+        self.project = ProjectStore(path)
+        self._start_when_loaded = None
+        self._tracks.clear()
+        self.aggregator = TranscriptAggregator()
+        self._watch_aggregator()
+        self.file_list.clear()
+        self._clear_transcript_pane()
+        for audio_file, state in self.project.files():
+            self.add_file(audio_file)
+            if state in DONE_STATES:
+                _, progress = self.file_list.item(self.file_list.count() - 1).data(QtCore.Qt.UserRole)
+                progress.setValue(100)
+        self._project_pages = merge(
+            *(self._project_segments(audio_file) for audio_file, state in self.project.files()
+              if state in DONE_STATES),
+            key=lambda item: item[1]["start"],
+        )
+        self._project_loaded = 0
+        QtCore.QTimer.singleShot(0, self._load_project_page)
+        if hasattr(self.settings, "ui") and self.settings.ui.get("project") != path:
+            self.settings.ui["project"] = path
+            self.settings.save()
+
+    def _project_segments(self, audio_file: str):
+        """Yield ``(audio_file, segment)`` for a file of the project, in start order."""
+        for page in self.project.iter_pages(audio_file):
+            for seg in page:
+                yield audio_file, seg
+
+    def _load_project_page(self) -> None:
+        if self._project_pages is None:
+            return
+        batch = list(islice(self._project_pages, PAGE_SIZE))
+        if batch:
+            # later segments get larger ids, so each one sorts after the last
+            for audio_file, run in groupby(batch, key=itemgetter(0)):
+                self.aggregator.add_segments(audio_file, [seg for _, seg in run])
+            self._project_loaded += len(batch)
+            QtCore.QTimer.singleShot(0, self._load_project_page)
+            return
+        self._project_pages = None
+        logger.info("Project loaded: %d segments", self._project_loaded)
+        if self._start_when_loaded is not None:
+            resume, self._start_when_loaded = self._start_when_loaded, None
+            self.start_processing(resume=resume)
+
     def _on_settings(self) -> None:
         dialog = SettingsDialog(self.settings, self)
         if dialog.exec() == QtWidgets.QDialog.Accepted:
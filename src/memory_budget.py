@@ -0,0 +1,202 @@
+"""Admit files for processing only while they fit in memory.
+
+Usage:
+    from memory_budget import MemoryAdmission, estimate_job_memory
+    admission = MemoryAdmission(ceiling=12 * 1024 ** 3)
+    if admission.try_admit("episode.mp3", estimate_job_memory("large", 3600)):
+        ...                       # start the file
+    admission.release("episode.mp3")
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from typing import Callable, Dict, Hashable
+from logging_setup import get_logger
+from model_registry import MB, estimate_model_size
+
+logger = get_logger(__name__)
+
+# Scratch memory whisper.cpp allocates per running transcription on top of
+# the model weights, by model name prefix.
+WHISPER_WORK_BYTES: Dict[str, int] = {
+    "tiny": 100 * MB,
+    "base": 150 * MB,
+    "small": 300 * MB,
+    "medium": 700 * MB,
+    "large": 1200 * MB,
+}
+DEFAULT_WORK_BYTES = 700 * MB
+# 16 kHz mono float32 samples held by the decoder, VAD and pyannote
+PCM_BYTES_PER_SECOND = 16000 * 4
+# pyannote segmentation and embedding buffers
+DIARIZATION_BASE_BYTES = 300 * MB
+DIARIZATION_BYTES_PER_SECOND = 100 * 1024
+# assumed length when the duration cannot be probed
+DEFAULT_DURATION = 3600.0
+
+
+def process_rss() -> int:
+    """Return the resident set size of this process in bytes, or 0 if unknown."""
+    try:
+        import psutil
+
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if sys.platform == "win32":  # pragma: no cover - Windows only
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return int(counters.WorkingSetSize)
+    return 0
+
+
+def total_memory() -> int | None:
+    """Return the physical memory of the machine in bytes, if it can be found."""
+    try:
+        import psutil
+
+        return int(psutil.virtual_memory().total)
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, OSError, ValueError):
+        pass
+    if sys.platform == "win32":  # pragma: no cover - Windows only
+        import ctypes
+
+        class Status(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = Status()
+        status.dwLength = ctypes.sizeof(Status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullTotalPhys)
+    return None
+
+
+def estimate_job_memory(
+    model_path: str,
+    duration: float | None,
+    diarize: bool = True,
+    model_loaded: bool = True,
+) -> int:
+    """Return the memory one file is expected to need while it is processed.
+
+    Model weights are shared between files and only counted when the model
+    still has to be loaded (``model_loaded=False``).
+    """
+    if duration is None:
+        duration = DEFAULT_DURATION
+    name = os.path.basename(model_path).lower()
+    if name.startswith("ggml-"):
+        name = name[len("ggml-"):]
+    work = next(
+        (size for prefix, size in WHISPER_WORK_BYTES.items() if name.startswith(prefix)),
+        DEFAULT_WORK_BYTES,
+    )
+    total = work + int(duration * PCM_BYTES_PER_SECOND)
+    if diarize:
+        total += DIARIZATION_BASE_BYTES + int(duration * DIARIZATION_BYTES_PER_SECOND)
+    if not model_loaded:
+        total += estimate_model_size(model_path)
+    return total
+
+
+class MemoryAdmission:
+    """Admit jobs while their estimated memory fits under ``ceiling`` bytes.
+
+    The memory in use is the larger of the measured RSS and the RSS seen when
+    no job was running plus the estimates of the admitted jobs, which covers
+    jobs that have not allocated their buffers yet. A job is always admitted
+    when nothing else is running, so an oversized file still gets processed.
+    """
+
+    def __init__(self, ceiling: int, rss: Callable[[], int] = process_rss):
+        self.ceiling = ceiling
+        self._rss = rss
+        self._reserved: Dict[Hashable, int] = {}
+        self._baseline = rss()
+        self._lock = threading.Lock()
+        self.waits = 0
+
+    def in_use(self) -> int:
+        """Return the memory counted against the ceiling."""
+        with self._lock:
+            return self._in_use()
+
+    def _in_use(self) -> int:
+        rss = self._rss()
+        if not self._reserved:
+            self._baseline = rss
+        return max(rss, self._baseline + sum(self._reserved.values()))
+
+    def try_admit(self, key: Hashable, estimate: int) -> bool:
+        """Reserve ``estimate`` bytes for ``key`` if it fits."""
+        with self._lock:
+            used = self._in_use()
+            if self._reserved and used + estimate > self.ceiling:
+                self.waits += 1
+                logger.info(
+                    "Holding back %s: %d MB in use + %d MB needed exceeds %d MB",
+                    key,
+                    used // MB,
+                    estimate // MB,
+                    self.ceiling // MB,
+                )
+                return False
+            self._reserved[key] = estimate
+            logger.debug("Admitted %s with an estimate of %d MB", key, estimate // MB)
+            return True
+
+    def release(self, key: Hashable) -> None:
+        """Return the reservation of ``key``."""
+        with self._lock:
+            self._reserved.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "ceiling": self.ceiling,
+                "in_use": self._in_use(),
+                "reserved": sum(self._reserved.values()),
+                "jobs": len(self._reserved),
+                "waits": self.waits,
+            }
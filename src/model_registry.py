@@ -0,0 +1,187 @@
+"""Process-wide cache of loaded Whisper models.
+
+Usage:
+    from model_registry import get_registry
+    registry = get_registry()
+    with registry.lease("large", lambda: Whisper("large")) as model:
+        model.transcribe("episode.mp3")
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+
+# Approximate resident size of the ggml Whisper models. Used when a model is
+# referenced by name instead of by a file on disk.
+MODEL_SIZES: Dict[str, int] = {
+    "tiny": 75 * MB,
+    "base": 142 * MB,
+    "small": 466 * MB,
+    "medium": 1500 * MB,
+    "large": 2900 * MB,
+}
+
+DEFAULT_MODEL_SIZE = 1000 * MB
+DEFAULT_MEMORY_BUDGET = 4096 * MB
+
+
+def estimate_model_size(model_path: str) -> int:
+    """Return the approximate memory footprint of ``model_path`` in bytes."""
+    if os.path.isfile(model_path):
+        return os.path.getsize(model_path)
+    name = os.path.basename(model_path).lower()
+    if name.startswith("ggml-"):
+        name = name[len("ggml-"):]
+    for prefix, size in MODEL_SIZES.items():
+        if name.startswith(prefix):
+            return size
+    return DEFAULT_MODEL_SIZE
+
+
+class _Entry:
+    """A loaded model together with its bookkeeping."""
+
+    __slots__ = ("model", "size", "users", "lock")
+
+    def __init__(self, model: Any, size: int) -> None:
+        self.model = model
+        self.size = size
+        self.users = 0
+        # whisper.cpp contexts are not re-entrant, so each model is handed to
+        # one thread at a time.
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Keep loaded models in memory and share them between worker threads.
+
+    Models are keyed by name plus load parameters. When the combined size of
+    the loaded models exceeds ``memory_budget`` the least recently used model
+    that is not currently leased is dropped.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET) -> None:
+        self.memory_budget = memory_budget
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._load_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(name: str, **params: Any) -> Tuple:
+        """Return the cache key for ``name`` loaded with ``params``."""
+        return (name,) + tuple(sorted(params.items()))
+
+    @contextmanager
+    def lease(self, name: str, loader: Callable[[], Any], **params: Any) -> Iterator[Any]:
+        """Yield the model for ``name``, loading it with ``loader`` if needed.
+
+        The model is reserved for the calling thread until the ``with`` block
+        exits and cannot be evicted while it is in use.
+        """
+        key = self.make_key(name, **params)
+        entry = self._checkout(key, name, loader)
+        try:
+            with entry.lock:
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                self._evict()
+
+    def _checkout(self, key: Tuple, name: str, loader: Callable[[], Any]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                entry.users += 1
+                self._entries.move_to_end(key)
+                return entry
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.users += 1
+                    self._entries.move_to_end(key)
+                    return entry
+            logger.info("Loading model %s", name)
+            model = loader()
+            entry = _Entry(model, estimate_model_size(name))
+            with self._lock:
+                self.loads += 1
+                entry.users += 1
+                self._entries[key] = entry
+                self._load_locks.pop(key, None)
+                self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        """Drop idle models, oldest first, until under the memory budget.
+
+        The most recently used model is always kept so that a model larger
+        than the budget is not reloaded for every file.
+        """
+        total = sum(e.size for e in self._entries.values())
+        for key in list(self._entries)[:-1]:
+            if total <= self.memory_budget:
+                break
+            entry = self._entries[key]
+            if entry.users:
+                continue
+            logger.info("Evicting model %s", key[0])
+            del self._entries[key]
+            total -= entry.size
+            self.evictions += 1
+        if total > self.memory_budget:
+            logger.warning(
+                "Loaded models use %d bytes, above the %d byte budget",
+                total,
+                self.memory_budget,
+            )
+
+    def clear(self) -> None:
+        """Drop every model that is not currently leased."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if not e.users]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load counters and the models currently held."""
+        with self._lock:
+            return {
+                "loads": self.loads,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "resident_bytes": sum(e.size for e in self._entries.values()),
+                "models": [key[0] for key in self._entries],
+            }
+
+
+_default_registry: ModelRegistry | None = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the registry shared by the whole process."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
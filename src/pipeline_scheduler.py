@@ -0,0 +1,270 @@
+"""Schedule audio files through the transcribe, diarize and aggregate stages.
+
+Usage:
+    from pipeline_scheduler import PipelineScheduler
+    scheduler = PipelineScheduler(
+        paths,
+        start_transcribe=lambda index, path: ...,
+        start_diarize=lambda index, path: ...,
+        merge=Diarizer.label_segments,
+        on_ready=lambda index, path, segments: aggregator.add_segments(path, segments),
+    )
+    scheduler.start()
+    # stage workers report back with
+    scheduler.transcribed(index, segments)
+    scheduler.diarized(index, tracks)
+    scheduler.failed(index, PipelineScheduler.TRANSCRIBE, "error message")
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Sequence, Set
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def shortest_first(paths: Sequence[str], duration: Callable[[str], float | None]) -> List[int]:
+    """Return the indices of ``paths`` ordered by ``duration``, shortest first.
+
+    Files whose duration is unknown go last; ties keep the list order.
+    """
+    durations = [duration(path) for path in paths]
+    return sorted(
+        range(len(paths)),
+        key=lambda i: durations[i] if durations[i] is not None else float("inf"),
+    )
+
+
+class PipelineScheduler:
+    """Move files through the processing stages concurrently.
+
+    The scheduler only decides what runs next. ``start_transcribe`` and
+    ``start_diarize`` launch the stage workers, which must report completion
+    through :meth:`transcribed` and :meth:`diarized`. Diarization does not need
+    the transcript, so both stages of a file run side by side and ``merge``
+    combines their results once both are done. Each stage also moves on to
+    later files as soon as it has a free slot, but at most ``queue_size`` files
+    beyond the running ones are admitted. Merged files are handed to
+    ``on_ready`` strictly in list order.
+
+    ``admit`` can hold files back further, for example while they would not
+    fit in memory: it is asked before each file enters the pipeline, and a
+    refusal is retried whenever a file finishes both stages, at which point
+    ``release`` is called for it.
+
+    A stage that fails is reported through :meth:`failed`; a start callback
+    or ``merge`` that raises counts as a failure too. The file is dropped:
+    its other stage is not started, or its result is ignored, admission is
+    released, ``on_failed`` is called and ``on_ready`` is skipped for it, so
+    later files are not held back.
+
+    ``order`` changes the sequence in which files are admitted, for example
+    shortest first; ``on_ready`` still receives them in list order. Files
+    that finish early then wait in the reorder buffer, so only files that
+    are still being worked on count towards the queue limit.
+    """
+
+    TRANSCRIBE = "transcribe"
+    DIARIZE = "diarize"
+
+    def __init__(
+        self,
+        paths: List[str],
+        start_transcribe: Callable[[int, str], None],
+        start_diarize: Callable[[int, str], None],
+        on_ready: Callable[[int, str, list], None],
+        merge: Callable[[list, Any], list] | None = None,
+        on_finished: Callable[[], None] | None = None,
+        transcribe_workers: int = 1,
+        diarize_workers: int = 1,
+        queue_size: int = 2,
+        admit: Callable[[int, str], bool] | None = None,
+        release: Callable[[int, str], None] | None = None,
+        order: Sequence[int] | None = None,
+        on_failed: Callable[[int, str, str], None] | None = None,
+    ) -> None:
+        self.paths = list(paths)
+        self.start_transcribe = start_transcribe
+        self.start_diarize = start_diarize
+        self.on_ready = on_ready
+        self.merge = merge or (lambda segments, tracks: segments)
+        self.on_finished = on_finished
+        self.transcribe_workers = max(1, int(transcribe_workers))
+        self.diarize_workers = max(1, int(diarize_workers))
+        self.queue_size = max(1, int(queue_size))
+        self.admit = admit
+        self.release = release
+        self.on_failed = on_failed
+        self.order = list(order) if order is not None else list(range(len(self.paths)))
+        if sorted(self.order) != list(range(len(self.paths))):
+            raise ValueError("order must be a permutation of the file indices")
+        # list order bounds the reorder buffer too; any other order must not,
+        # or a long file admitted last could never get in
+        self._bound_reorder = order is None
+        # files admitted but not yet aggregated (or merged, see order)
+        self.max_in_flight = max(self.transcribe_workers, self.diarize_workers) + self.queue_size
+
+        self._lock = threading.RLock()
+        self._next_admit = 0
+        self._next_ready = 0
+        self._merged = 0
+        self._transcribe_queue: Deque[int] = deque()
+        self._diarize_queue: Deque[int] = deque()
+        self._transcribing: Set[int] = set()
+        self._diarizing: Set[int] = set()
+        self._segments: Dict[int, list] = {}
+        self._tracks: Dict[int, Any] = {}
+        # None marks a failed file
+        self._finished: Dict[int, list | None] = {}
+        self._failed: Set[int] = set()
+        self._pumping = False
+        self._dirty = False
+
+    @property
+    def done(self) -> bool:
+        """Whether every file has been handed to ``on_ready``."""
+        return self._next_ready >= len(self.paths)
+
+    def start(self) -> None:
+        """Begin scheduling work."""
+        logger.info(
+            "Scheduling %d files (transcribe=%d, diarize=%d, queue=%d)",
+            len(self.paths),
+            self.transcribe_workers,
+            self.diarize_workers,
+            self.queue_size,
+        )
+        self._pump()
+
+    def retry_admission(self) -> None:
+        """Ask ``admit`` again about held-back files, e.g. once more is known about them."""
+        self._pump()
+
+    def transcribed(self, index: int, segments: list) -> None:
+        """Record that transcription of file ``index`` finished."""
+        with self._lock:
+            self._transcribing.discard(index)
+            if index not in self._failed:
+                self._segments[index] = segments
+                self._try_merge(index)
+        self._pump()
+
+    def diarized(self, index: int, tracks: Any) -> None:
+        """Record that diarization of file ``index`` finished."""
+        with self._lock:
+            self._diarizing.discard(index)
+            if index not in self._failed:
+                self._tracks[index] = tracks
+                self._try_merge(index)
+        self._pump()
+
+    def failed(self, index: int, stage: str, error: str = "") -> None:
+        """Record that ``stage`` of file ``index`` failed and drop the file."""
+        with self._lock:
+            (self._transcribing if stage == self.TRANSCRIBE else self._diarizing).discard(index)
+            self._fail(index, stage, error)
+        self._pump()
+
+    def _fail(self, index: int, stage: str, error: str) -> None:
+        if index in self._failed or index in self._finished or index < self._next_ready:
+            return
+        logger.error("%s of %s failed: %s", stage.capitalize(), self.paths[index], error)
+        self._failed.add(index)
+        self._segments.pop(index, None)
+        self._tracks.pop(index, None)
+        for queue in (self._transcribe_queue, self._diarize_queue):
+            if index in queue:
+                queue.remove(index)
+        self._finished[index] = None
+        self._merged += 1
+        if self.release is not None:
+            self.release(index, self.paths[index])
+        if self.on_failed is not None:
+            self.on_failed(index, self.paths[index], error)
+
+    def _try_merge(self, index: int) -> None:
+        if index in self._segments and index in self._tracks:
+            segments = self._segments.pop(index)
+            tracks = self._tracks.pop(index)
+            try:
+                merged = self.merge(segments, tracks)
+            except Exception as exc:
+                logger.exception("Merging the results of %s failed", self.paths[index])
+                self._fail(index, "merge", str(exc))
+                return
+            self._finished[index] = merged
+            self._merged += 1
+            if self.release is not None:
+                self.release(index, self.paths[index])
+
+    def _pump(self) -> None:
+        """Start whatever work fits and flush finished files in order.
+
+        Stage workers may report back synchronously from inside the start
+        callbacks, so nested calls only mark the state dirty and the outer
+        call loops until nothing changes.
+        """
+        with self._lock:
+            if self._pumping:
+                self._dirty = True
+                return
+            self._pumping = True
+            try:
+                while True:
+                    self._dirty = False
+                    self._flush_ready()
+                    self._admit()
+                    self._start_stage(self._diarize_queue, self._diarizing, self.diarize_workers, self.start_diarize)
+                    self._start_stage(
+                        self._transcribe_queue, self._transcribing, self.transcribe_workers, self.start_transcribe
+                    )
+                    if not self._dirty:
+                        break
+            finally:
+                self._pumping = False
+            # a failed file may still have its other stage running
+            finished = self.done and not self._transcribing and not self._diarizing
+        if finished and self.on_finished is not None:
+            callback, self.on_finished = self.on_finished, None
+            callback()
+
+    def _flush_ready(self) -> None:
+        while self._next_ready in self._finished:
+            index = self._next_ready
+            segments = self._finished.pop(index)
+            self._next_ready += 1
+            if segments is not None:
+                self.on_ready(index, self.paths[index], segments)
+
+    def _in_flight(self) -> int:
+        return self._next_admit - (self._next_ready if self._bound_reorder else self._merged)
+
+    def _admit(self) -> None:
+        while self._next_admit < len(self.paths) and self._in_flight() < self.max_in_flight:
+            index = self.order[self._next_admit]
+            if self.admit is not None and not self.admit(index, self.paths[index]):
+                break
+            self._transcribe_queue.append(index)
+            self._diarize_queue.append(index)
+            self._next_admit += 1
+
+    def _start_stage(
+        self,
+        queue: Deque[int],
+        running: Set[int],
+        limit: int,
+        start: Callable[[int, str], None],
+    ) -> None:
+        stage = self.TRANSCRIBE if queue is self._transcribe_queue else self.DIARIZE
+        while queue and len(running) < limit:
+            index = queue.popleft()
+            running.add(index)
+            try:
+                start(index, self.paths[index])
+            except Exception as exc:
+                logger.exception("Could not start %s of %s", stage, self.paths[index])
+                running.discard(index)
+                self._fail(index, stage, str(exc))
@@ -0,0 +1,208 @@
+"""Persist aggregated transcripts in a SQLite project file.
+
+Usage:
+    from project_store import ProjectStore
+    project = ProjectStore("season3.pdproj")
+    project.save_file("ep1.mp3", segments)           # one transaction per file
+    project.rename_speakers({"SPEAKER_00": "Host"})
+    for page in project.iter_pages("ep1.mp3"):     # lazy, in start order
+        aggregator.add_segments("ep1.mp3", page)
+    project.close()
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA_VERSION = 1
+PAGE_SIZE = 2000
+PROJECT_EXTENSION = ".pdproj"
+
+# file states, in processing order
+QUEUED = "queued"
+AGGREGATED = "aggregated"
+REFINED = "refined"
+DONE_STATES = (AGGREGATED, REFINED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS speakers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    start REAL NOT NULL DEFAULT 0,
+    end REAL,
+    speaker_id INTEGER REFERENCES speakers(id),
+    text TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS segments_by_file ON segments(file_id, start, id);
+"""
+
+_CORE_KEYS = ("start", "end", "speaker", "text", "file")
+
+
+class ProjectStore:
+    """A project file holding files, segments, speakers and file states.
+
+    The database runs in WAL mode so reads never wait for a write. Each
+    :meth:`save_file` replaces a file's segments in one transaction, and
+    segments are read back in pages with keyset pagination, so opening a
+    project only reads the file table. A segment without a start time is
+    stored, and read back, as starting at 0.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self._db.close()
+            raise ValueError(f"{path} was written by a newer version (schema {version})")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        logger.info("Opened project %s", path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _speaker_id(self, name: str, cache: Dict[str, int]) -> int:
+        speaker_id = cache.get(name)
+        if speaker_id is None:
+            self._db.execute("INSERT OR IGNORE INTO speakers(name) VALUES (?)", (name,))
+            (speaker_id,) = self._db.execute("SELECT id FROM speakers WHERE name = ?", (name,)).fetchone()
+            cache[name] = speaker_id
+        return speaker_id
+
+    def _file_id(self, audio_file: str, state: str) -> int:
+        self._db.execute(
+            "INSERT INTO files(path, state, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET state = excluded.state, updated = excluded.updated",
+            (audio_file, state, time.time()),
+        )
+        (file_id,) = self._db.execute("SELECT id FROM files WHERE path = ?", (audio_file,)).fetchone()
+        return file_id
+
+    def save_file(self, audio_file: str, segments: Iterable[Mapping], state: str = AGGREGATED) -> int:
+        """Replace the stored segments of ``audio_file``; return how many were written."""
+        speakers: Dict[str, int] = {}
+        with self._lock, self._db:
+            file_id = self._file_id(audio_file, state)
+            self._db.execute("DELETE FROM segments WHERE file_id = ?", (file_id,))
+            rows = []
+            for seg in segments:
+                speaker = seg.get("speaker")
+                extra = {k: v for k, v in seg.items() if k not in _CORE_KEYS}
+                rows.append(
+                    (
+                        file_id,
+                        seg.get("start", 0.0),
+                        seg.get("end"),
+                        None if speaker is None else self._speaker_id(speaker, speakers),
+                        seg.get("text"),
+                        json.dumps(extra) if extra else None,
+                    )
+                )
+            self._db.executemany(
+                "INSERT INTO segments(file_id, start, end, speaker_id, text, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.info("Saved %d segments of %s to %s", len(rows), audio_file, self.path)
+        return len(rows)
+
+    def set_state(self, audio_file: str, state: str) -> None:
+        """Record ``state`` for ``audio_file``, adding the file if it is new."""
+        with self._lock, self._db:
+            self._file_id(audio_file, state)
+
+    def files(self) -> List[Tuple[str, str]]:
+        """Return ``(path, state)`` of every file in the order they were added."""
+        with self._lock:
+            return self._db.execute("SELECT path, state FROM files ORDER BY id").fetchall()
+
+    def file_state(self, audio_file: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM files WHERE path = ?", (audio_file,)).fetchone()
+        return None if row is None else row[0]
+
+    def segment_count(self, audio_file: str | None = None) -> int:
+        with self._lock:
+            if audio_file is None:
+                return self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM segments JOIN files ON files.id = segments.file_id WHERE files.path = ?",
+                (audio_file,),
+            ).fetchone()[0]
+
+    def iter_pages(self, audio_file: str, page_size: int = PAGE_SIZE) -> Iterator[List[Dict]]:
+        """Yield the segments of ``audio_file`` in start order, ``page_size`` at a time.
+
+        Each page is a separate query that continues after the last row of
+        the previous one, so nothing is held open between pages.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT id FROM files WHERE path = ?", (audio_file,)).fetchone()
+        if row is None:
+            return
+        file_id = row[0]
+        last = (float("-inf"), -1)
+        while True:
+            with self._lock:
+                # a range scan of segments_by_file
+                rows = self._db.execute(
+                    "SELECT segments.id, start, end, speakers.name, text, extra FROM segments "
+                    "LEFT JOIN speakers ON speakers.id = segments.speaker_id "
+                    "WHERE file_id = ? AND (start, segments.id) > (?, ?) "
+                    "ORDER BY start, segments.id LIMIT ?",
+                    (file_id, last[0], last[1], page_size),
+                ).fetchall()
+            if not rows:
+                return
+            page = []
+            for seg_id, start, end, speaker, text, extra in rows:
+                seg = json.loads(extra) if extra else {}
+                for key, value in (("start", start), ("end", end), ("speaker", speaker), ("text", text)):
+                    if value is not None:
+                        seg[key] = value
+                page.append(seg)
+            last = (rows[-1][1], rows[-1][0])
+            yield page
+
+    def rename_speakers(self, mapping: Dict[str, str]) -> None:
+        """Rename speakers; a name that already exists absorbs the renamed one."""
+        with self._lock, self._db:
+            ids = {name: i for i, name in self._db.execute("SELECT id, name FROM speakers")}
+            # park the renamed speakers first so names can be swapped
+            for old in mapping:
+                if old in ids:
+                    self._db.execute("UPDATE speakers SET name = ? WHERE id = ?", (f"\0{ids[old]}", ids[old]))
+            for old, new in mapping.items():
+                if old not in ids:
+                    continue
+                target = self._db.execute("SELECT id FROM speakers WHERE name = ?", (new,)).fetchone()
+                if target is None:
+                    self._db.execute("UPDATE speakers SET name = ? WHERE id = ?", (new, ids[old]))
+                else:
+                    self._db.execute("UPDATE segments SET speaker_id = ? WHERE speaker_id = ?", (target[0], ids[old]))
+                    self._db.execute("DELETE FROM speakers WHERE id = ?", (ids[old],))
@@ -1,13 +1,11 @@
 from logging_setup import setup_logging, get_logger
+import multiprocessing
 import os
 import sys
 
 setup_logging()
 logger = get_logger(__name__)
 
-from PySide6 import QtWidgets
-from main_window import MainWindow
-
 
 def main() -> None:
     if len(sys.argv) > 1 and sys.argv[1].endswith("uninstaller.py"):
@@ -18,6 +16,13 @@ def main() -> None:
         import uninstaller
         uninstaller.remove_app_files(app_dir)
         return
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import batch_cli
+        sys.exit(batch_cli.main(sys.argv[2:]))
+
+    # the batch command runs without Qt, so the GUI is only imported here
+    from PySide6 import QtWidgets
+    from main_window import MainWindow
 
     logger.info("Starting application")
     app = QtWidgets.QApplication([])
@@ -27,4 +32,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":  # pragma: no cover - manual launch
+    # chunked transcription starts worker processes from the frozen executable
+    multiprocessing.freeze_support()
     main()
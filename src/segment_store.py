@@ -0,0 +1,413 @@
+"""Compact columnar storage for transcript segments.
+
+Usage:
+    from segment_store import SegmentStore
+    store = SegmentStore()
+    row = store.append("a.wav", {"start": 0.0, "end": 1.5, "speaker": "Host", "text": "Hi"})
+    seg = store.view(row)      # read-only, dict-compatible
+    seg["text"], seg.get("speaker"), dict(seg)
+    store.remove(row)
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Sequence, Set
+
+# presence bits of the optional core keys
+_HAS_START = 1
+_HAS_END = 2
+_HAS_SPEAKER = 4
+_HAS_TEXT = 8
+_CORE_KEYS = (("start", _HAS_START), ("end", _HAS_END), ("speaker", _HAS_SPEAKER), ("text", _HAS_TEXT))
+
+
+class _Interner:
+    """Map strings to small integer ids and back."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = name_id
+        return name_id
+
+    def rename(self, mapping: Dict[str, str]) -> List[int]:
+        """Rename entries in place; return the ids whose name changed.
+
+        Ids keep their number, so stored references stay valid. Renaming
+        onto an existing name leaves two ids with that name; new strings
+        are interned to the lower one.
+        """
+        changed = [i for i, name in enumerate(self.names) if mapping.get(name, name) != name]
+        # all at once, so swapping two names works
+        self.names = [mapping.get(name, name) for name in self.names]
+        self.ids = {}
+        for name_id, name in enumerate(self.names):
+            self.ids.setdefault(name, name_id)
+        return changed
+
+    def ids_of(self, name: str) -> List[int]:
+        return [i for i, n in enumerate(self.names) if n == name]
+
+
+class SegmentView(Mapping):
+    """Read-only dict-like view of one stored segment.
+
+    Compares equal to a dict with the same items; use ``dict(view)`` or
+    :meth:`copy` where a real dict is needed, e.g. for ``json``.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "SegmentStore", row: int) -> None:
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> int:
+        return self._row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store.field(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.keys(self._row))
+
+    def __len__(self) -> int:
+        return len(self._store.keys(self._row))
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"SegmentView({dict(self)!r})"
+
+
+class SegmentStore:
+    """Append-only columns of segment fields, addressed by row number.
+
+    Start and end times are ``array('d')`` columns, speaker and file names
+    are interned to ``array('I')`` ids, and all texts share one UTF-8 buffer
+    indexed by offset and length. Keys other than start, end, speaker, text
+    and file are kept in a side table for the rows that have them. Removed
+    rows keep their number, so row numbers can serve as segment ids, until
+    :meth:`compact` drops them from every column and renumbers the live
+    rows in order.
+
+    The segment count and talk time of each speaker id are kept up to date,
+    so renaming a speaker only touches the name table and per-speaker
+    totals need no scan; the rows of a speaker are found by scanning the
+    speaker id column, which keeps no per-row objects.
+
+    A store made by :meth:`from_columns` may read its columns from a
+    read-only buffer such as a memory-mapped archive. Rows can be removed and
+    speakers renamed in place; the columns are copied into memory on the
+    first change that needs to write them, and the speaker index is only
+    built when it is first used.
+    """
+
+    def __init__(self) -> None:
+        self.starts = array("d")
+        self.ends = array("d")
+        self.speakers = array("I")
+        self.files = array("I")
+        self._flags = bytearray()
+        self._alive = bytearray()
+        self._text = bytearray()
+        self._text_offsets = array("Q")
+        self._text_lengths = array("I")
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self.speaker_names = _Interner()
+        self.file_names = _Interner()
+        # segments and seconds per speaker id; None until first used
+        self._speaker_counts: Dict[int, int] | None = {}
+        self._speaker_seconds: Dict[int, float] = {}
+        self._live = 0
+        self._dead_text = 0
+        self._backing: Any = None
+
+    @classmethod
+    def from_columns(
+        cls,
+        starts: Sequence[float],
+        ends: Sequence[float],
+        speakers: Sequence[int],
+        files: Sequence[int],
+        flags: Sequence[int],
+        text: bytes,
+        text_offsets: Sequence[int],
+        text_lengths: Sequence[int],
+        speaker_names: List[str],
+        file_names: List[str],
+        extras: Dict[int, Dict[str, Any]],
+        backing: Any = None,
+    ) -> "SegmentStore":
+        """Return a store over existing columns without copying them.
+
+        The columns may be arrays or read-only memoryviews; ``backing`` is
+        kept alive with them (e.g. the ``mmap`` they point into) until the
+        columns have been copied.
+        """
+        store = cls()
+        store.starts, store.ends = starts, ends
+        store.speakers, store.files = speakers, files
+        store._flags = flags
+        store._text, store._text_offsets, store._text_lengths = text, text_offsets, text_lengths
+        store._alive = bytearray(b"\x01") * len(starts)
+        store._extras = extras
+        for interner, names in ((store.speaker_names, speaker_names), (store.file_names, file_names)):
+            interner.names = list(names)
+            for name_id, name in enumerate(interner.names):
+                interner.ids.setdefault(name, name_id)
+        store._speaker_counts = None
+        store._live = len(starts)
+        store._backing = backing
+        return store
+
+    @property
+    def backed(self) -> bool:
+        """Whether the columns still live in a read-only buffer."""
+        return self._backing is not None
+
+    def detach(self) -> None:
+        """Copy the columns into memory and let go of the backing buffer."""
+        self._writable()
+
+    def _writable(self) -> None:
+        """Copy columns that live in a read-only buffer into memory."""
+        if self._backing is None:
+            return
+        for name, typecode in (
+            ("starts", "d"), ("ends", "d"), ("speakers", "I"), ("files", "I"),
+            ("_text_offsets", "Q"), ("_text_lengths", "I"),
+        ):
+            column = array(typecode)
+            column.frombytes(getattr(self, name).cast("B"))
+            setattr(self, name, column)
+        self._flags = bytearray(self._flags)
+        self._text = bytearray(self._text)
+        # the mapping is released once nothing refers to its views
+        self._backing = None
+
+    def __len__(self) -> int:
+        """Return the number of live rows."""
+        return self._live
+
+    def append(self, audio_file: str, segment: Mapping) -> int:
+        """Store ``segment`` for ``audio_file`` and return its row number."""
+        self._writable()
+        flags = 0
+        for key, bit in _CORE_KEYS:
+            if key in segment:
+                flags |= bit
+        row = len(self.starts)
+        self.starts.append(float(segment.get("start", 0.0)))
+        self.ends.append(float(segment.get("end", 0.0)))
+        self.speakers.append(self.speaker_names.intern(segment.get("speaker", "")))
+        self.files.append(self.file_names.intern(audio_file))
+        encoded = segment.get("text", "").encode("utf-8")
+        self._text_offsets.append(len(self._text))
+        self._text_lengths.append(len(encoded))
+        self._text += encoded
+        self._flags.append(flags)
+        self._alive.append(1)
+        if flags & _HAS_SPEAKER:
+            self._index_speaker(row)
+        extras = {k: v for k, v in segment.items() if k not in ("start", "end", "speaker", "text", "file")}
+        if extras:
+            self._extras[row] = extras
+        self._live += 1
+        return row
+
+    def remove(self, row: int) -> None:
+        if not self._alive[row]:
+            raise KeyError(row)
+        self._alive[row] = 0
+        if self._flags[row] & _HAS_SPEAKER:
+            self._unindex_speaker(row)
+        self._extras.pop(row, None)
+        self._live -= 1
+        self._dead_text += self._text_lengths[row]
+
+    def __contains__(self, row: int) -> bool:
+        return 0 <= row < len(self._alive) and bool(self._alive[row])
+
+    def rows(self) -> Iterator[int]:
+        """Yield the numbers of the live rows in insertion order."""
+        return (row for row, alive in enumerate(self._alive) if alive)
+
+    def view(self, row: int) -> SegmentView:
+        if row not in self:
+            raise KeyError(row)
+        return SegmentView(self, row)
+
+    def text(self, row: int) -> str:
+        offset = self._text_offsets[row]
+        return str(self._text[offset:offset + self._text_lengths[row]], "utf-8")
+
+    def text_bytes(self, row: int) -> bytes:
+        """Return the UTF-8 encoded text of ``row``."""
+        offset = self._text_offsets[row]
+        return bytes(self._text[offset:offset + self._text_lengths[row]])
+
+    def flags(self, row: int) -> int:
+        """Return the bit set of the core keys ``row`` has."""
+        return self._flags[row]
+
+    def extras(self, row: int) -> Dict[str, Any]:
+        """Return the keys of ``row`` other than the core ones."""
+        return self._extras.get(row, {})
+
+    def speaker(self, row: int) -> str:
+        return self.speaker_names.names[self.speakers[row]]
+
+    def file(self, row: int) -> str:
+        return self.file_names.names[self.files[row]]
+
+    def keys(self, row: int) -> List[str]:
+        flags = self._flags[row]
+        keys = [key for key, bit in _CORE_KEYS if flags & bit]
+        keys.append("file")
+        keys.extend(self._extras.get(row, ()))
+        return keys
+
+    def field(self, row: int, key: str) -> Any:
+        """Return field ``key`` of ``row``; raise ``KeyError`` if it has none."""
+        flags = self._flags[row]
+        if key == "start" and flags & _HAS_START:
+            return self.starts[row]
+        if key == "end" and flags & _HAS_END:
+            return self.ends[row]
+        if key == "speaker" and flags & _HAS_SPEAKER:
+            return self.speaker(row)
+        if key == "text" and flags & _HAS_TEXT:
+            return self.text(row)
+        if key == "file":
+            return self.file(row)
+        return self._extras.get(row, {})[key]
+
+    def _speaker_totals(self) -> Dict[int, int]:
+        """Return the segment count per speaker id, counting on first use."""
+        if self._speaker_counts is None:
+            self._speaker_counts = {}
+            self._speaker_seconds = {}
+            for row in self.rows():
+                if self._flags[row] & _HAS_SPEAKER:
+                    self._index_speaker(row)
+        return self._speaker_counts
+
+    def _index_speaker(self, row: int) -> None:
+        if self._speaker_counts is None:
+            return
+        speaker_id = self.speakers[row]
+        self._speaker_counts[speaker_id] = self._speaker_counts.get(speaker_id, 0) + 1
+        self._speaker_seconds[speaker_id] = (
+            self._speaker_seconds.get(speaker_id, 0.0) + self.ends[row] - self.starts[row]
+        )
+
+    def _unindex_speaker(self, row: int) -> None:
+        if self._speaker_counts is None:
+            return
+        speaker_id = self.speakers[row]
+        self._speaker_counts[speaker_id] -= 1
+        if self._speaker_counts[speaker_id]:
+            self._speaker_seconds[speaker_id] -= self.ends[row] - self.starts[row]
+        else:
+            del self._speaker_counts[speaker_id]
+            del self._speaker_seconds[speaker_id]
+
+    def _rows_of_speakers(self, speaker_ids: Set[int]) -> List[int]:
+        """Return the live rows with a speaker in ``speaker_ids``, in row order."""
+        if not speaker_ids:
+            return []
+        flags, alive = self._flags, self._alive
+        return [
+            row for row, speaker_id in enumerate(self.speakers)
+            if speaker_id in speaker_ids and alive[row] and flags[row] & _HAS_SPEAKER
+        ]
+
+    def rename_speakers(self, mapping: Dict[str, str]) -> List[int]:
+        """Rename speakers by name; return the rows whose speaker changed."""
+        changed = self.speaker_names.rename(mapping)
+        counts = self._speaker_totals()
+        return self._rows_of_speakers({speaker_id for speaker_id in changed if speaker_id in counts})
+
+    def speaker_rows(self, name: str) -> List[int]:
+        """Return the live rows labelled ``name`` in row order."""
+        return self._rows_of_speakers(set(self.speaker_names.ids_of(name)))
+
+    def speaker_totals(self) -> Dict[str, Dict[str, float]]:
+        """Return ``{"segments", "seconds"}`` per speaker name in use."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for speaker_id, count in self._speaker_totals().items():
+            entry = totals.setdefault(self.speaker_names.names[speaker_id], {"segments": 0, "seconds": 0.0})
+            entry["segments"] += count
+            entry["seconds"] += self._speaker_seconds[speaker_id]
+        return totals
+
+    def compact(self) -> array | None:
+        """Drop removed rows from every column and their text from the buffer.
+
+        The live rows are renumbered in order. Returns an ``array('Q')``
+        giving the new number of each old row (removed rows get the number
+        of the next live one), or ``None`` if nothing was removed.
+        """
+        if self._live == len(self._alive):
+            return None
+        self._writable()
+        renumbered = array("Q")
+        names = ("starts", "ends", "speakers", "files")
+        old = [getattr(self, name) for name in names]
+        columns = [array(column.typecode) for column in old]
+        offsets, lengths = array("Q"), array("I")
+        flags = bytearray()
+        text = bytearray()
+        extras: Dict[int, Dict[str, Any]] = {}
+        for row, alive in enumerate(self._alive):
+            renumbered.append(len(flags))
+            if not alive:
+                continue
+            if row in self._extras:
+                extras[len(flags)] = self._extras[row]
+            for column, old_column in zip(columns, old):
+                column.append(old_column[row])
+            offset = self._text_offsets[row]
+            length = self._text_lengths[row]
+            offsets.append(len(text))
+            lengths.append(length)
+            text += self._text[offset:offset + length]
+            flags.append(self._flags[row])
+        for name, column in zip(names, columns):
+            setattr(self, name, column)
+        self._text_offsets, self._text_lengths = offsets, lengths
+        self._flags, self._text, self._extras = flags, text, extras
+        self._alive = bytearray(b"\x01") * len(flags)
+        self._dead_text = 0
+        return renumbered
+
+    def maybe_compact(self) -> array | None:
+        """Compact once removed rows outnumber live ones or hold more text.
+
+        Returns the renumbering of :meth:`compact`, or ``None``.
+        """
+        dead_rows = len(self._alive) - self._live
+        if dead_rows > self._live or self._dead_text > len(self._text) - self._dead_text:
+            return self.compact()
+        return None
+
+    def nbytes(self) -> int:
+        """Return the approximate size of the column buffers in bytes."""
+        columns = (self.starts, self.ends, self.speakers, self.files, self._text_offsets, self._text_lengths)
+        return (
+            sum(len(col) * col.itemsize for col in columns)
+            + len(self._text)
+            + len(self._flags)
+            + len(self._alive)
+        )
@@ -5,19 +5,66 @@ Usage:
     s = Settings()
     s.ui["theme"] = "dark"
     s.keyword_path = "C:/path/keywords.json"
+    s.processing["diarization_idle_timeout"] = 300
     s.save()
 """
 
+import copy
 import json
 import os
-from typing import Dict
+from typing import Any, Dict
 from logging_setup import get_logger
 
 logger = get_logger(__name__)
 
+# Defaults for the background processing options stored under "processing".
+PROCESSING_DEFAULTS: Dict[str, Any] = {
+    # seconds before an unused diarization pipeline is released
+    "diarization_idle_timeout": 600.0,
+    # files transcribed / diarized at the same time
+    "transcribe_workers": 1,
+    "diarize_workers": 1,
+    # files queued for a stage beyond the running ones
+    "stage_queue_size": 2,
+    # size limit of the on-disk transcription cache
+    "transcript_cache_mb": 512,
+    # size limit of the on-disk diarization track cache
+    "diarization_cache_mb": 64,
+    # "midpoint" or "overlap", see Diarizer.label_segments
+    "speaker_assignment": "midpoint",
+    # processes used to transcribe chunks of one long file in parallel
+    "transcribe_chunk_workers": 1,
+    # skip silence and music before transcription
+    "vad": False,
+    # size limit of the decoded audio shared by the stages; 0 disables it
+    "pcm_cache_mb": 4096,
+    # seconds of audio transcribed before segments are shown; 0 waits for the whole file
+    "stream_seconds": 60.0,
+    # files processed in parallel by the headless batch command
+    "batch_workers": 1,
+    # Whisper model of the first (or only) transcription pass
+    "transcribe_model": "base",
+    # refine each finished file with refine_model in the background
+    "two_pass": False,
+    "refine_model": "large",
+    # cores shared by transcription and diarization; 0 uses every core
+    "cpu_threads": 0,
+    # relative share of the cores each busy stage gets
+    "cpu_weights": {"transcribe": 2.0, "diarize": 1.0},
+    # files are only started while their estimated memory fits under this;
+    # 0 uses 80% of the physical memory
+    "memory_ceiling_mb": 0,
+    # background jobs run at once; 0 means one per stage worker plus one
+    "job_workers": 0,
+    # "list" processes files in list order, "shortest_first" by duration
+    "schedule": "list",
+    # size limit of the cached ffprobe durations
+    "duration_cache_mb": 1,
+}
+
 
 class Settings:
-    """Store UI preferences and keyword list location."""
+    """Store UI preferences, keyword list location and processing options."""
 
     def __init__(self, path: str | None = None):
         if path is None:
@@ -26,8 +73,20 @@ class Settings:
         self.path = path
         self.ui: Dict[str, str] = {}
         self.keyword_path: str = os.path.join(os.path.dirname(self.path), "keywords.json")
+        # deep copies, so nested defaults such as cpu_weights are never shared
+        self.processing: Dict[str, Any] = copy.deepcopy(PROCESSING_DEFAULTS)
         self.load()
 
+    @property
+    def cache_dir(self) -> str:
+        """Directory for cached processing results, next to the settings file."""
+        return os.path.join(os.path.dirname(self.path), "cache")
+
+    @property
+    def checkpoint_dir(self) -> str:
+        """Directory holding the progress of the current processing run."""
+        return os.path.join(os.path.dirname(self.path), "checkpoint")
+
     def load(self) -> None:
         """Load settings from disk if available, else defaults."""
         try:
@@ -36,6 +95,7 @@ class Settings:
                 data = json.load(fh)
             self.ui = data.get("ui", {})
             self.keyword_path = data.get("keyword_path", self.keyword_path)
+            self.processing = {**copy.deepcopy(PROCESSING_DEFAULTS), **data.get("processing", {})}
         except FileNotFoundError:
             logger.info("Settings file not found, using defaults")
             # defaults already set in __init__
@@ -46,4 +106,12 @@ class Settings:
         logger.info("Saving settings to %s", self.path)
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         with open(self.path, "w", encoding="utf-8") as fh:
-            json.dump({"ui": self.ui, "keyword_path": self.keyword_path}, fh, indent=2)
+            json.dump(
+                {
+                    "ui": self.ui,
+                    "keyword_path": self.keyword_path,
+                    "processing": self.processing,
+                },
+                fh,
+                indent=2,
+            )
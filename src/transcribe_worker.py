@@ -1,21 +1,234 @@
+import json
+import os
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 from whispercpp import Whisper
 from logging_setup import get_logger
+from model_registry import ModelRegistry, get_registry
+from disk_cache import DiskCache, file_digest
+from audio_chunks import detect_silences, extract_chunk, find_silences, plan_chunks, stitch_windows
+from audio_decode import SAMPLE_RATE, PcmBuffer, PcmCache, decode_pcm, raw_pcm_input
+from vad import SpeechMap, detect_speech, speech_only
+from cpu_budget import CpuBudget
 
 logger = get_logger(__name__)
 
+# bump when the cached segment format changes
+CACHE_VERSION = 1
+
+
+def _transcribe_chunk(
+    model_path: str, decode_params: Dict, vad: bool, chunk
+) -> Tuple[List[Dict], Dict[str, float] | None]:
+    """Process pool entry point; each process keeps its own model registry.
+
+    ``chunk`` is either the path of an extracted chunk or a
+    ``(pcm_path, start, end)`` slice of a shared PCM file, which the process
+    maps itself instead of receiving a copy of the samples. Returns the
+    segments and the chunk's VAD stats.
+    """
+    worker = TranscribeWorker(model_path, decode_params=decode_params, vad=vad)
+    if isinstance(chunk, tuple):
+        pcm_path, start, end = chunk
+        with PcmBuffer(pcm_path) as buffer:
+            samples = buffer.as_array()[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+            segments = worker._transcribe_samples(samples)
+            del samples
+    else:
+        segments = worker._transcribe_file(chunk)
+    return segments, worker.last_vad_stats
+
+
 class TranscribeWorker:
-    """Loads a Whisper model and transcribes audio files."""
+    """Transcribes audio files with a Whisper model from the shared registry.
+
+    When a :class:`DiskCache` is given, results are stored under a hash of the
+    audio content, the model and the decoding parameters, and a cache hit
+    returns without loading the model at all.
+
+    With ``chunk_workers`` above one, files longer than one and a half
+    ``chunk_seconds`` are split at silences and the chunks are transcribed in
+    parallel in a process pool.
+
+    With ``vad`` enabled, silence and music are cut out before the audio
+    reaches the model and the timestamps are mapped back onto the original
+    recording. ``last_vad_stats`` then reports how much audio of the last
+    file was skipped, summed over its chunks.
+
+    With a :class:`PcmCache`, the model reads the file's shared decoded
+    samples instead of decoding the file again.
 
-    def __init__(self, model_path: str = "large"):
+    :meth:`transcribe_stream` yields segments while the file is still being
+    transcribed and reports progress by audio position.
+
+    With a :class:`CpuBudget`, each file runs as a ``"transcribe"`` stage job
+    and whisper.cpp is given the job's share of the cores; a rebalance takes
+    effect from the next window.
+    """
+
+    def __init__(
+        self,
+        model_path: str = "large",
+        registry: ModelRegistry | None = None,
+        cache: DiskCache | None = None,
+        decode_params: Dict | None = None,
+        chunk_workers: int = 1,
+        chunk_seconds: float = 600.0,
+        vad: bool = False,
+        pcm_cache: PcmCache | None = None,
+        stream_seconds: float = 0.0,
+        cpu_budget: CpuBudget | None = None,
+    ):
         self.model_path = model_path
-        logger.info("Loading Whisper model: %s", model_path)
-        self.model = Whisper(model_path)
+        self.registry = registry or get_registry()
+        self.cache = cache
+        self.decode_params = dict(decode_params or {})
+        self.chunk_workers = max(1, int(chunk_workers))
+        self.chunk_seconds = chunk_seconds
+        self.vad = vad
+        self.pcm_cache = pcm_cache
+        self.stream_seconds = stream_seconds
+        self.cpu_budget = cpu_budget
+        self.n_threads: int | None = None
+        self.last_vad_stats: Dict[str, float] | None = None
+
+    def _load_model(self):
+        logger.info("Loading Whisper model: %s", self.model_path)
+        return Whisper(self.model_path)
+
+    def cache_key(self, audio_path: str, window: float | None = None) -> str:
+        """Return the cache key for transcribing ``audio_path``.
+
+        ``window`` is the length of the pieces the file is transcribed in, or
+        ``None`` when it is transcribed in one pass.
+        """
+        return DiskCache.make_key(
+            "transcript",
+            CACHE_VERSION,
+            file_digest(audio_path),
+            self.model_path,
+            self.decode_params,
+            window,
+            self.vad,
+        )
 
-    def transcribe(self, audio_path: str):
+    def transcribe(self, audio_path: str) -> List[Dict]:
         """Transcribe the given audio file and return segments."""
+        window = self.chunk_seconds if self.chunk_workers > 1 else None
+        return [seg for _, _, segs in self._transcribe_windows(audio_path, window) for seg in segs]
+
+    def transcribe_stream(
+        self,
+        audio_path: str,
+        on_progress: Callable[[float], None] | None = None,
+    ) -> Iterator[Dict]:
+        """Yield segments of ``audio_path`` as soon as they are transcribed.
+
+        The file is transcribed in windows of about ``stream_seconds`` cut at
+        silences (``chunk_seconds`` when chunks run in parallel), and
+        ``on_progress`` is called with the fraction of the audio done after
+        each window. Segments are yielded in time order.
+        """
+        for _, _, segments in self.transcribe_windows(audio_path, on_progress):
+            yield from segments
+
+    def transcribe_windows(
+        self,
+        audio_path: str,
+        on_progress: Callable[[float], None] | None = None,
+    ) -> Iterator[Tuple[float, float, List[Dict]]]:
+        """Like :meth:`transcribe_stream`, but yield ``(start, end, segments)``.
+
+        Each window owns the segments whose midpoint lies in ``[start, end)``,
+        which lets a caller swap exactly that part of an earlier transcript.
+        """
+        window = self.chunk_seconds if self.chunk_workers > 1 else self.stream_seconds
+        return self._transcribe_windows(audio_path, window or None, on_progress)
+
+    def _transcribe_windows(
+        self,
+        audio_path: str,
+        window: float | None,
+        on_progress: Callable[[float], None] | None = None,
+    ) -> Iterator[Tuple[float, float, List[Dict]]]:
+        self.last_vad_stats = None
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(audio_path, window)
+            data = self.cache.get(key)
+            cached = None
+            if data is not None:
+                try:
+                    cached = json.loads(data.decode("utf-8"))
+                except ValueError as exc:
+                    # a damaged entry is a miss: drop it and transcribe again
+                    logger.warning("Discarding unreadable cached transcript for %s: %s", audio_path, exc)
+                    self.cache.discard(key)
+            if cached is not None:
+                logger.info("Using cached transcript for %s", audio_path)
+                yield 0.0, float("inf"), cached
+                if on_progress is not None:
+                    on_progress(1.0)
+                return
+        segments = []
+        with self._cpu_stage():
+            if window:
+                windows = self._transcribe_chunked(audio_path, window, on_progress)
+            else:
+                windows = iter([(0.0, float("inf"), self._transcribe_file(audio_path))])
+            for start, end, segs in windows:
+                segments.extend(segs)
+                yield start, end, segs
+        if on_progress is not None:
+            on_progress(1.0)
+        if self.last_vad_stats is not None:
+            logger.info(
+                "VAD skipped %.1f of %.1f seconds of %s",
+                self.last_vad_stats["skipped"],
+                self.last_vad_stats["duration"],
+                audio_path,
+            )
+        if key is not None:
+            self.cache.put(key, json.dumps(segments, ensure_ascii=False).encode("utf-8"))
+
+    def _cpu_stage(self):
+        if self.cpu_budget is None:
+            return nullcontext()
+        return self.cpu_budget.stage("transcribe", apply=self.set_threads)
+
+    def set_threads(self, n_threads: int) -> None:
+        """Use ``n_threads`` whisper.cpp threads from the next model call on."""
+        self.n_threads = n_threads
+
+    def _model_params(self) -> Dict:
+        if self.n_threads is None:
+            return self.decode_params
+        return dict(self.decode_params, n_threads=self.n_threads)
+
+    def _transcribe_file(self, audio_path: str) -> List[Dict]:
+        """Transcribe a whole file, skipping non-speech when VAD is enabled."""
+        if self.pcm_cache is not None:
+            logger.info("Transcribing %s", audio_path)
+            with self.pcm_cache.get(audio_path) as buffer:
+                return self._transcribe_samples(buffer.as_array())
+        if self.vad:
+            return self._transcribe_speech(decode_pcm(audio_path))
         logger.info("Transcribing %s", audio_path)
-        # request timestamps from the Whisper model
-        result = self.model.transcribe(audio_path)
+        return self._run_model(audio_path)
+
+    def _transcribe_samples(self, samples) -> List[Dict]:
+        """Transcribe decoded 16 kHz mono samples."""
+        if self.vad:
+            return self._transcribe_speech(samples)
+        return self._run_model(samples)
+
+    def _run_model(self, audio) -> List[Dict]:
+        """Run the model over a file path or an array of samples."""
+        with self.registry.lease(self.model_path, self._load_model) as model:
+            # request timestamps from the Whisper model
+            result = model.transcribe(audio, **self._model_params())
         segments = []
         for seg in result.get("segments", []):
             segments.append({
@@ -25,3 +238,107 @@ class TranscribeWorker:
                 "text": seg.get("text", "").strip(),
             })
         return segments
+
+    def _transcribe_speech(self, samples) -> List[Dict]:
+        """Transcribe only the speech regions found by the VAD pre-pass."""
+        regions = detect_speech(samples)
+        speech_map = SpeechMap(regions)
+        duration = len(samples) / SAMPLE_RATE
+        self._add_vad_stats({
+            "duration": duration,
+            "speech": speech_map.speech_seconds,
+            "skipped": duration - speech_map.speech_seconds,
+        })
+        if not regions:
+            return []
+        segments = self._run_model(speech_only(samples, regions))
+        for seg in segments:
+            seg["start"] = speech_map.to_original(seg["start"])
+            seg["end"] = speech_map.to_original(seg["end"], is_end=True)
+        return segments
+
+    def _add_vad_stats(self, stats: Dict[str, float] | None) -> None:
+        """Add the VAD stats of one file or chunk to ``last_vad_stats``."""
+        if stats is None:
+            return
+        if self.last_vad_stats is None:
+            self.last_vad_stats = dict(stats)
+        else:
+            for name, seconds in stats.items():
+                self.last_vad_stats[name] += seconds
+
+    def _transcribe_chunked(
+        self,
+        audio_path: str,
+        window: float,
+        on_progress: Callable[[float], None] | None = None,
+    ) -> Iterator[Tuple[float, float, List[Dict]]]:
+        """Transcribe silence-delimited chunks and yield them as stitched windows.
+
+        Chunks run in a process pool when ``chunk_workers`` is above one and
+        one after another in this thread otherwise; either way their results
+        are consumed in order, so segments stream out as each chunk finishes.
+        """
+        buffer = self.pcm_cache.get(audio_path) if self.pcm_cache is not None else None
+        with buffer if buffer is not None else nullcontext():
+            if buffer is not None:
+                # scanning the decoded samples is cheaper than decoding the source again
+                silences = find_silences(buffer.path, **raw_pcm_input(buffer.sample_rate))
+                duration = buffer.duration
+            else:
+                duration, silences = detect_silences(audio_path)
+            chunks = plan_chunks(duration, silences, window)
+            if len(chunks) == 1:
+                yield 0.0, float("inf"), self._transcribe_file(audio_path)
+                return
+            logger.info("Transcribing %s in %d chunks", audio_path, len(chunks))
+
+            def reported(results: Iterable[List[Dict]]) -> Iterator[List[Dict]]:
+                for (_, end), segments in zip(chunks, results):
+                    if on_progress is not None and duration > 0:
+                        on_progress(min(1.0, end / duration))
+                    yield segments
+
+            with tempfile.TemporaryDirectory(prefix="transcribe-") as tmp:
+                if self.chunk_workers > 1:
+                    results = self._pool_results(audio_path, chunks, buffer, tmp)
+                else:
+                    results = self._serial_results(audio_path, chunks, buffer, tmp)
+                yield from stitch_windows(chunks, reported(results))
+
+    def _pool_results(self, audio_path: str, chunks, buffer, tmp: str) -> Iterator[List[Dict]]:
+        """Yield chunk results in order from a process pool."""
+        if buffer is not None:
+            sources = [(buffer.path, start, end) for start, end in chunks]
+        else:
+            sources = [
+                extract_chunk(audio_path, start, end, os.path.join(tmp, f"chunk{i:04d}.wav"))
+                for i, (start, end) in enumerate(chunks)
+            ]
+        workers = min(self.chunk_workers, len(chunks))
+        params = self.decode_params
+        if self.n_threads is not None:
+            # the job's share of the cores is split between the processes
+            params = dict(params, n_threads=max(1, self.n_threads // workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for segments, stats in pool.map(
+                _transcribe_chunk,
+                [self.model_path] * len(sources),
+                [params] * len(sources),
+                [self.vad] * len(sources),
+                sources,
+            ):
+                # the processes' stats would be lost otherwise
+                self._add_vad_stats(stats)
+                yield segments
+
+    def _serial_results(self, audio_path: str, chunks, buffer, tmp: str) -> Iterator[List[Dict]]:
+        """Yield chunk results in order, transcribing each in this thread."""
+        samples = buffer.as_array() if buffer is not None else None
+        for i, (start, end) in enumerate(chunks):
+            if samples is not None:
+                yield self._transcribe_samples(samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)])
+                continue
+            path = extract_chunk(audio_path, start, end, os.path.join(tmp, f"chunk{i:04d}.wav"))
+            yield self._transcribe_file(path)
+            os.remove(path)
@@ -1,32 +1,404 @@
-from typing import List, Dict
+import heapq
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple
 from logging_setup import get_logger
+from interval_index import IntervalIndex
+from segment_store import SegmentStore, SegmentView
+from transcript_archive import open_archive, write_archive
 
 logger = get_logger(__name__)
 
+
+class TranscriptChange:
+    """One change to the stored segments, as passed to listeners.
+
+    ``kind`` is one of :attr:`TranscriptAggregator.INSERTED`, ``REMOVED``,
+    ``RENAMED`` or ``RENUMBERED``; ``ids`` are the affected segment ids in
+    id order, ``starts`` their start times (removed segments can no longer
+    be looked up) and ``speakers`` is the old-to-new name mapping of a
+    rename. A ``RENUMBERED`` change has no ids; its ``renumbered`` sequence
+    gives the new id of every old one. Renumbering keeps the id order, so
+    ``(start, id)`` keys stay sorted when they are mapped.
+    """
+
+    __slots__ = ("kind", "ids", "starts", "file", "speakers", "renumbered")
+
+    def __init__(
+        self,
+        kind: str,
+        ids: List[int],
+        starts: List[float],
+        file: str | None = None,
+        speakers: Dict[str, str] | None = None,
+        renumbered: Sequence | None = None,
+    ):
+        self.kind = kind
+        self.ids = ids
+        self.starts = starts
+        self.file = file
+        self.speakers = speakers or {}
+        self.renumbered = renumbered
+
+    def __repr__(self) -> str:
+        return f"TranscriptChange({self.kind!r}, {len(self.ids)} ids, file={self.file!r})"
+
+
+class TranscriptView(Sequence):
+    """Read-only sequence of the segments in transcript order.
+
+    Holds only the store and the id order; each item is a
+    :class:`SegmentView` made when it is read. Compares equal to any
+    sequence with equal segments, e.g. a list of dicts.
+    """
+
+    __slots__ = ("_store", "_ids")
+
+    def __init__(self, store: SegmentStore, ids: Sequence) -> None:
+        self._store = store
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SegmentView(self._store, seg_id) for seg_id in self._ids[index]]
+        return SegmentView(self._store, self._ids[index])
+
+    def __iter__(self) -> Iterator[SegmentView]:
+        store = self._store
+        return (SegmentView(store, seg_id) for seg_id in self._ids)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TranscriptView({len(self)} segments)"
+
+
 class TranscriptAggregator:
-    """Collects transcript segments from multiple audio files."""
+    """Collects transcript segments from multiple audio files.
+
+    Every stored segment gets an integer id. Methods that change segments
+    return the ids involved so a view can update just the affected rows; the
+    transcript order is by start time, then by id.
+
+    Each file keeps its segment ids in an ``array('Q')`` run sorted by start
+    time, then id, that is extended as segments arrive; the start times are
+    read from the store's column. The transcript order is a k-way merge of
+    these runs into another id array, built on first use and cached until
+    segments are added or removed.
+
+    Overlap and point-in-time queries, per file or across all files, use an
+    :class:`IntervalIndex` built on first use and rebuilt only for files
+    whose segments changed.
+
+    Segments live in a columnar :class:`SegmentStore` and are handed out as
+    read-only, dict-compatible :class:`SegmentView` objects, made only when
+    they are read.
+
+    Listeners added with :meth:`add_listener` are called with a
+    :class:`TranscriptChange` after every change, so views and indexes can
+    update only the segments involved. Replacing segments reports the
+    removed ids first, then the inserted ones.
+
+    Once removed segments outnumber the stored ones, or hold more text, the
+    store drops them and the remaining segments get new, consecutive ids in
+    the same order; listeners are told with a ``RENUMBERED`` change, and ids
+    held from before it must be mapped through it.
+
+    An aggregator loaded with :meth:`load_archive` reads its segments from
+    the memory-mapped archive. The rows of each file are already in start
+    order there, so a file's run is only built once that file changes.
+    """
+
+    INSERTED = "inserted"
+    REMOVED = "removed"
+    RENAMED = "renamed"
+    RENUMBERED = "renumbered"
 
     def __init__(self):
-        self._segments: List[Dict] = []
+        self._store = SegmentStore()
+        self._runs: Dict[str, array] = {}
+        # longest segment of each file, which bounds where a span's segments start
+        self._longest: Dict[str, float] = {}
+        # current name of each speaker label as diarization produced it
+        self._renames: Dict[str, str] = {}
+        self._order: array | None = None
+        self._view: TranscriptView | None = None
+        self._file_index: Dict[str, IntervalIndex] = {}
+        self._global_index: IntervalIndex | None = None
+        # files whose rows are a sorted, contiguous range of an opened archive
+        self._archived: Dict[str, range] = {}
+        self._archive_path: str | None = None
+        self._listeners: List[Callable[[TranscriptChange], None]] = []
+
+    @classmethod
+    def load_archive(cls, path: str) -> "TranscriptAggregator":
+        """Return an aggregator backed by an archive written by :meth:`save_archive`.
+
+        Raises ``ValueError`` if the archive is damaged or its rows are not
+        grouped by file in start order, as :meth:`save_archive` writes them.
+        """
+        aggregator = cls()
+        store = open_archive(path)
+        aggregator._store = store
+        aggregator._archive_path = path
+        # save_archive groups rows by file, numbering files as they appear,
+        # and sorts each file's rows by start; the runs rely on both
+        starts, files = store.starts, store.files
+        for row in range(1, len(starts)):
+            if files[row] < files[row - 1] or (files[row] == files[row - 1] and starts[row] < starts[row - 1]):
+                raise ValueError(f"{path} does not hold its segments grouped by file in start order")
+        end = len(store.starts)
+        for file_id, audio_file in enumerate(store.file_names.names):
+            first = bisect_left(store.files, file_id)
+            last = bisect_left(store.files, file_id + 1, first, end)
+            if last > first:
+                aggregator._archived[audio_file] = range(first, last)
+        logger.info("Loaded %d segments of %d files from %s", end, len(aggregator._archived), path)
+        return aggregator
+
+    def save_archive(self, path: str) -> int:
+        """Write every segment to the binary archive ``path``; return the count."""
+        if self._store.backed and os.path.exists(path) and os.path.samefile(path, self._archive_path):
+            # an open mapping of the file would keep it from being replaced
+            self._store.detach()
+        rows = [seg_id for audio_file in self._files() for seg_id in self._ids(audio_file)]
+        return write_archive(path, self._store, rows)
+
+    def add_listener(self, listener: Callable[[TranscriptChange], None]) -> None:
+        """Call ``listener`` with a :class:`TranscriptChange` after each change."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[TranscriptChange], None]) -> None:
+        self._listeners.remove(listener)
+
+    def _emit(self, change: TranscriptChange) -> None:
+        for listener in list(self._listeners):
+            listener(change)
+
+    def _files(self) -> List[str]:
+        return list(self._archived) + list(self._runs)
 
-    def add_segments(self, audio_file: str, segments: List[Dict]):
-        """Add segments for the given audio file.
+    def _ids(self, audio_file: str) -> Iterable[int]:
+        """Yield the ids of ``audio_file`` in start order."""
+        rows = self._archived.get(audio_file)
+        if rows is not None:
+            return iter(rows)
+        return iter(self._runs.get(audio_file, ()))
 
-        Each segment will be copied and annotated with the source filename.
+    def _run(self, audio_file: str) -> array:
+        """Return the sorted run of ``audio_file``, building it if archived."""
+        rows = self._archived.pop(audio_file, None)
+        if rows is not None:
+            starts, ends = self._store.starts, self._store.ends
+            self._runs[audio_file] = array("Q", rows)
+            self._longest[audio_file] = max((ends[i] - starts[i] for i in rows), default=0.0)
+        return self._runs.setdefault(audio_file, array("Q"))
+
+    def add_segments(self, audio_file: str, segments: List[Dict]) -> List[int]:
+        """Add segments for the given audio file and return their ids.
+
+        The segment fields are copied into the store and annotated with the
+        source filename.
         """
         logger.info("Adding %d segments from %s", len(segments), audio_file)
+        ids = []
+        run = self._run(audio_file)
+        longest = self._longest.get(audio_file, 0.0)
         for seg in segments:
-            entry = seg.copy()
-            entry["file"] = audio_file
-            self._segments.append(entry)
-
-    def get_transcript(self) -> List[Dict]:
-        """Return all collected segments ordered by start time."""
-        return sorted(self._segments, key=lambda s: s.get("start", 0.0))
-
-    def rename_speaker(self, old_name: str, new_name: str) -> None:
-        """Rename a speaker in all stored segments."""
-        logger.info("Renaming speaker %s to %s", old_name, new_name)
-        for seg in self._segments:
-            if seg.get("speaker") == old_name:
-                seg["speaker"] = new_name
+            seg_id = self._store.append(audio_file, seg)
+            # looked up again as appending may have copied the columns
+            starts = self._store.starts
+            start = starts[seg_id]
+            longest = max(longest, self._store.ends[seg_id] - start)
+            # segments mostly arrive in time order, so this is usually an
+            # append; a new id is the largest, so it goes after equal starts
+            if not run or starts[run[-1]] <= start:
+                run.append(seg_id)
+            else:
+                run.insert(bisect_right(run, start, key=starts.__getitem__), seg_id)
+            ids.append(seg_id)
+        self._longest[audio_file] = longest
+        if ids:
+            self._invalidate(audio_file)
+            starts = self._store.starts
+            self._emit(TranscriptChange(self.INSERTED, ids, [starts[i] for i in ids], audio_file))
+        return ids
+
+    def _invalidate(self, audio_file: str) -> None:
+        self._order = None
+        self._view = None
+        self._file_index.pop(audio_file, None)
+        self._global_index = None
+
+    def _remove(self, audio_file: str, start: float = 0.0, end: float = float("inf")) -> List[int]:
+        """Remove segments of ``audio_file`` whose midpoint is in ``[start, end)``."""
+        run = self._run(audio_file)
+        starts, ends = self._store.starts, self._store.ends
+        # a segment centred in the span starts before its end and no more
+        # than the file's longest segment before its start
+        lo = bisect_left(run, start - self._longest.get(audio_file, 0.0), key=starts.__getitem__)
+        hi = bisect_left(run, end, lo, key=starts.__getitem__)
+        kept = array("Q")
+        removed = []
+        for seg_id in run[lo:hi]:
+            if start <= (starts[seg_id] + ends[seg_id]) / 2 < end:
+                removed.append(seg_id)
+            else:
+                kept.append(seg_id)
+        if removed:
+            run[lo:hi] = kept
+            removed.sort()
+            removed_starts = [starts[seg_id] for seg_id in removed]
+            for seg_id in removed:
+                self._store.remove(seg_id)
+            self._invalidate(audio_file)
+            self._emit(TranscriptChange(self.REMOVED, removed, removed_starts, audio_file))
+            renumbered = self._store.maybe_compact()
+            if renumbered is not None:
+                self._renumber(renumbered)
+        return removed
+
+    def _renumber(self, renumbered: array) -> None:
+        """Map every held id through the store's compaction."""
+        logger.debug("Compacted the segment store to %d segments", len(self._store))
+        for audio_file, run in self._runs.items():
+            self._runs[audio_file] = array("Q", [renumbered[seg_id] for seg_id in run])
+        # archived files are untouched, so their rows are still contiguous
+        self._archived = {
+            audio_file: range(renumbered[rows.start], renumbered[rows.start] + len(rows))
+            for audio_file, rows in self._archived.items()
+        }
+        self._order = None
+        self._view = None
+        self._file_index.clear()
+        self._global_index = None
+        self._emit(TranscriptChange(self.RENUMBERED, [], [], renumbered=renumbered))
+
+    def replace_segments(self, audio_file: str, segments: List[Dict]) -> Tuple[List[int], List[int]]:
+        """Replace every stored segment of ``audio_file`` with ``segments``.
+
+        Used when draft segments streamed in during transcription are
+        superseded by the final, speaker-labelled ones. Returns the removed
+        and the added ids.
+        """
+        logger.info("Replacing segments of %s with %d segments", audio_file, len(segments))
+        removed = self._remove(audio_file)
+        return removed, self.add_segments(audio_file, segments)
+
+    def replace_span(
+        self, audio_file: str, start: float, end: float, segments: List[Dict]
+    ) -> Tuple[List[int], List[int]]:
+        """Replace the segments of ``audio_file`` centred in ``[start, end)``.
+
+        Used by the refinement pass, whose segment boundaries differ from the
+        draft's. Returns the removed and the added ids.
+        """
+        removed = self._remove(audio_file, start, end)
+        logger.debug("Replacing %d segments of %s in [%s, %s)", len(removed), audio_file, start, end)
+        return removed, self.add_segments(audio_file, segments)
+
+    def file_segments(self, audio_file: str) -> List[SegmentView]:
+        """Return the segments of ``audio_file`` ordered by start time."""
+        return [SegmentView(self._store, seg_id) for seg_id in self._ids(audio_file)]
+
+    def get_segment(self, seg_id: int) -> SegmentView:
+        """Return the stored segment with id ``seg_id``."""
+        return self._store.view(seg_id)
+
+    def transcript_ids(self) -> array:
+        """Return segment ids in transcript order, as an ``array('Q')``.
+
+        The array is shared until the next change and must not be modified.
+        """
+        if self._order is None:
+            starts = self._store.starts
+            self._order = array("Q", heapq.merge(
+                *map(self._ids, self._files()), key=lambda seg_id: (starts[seg_id], seg_id)
+            ))
+        return self._order
+
+    def get_transcript(self) -> TranscriptView:
+        """Return all collected segments ordered by start time.
+
+        The sequence is cached until segments are added or removed.
+        """
+        if self._view is None:
+            self._view = TranscriptView(self._store, self.transcript_ids())
+        return self._view
+
+    def _index(self, audio_file: str | None) -> IntervalIndex:
+        starts, ends = self._store.starts, self._store.ends
+        if audio_file is None:
+            if self._global_index is None:
+                ids = self.transcript_ids()
+                self._global_index = IntervalIndex((starts[i], ends[i], i) for i in ids)
+            return self._global_index
+        index = self._file_index.get(audio_file)
+        if index is None:
+            index = IntervalIndex((starts[i], ends[i], i) for i in self._ids(audio_file))
+            self._file_index[audio_file] = index
+        return index
+
+    def segments_at(self, time: float, audio_file: str | None = None) -> List[int]:
+        """Return the ids of segments spanning ``time``, in start order.
+
+        Without ``audio_file`` every file is searched, each on its own
+        timeline.
+        """
+        return self._index(audio_file).at(time)
+
+    def segments_between(self, start: float, end: float, audio_file: str | None = None) -> List[int]:
+        """Return the ids of segments overlapping ``[start, end)``, in start order."""
+        return self._index(audio_file).overlapping(start, end)
+
+    def rename_speaker(self, old_name: str, new_name: str) -> List[int]:
+        """Rename a speaker in all stored segments; return the affected ids."""
+        return self.rename_speakers({old_name: new_name})
+
+    def rename_speakers(self, mapping: Dict[str, str]) -> List[int]:
+        """Rename several speakers at once and return the affected ids.
+
+        Only the speaker name table changes, so the cost does not depend on
+        the number of segments; names can also be swapped.
+        """
+        logger.info("Renaming speakers %s", mapping)
+        self._renames = {label: mapping.get(name, name) for label, name in self._renames.items()}
+        for old, new in mapping.items():
+            self._renames.setdefault(old, new)
+        changed = self._store.rename_speakers(mapping)
+        if changed:
+            starts = self._store.starts
+            self._emit(TranscriptChange(
+                self.RENAMED, changed, [starts[i] for i in changed], speakers=dict(mapping)
+            ))
+        return changed
+
+    def speaker_name(self, label: str) -> str:
+        """Return the current name of the speaker diarization labelled ``label``.
+
+        Segments labelled again later, such as those of the refinement pass,
+        go through this so that earlier renames still apply to them.
+        """
+        return self._renames.get(label, label)
+
+    def speakers(self) -> List[str]:
+        """Return the names of the speakers in the transcript, sorted."""
+        return sorted(self._store.speaker_totals())
+
+    def speaker_segments(self, name: str) -> List[int]:
+        """Return the ids of the segments labelled ``name``, in id order."""
+        return self._store.speaker_rows(name)
+
+    def speaker_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return the segment count and talk time in seconds of each speaker."""
+        return self._store.speaker_totals()
@@ -0,0 +1,229 @@
+"""Binary, memory-mapped archive of aggregated transcripts.
+
+Usage:
+    from transcript_archive import write_archive, open_archive
+    write_archive("season3.pdta", store, rows)   # rows of a SegmentStore, in order
+    store = open_archive("season3.pdta")         # columns read straight from the file
+    store.view(0)["text"]
+
+Layout (all sections 8-byte aligned, columns in the writer's byte order):
+
+    header      magic, version, byte order, counts and section sizes
+    starts      float64 per segment
+    ends        float64 per segment
+    speakers    uint32 speaker name id per segment
+    files       uint32 file name id per segment
+    offsets     uint64 offset into the text blob per segment
+    lengths     uint32 text length in bytes per segment
+    flags       uint8 bit set of the keys each segment has
+    strings     speaker and file names, each a uint32 length and UTF-8 bytes
+    extras      JSON object of the keys beyond start/end/speaker/text/file
+    text        the UTF-8 texts of all segments, back to back
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import operator
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, Iterable, List
+from logging_setup import get_logger
+from segment_store import SegmentStore
+
+logger = get_logger(__name__)
+
+MAGIC = b"PDTA"
+VERSION = 1
+ARCHIVE_EXTENSION = ".pdta"
+
+# magic, version, byte order, segments, speaker names, file names,
+# string table bytes, extras bytes, text bytes
+_HEADER = struct.Struct("<4sHc1xQIIQQQ")
+_LENGTH = struct.Struct("<I")
+_COLUMNS = (("d", 8), ("d", 8), ("I", 4), ("I", 4), ("Q", 8), ("I", 4), ("B", 1))
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def _pack_strings(names: Iterable[str]) -> bytes:
+    out = bytearray()
+    for name in names:
+        encoded = name.encode("utf-8")
+        out += _LENGTH.pack(len(encoded))
+        out += encoded
+    return bytes(out)
+
+
+def _unpack_strings(data: memoryview, count: int, pos: int, end: int) -> List[str]:
+    """Read ``count`` names from ``data[pos:end]``, which they must fill exactly."""
+    names = []
+    for _ in range(count):
+        if pos + _LENGTH.size > end:
+            raise ValueError("string table is too short")
+        (length,) = _LENGTH.unpack_from(data, pos)
+        pos += _LENGTH.size
+        if pos + length > end:
+            raise ValueError("string table is too short")
+        names.append(str(data[pos:pos + length], "utf-8"))
+        pos += length
+    if pos != end:
+        raise ValueError("string table has trailing bytes")
+    return names
+
+
+def _unmap(mapped: mmap.mmap, *views: memoryview) -> None:
+    for view in views:
+        view.release()
+    mapped.close()
+
+
+def _check_references(path: str, columns: List[Any], n_speakers: int, n_files: int, text_size: int) -> None:
+    """Raise ``ValueError`` unless every name id and text range is in bounds."""
+    _, _, speakers, files, offsets, lengths, _ = columns
+    if not len(speakers):
+        return
+    if max(speakers) >= n_speakers or max(files) >= n_files:
+        raise ValueError(f"{path} refers to names missing from its string table")
+    if max(map(operator.add, offsets, lengths)) > text_size:
+        raise ValueError(f"{path} refers to text beyond its text section")
+
+
+def write_archive(path: str, store: SegmentStore, rows: Iterable[int]) -> int:
+    """Write ``rows`` of ``store`` to ``path`` and return how many were written.
+
+    Rows are renumbered from zero in the given order, and only the names
+    they use are kept. The file is replaced atomically.
+    """
+    starts, ends = array("d"), array("d")
+    speakers, files = array("I"), array("I")
+    offsets, lengths = array("Q"), array("I")
+    flags = bytearray()
+    text = bytearray()
+    extras: Dict[str, Dict[str, Any]] = {}
+    speaker_ids: Dict[int, int] = {}
+    file_ids: Dict[int, int] = {}
+    for new_row, row in enumerate(rows):
+        starts.append(store.starts[row])
+        ends.append(store.ends[row])
+        speakers.append(speaker_ids.setdefault(store.speakers[row], len(speaker_ids)))
+        files.append(file_ids.setdefault(store.files[row], len(file_ids)))
+        encoded = store.text_bytes(row)
+        offsets.append(len(text))
+        lengths.append(len(encoded))
+        text += encoded
+        flags.append(store.flags(row))
+        if store.extras(row):
+            extras[str(new_row)] = store.extras(row)
+    strings = _pack_strings(
+        [store.speaker_names.names[i] for i in speaker_ids] + [store.file_names.names[i] for i in file_ids]
+    )
+    extras_json = json.dumps(extras).encode("utf-8") if extras else b""
+    header = _HEADER.pack(
+        MAGIC, VERSION, _BYTE_ORDER, len(starts), len(speaker_ids), len(file_ids),
+        len(strings), len(extras_json), len(text),
+    )
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(header)
+            fh.write(b"\0" * _padding(len(header)))
+            for section in (starts, ends, speakers, files, offsets, lengths, flags, strings, extras_json):
+                data = section.tobytes() if isinstance(section, array) else section
+                fh.write(data)
+                fh.write(b"\0" * _padding(len(data)))
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    logger.info("Wrote %d segments to archive %s", len(starts), path)
+    return len(starts)
+
+
+def open_archive(path: str) -> SegmentStore:
+    """Return a :class:`SegmentStore` whose columns are mapped from ``path``.
+
+    Nothing is parsed or copied per segment: the columns are views of the
+    mapped file, and only their name ids and text ranges are checked
+    against the sections they point into. An archive written on a machine
+    with the other byte order is copied and converted instead. Raises
+    ``ValueError`` for files that are not archives, are truncated or
+    corrupt, or come from a newer version.
+    """
+    with open(path, "rb") as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(fh.fileno()).st_size else None
+    if mapped is None or len(mapped) < _HEADER.size:
+        if mapped is not None:
+            mapped.close()
+        raise ValueError(f"{path} is not a transcript archive")
+    data = memoryview(mapped)
+    columns: List[memoryview] = []
+    text = data[0:0]
+    try:
+        (magic, version, byte_order, count, n_speakers, n_files,
+         strings_size, extras_size, text_size) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a transcript archive")
+        if version > VERSION:
+            raise ValueError(f"{path} was written by a newer version (archive {version})")
+        pos = _HEADER.size + _padding(_HEADER.size)
+        # every section must lie inside the file before any of it is read
+        sizes = [count * itemsize for _, itemsize in _COLUMNS] + [strings_size, extras_size]
+        if pos + sum(size + _padding(size) for size in sizes) + text_size > len(mapped):
+            raise ValueError(f"{path} is truncated")
+        for typecode, itemsize in _COLUMNS:
+            size = count * itemsize
+            columns.append(data[pos:pos + size].cast(typecode))
+            pos += size + _padding(size)
+        try:
+            names = _unpack_strings(data, n_speakers + n_files, pos, pos + strings_size)
+        except ValueError:
+            raise ValueError(f"{path} has a corrupt string table") from None
+        pos += strings_size + _padding(strings_size)
+        extras_data = str(data[pos:pos + extras_size], "utf-8")
+        extras = {int(row): seg for row, seg in json.loads(extras_data).items()} if extras_size else {}
+        if any(not 0 <= row < count for row in extras):
+            raise ValueError(f"{path} has extras for rows it does not hold")
+        pos += extras_size + _padding(extras_size)
+        text = data[pos:pos + text_size]
+    except ValueError:
+        _unmap(mapped, data, text, *columns)
+        raise
+    backing = mapped
+    if byte_order != _BYTE_ORDER:
+        # foreign byte order: copy the columns and swap them in memory
+        copies: List[Any] = []
+        for column, (typecode, itemsize) in zip(columns, _COLUMNS):
+            converted = array(typecode)
+            converted.frombytes(column.cast("B"))
+            if itemsize > 1:
+                converted.byteswap()
+            copies.append(converted)
+        copies[-1] = bytearray(copies[-1])
+        copied_text = bytes(text)
+        _unmap(mapped, data, text, *columns)
+        columns, text, backing = copies, copied_text, None
+    try:
+        _check_references(path, columns, n_speakers, n_files, text_size)
+    except ValueError:
+        if backing is not None:
+            _unmap(mapped, data, text, *columns)
+        raise
+    starts, ends, speakers, files, offsets, lengths, flags = columns
+    logger.info("Opened archive %s with %d segments", path, count)
+    return SegmentStore.from_columns(
+        starts, ends, speakers, files, flags, text, offsets, lengths,
+        speaker_names=names[:n_speakers],
+        file_names=names[n_speakers:],
+        extras=extras,
+        backing=backing,
+    )
@@ -19,7 +19,8 @@ def export_txt(segments: List[Dict]) -> str:
 def export_json(segments: List[Dict]) -> str:
     """Return the transcript segments serialized as formatted JSON."""
     logger.info("Exporting %d segments as JSON", len(segments))
-    return json.dumps(segments, indent=2, ensure_ascii=False)
+    # segments may be read-only views of the aggregator's store
+    return json.dumps([dict(seg) for seg in segments], indent=2, ensure_ascii=False)
 
 
 def _format_timestamp(seconds: float) -> str:
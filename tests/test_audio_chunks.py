@@ -0,0 +1,79 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('audio_chunks')
+    return importlib.reload(mod)
+
+
+def test_parse_silencedetect_output():
+    mod = load_module()
+    stderr = (
+        "[silencedetect @ 0x1] silence_start: -0.01\n"
+        "[silencedetect @ 0x1] silence_end: 1.5 | silence_duration: 1.51\n"
+        "size=N/A time=00:10:00.00\n"
+        "[silencedetect @ 0x1] silence_start: 598.2\n"
+        "[silencedetect @ 0x1] silence_end: 599.8 | silence_duration: 1.6\n"
+    )
+    assert mod.parse_silencedetect(stderr) == [(0.0, 1.5), (598.2, 599.8)]
+
+
+def test_plan_chunks_cuts_at_silences_and_falls_back_to_overlap():
+    mod = load_module()
+    silences = [(295.0, 297.0), (610.0, 612.0)]
+    chunks = mod.plan_chunks(1300.0, silences, target=300.0, overlap=2.0)
+
+    assert chunks[0] == (0.0, 296.0)
+    assert chunks[1] == (296.0, 611.0)
+    # no silence near 911, so the cut is hard with an overlap on both sides
+    assert chunks[2] == (611.0, 913.0)
+    assert chunks[3] == (909.0, 1300.0)
+    assert mod.plan_chunks(400.0, [], target=300.0) == [(0.0, 400.0)]
+
+
+def test_stitch_segments_offsets_and_deduplicates():
+    mod = load_module()
+    chunks = [(0.0, 12.0), (8.0, 20.0)]
+    results = [
+        [
+            {'start': 0.0, 'end': 4.0, 'speaker': 'Speaker 1', 'text': 'one'},
+            {'start': 9.0, 'end': 11.5, 'speaker': 'Speaker 1', 'text': 'two'},
+        ],
+        [
+            {'start': 1.0, 'end': 3.5, 'speaker': 'Speaker 1', 'text': 'two'},
+            {'start': 5.0, 'end': 9.0, 'speaker': 'Speaker 1', 'text': 'three'},
+        ],
+    ]
+    stitched = mod.stitch_segments(chunks, results)
+
+    assert [s['text'] for s in stitched] == ['one', 'two', 'three']
+    assert stitched[1]['start'] == 9.0 and stitched[1]['end'] == 11.5
+    assert stitched[2]['start'] == 13.0 and stitched[2]['end'] == 17.0
+
+
+def test_cached_duration_probes_each_file_once(monkeypatch, tmp_path):
+    mod = load_module()
+    dc = importlib.import_module('disk_cache')
+    audio = tmp_path / 'a.wav'
+    audio.write_bytes(b'x' * 10)
+    probes = []
+
+    def fake_probe(path):
+        probes.append(path)
+        return 42.5
+
+    monkeypatch.setattr(mod, 'probe_duration', fake_probe)
+    cache = dc.DiskCache(str(tmp_path / 'durations'))
+    assert mod.cached_duration(str(audio), cache) == 42.5
+    assert mod.cached_duration(str(audio), cache) == 42.5
+    assert len(probes) == 1
+
+    # a new session still finds the duration on disk
+    mod = load_module()
+    monkeypatch.setattr(mod, 'probe_duration', fake_probe)
+    assert mod.cached_duration(str(audio), cache) == 42.5
+    assert len(probes) == 1
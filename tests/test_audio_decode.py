@@ -0,0 +1,116 @@
+import os
+import sys
+import types
+import importlib
+import threading
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('audio_decode')
+    return importlib.reload(mod)
+
+
+def install_fake_ffmpeg(monkeypatch, samples):
+    """Fake ffmpeg that writes ``samples`` as raw float32 to the output file."""
+    calls = []
+
+    class Stream:
+        def __init__(self, source):
+            self.source = source
+
+        def output(self, dest, **kwargs):
+            self.dest = dest
+            return self
+
+        def overwrite_output(self):
+            return self
+
+        def run(self, **kwargs):
+            calls.append(self.source)
+            with open(self.dest, 'wb') as fh:
+                fh.write(array('f', samples).tobytes())
+            return b'', b''
+
+    fake_ffmpeg = types.ModuleType('ffmpeg')
+    fake_ffmpeg.input = lambda source, **kwargs: Stream(source)
+    monkeypatch.setitem(sys.modules, 'ffmpeg', fake_ffmpeg)
+    return calls
+
+
+def test_pcm_buffer_maps_samples(tmp_path):
+    mod = load_module()
+    path = tmp_path / 'audio.f32'
+    path.write_bytes(array('f', [0.5] * 32000).tobytes())
+
+    buffer = mod.PcmBuffer(str(path))
+    assert len(buffer) == 32000
+    assert buffer.duration == 2.0
+    assert buffer.samples[0] == 0.5
+    buffer.close()
+
+    empty = tmp_path / 'empty.f32'
+    empty.write_bytes(b'')
+    assert len(mod.PcmBuffer(str(empty))) == 0
+
+
+def test_pcm_cache_decodes_once_and_reuses(monkeypatch, tmp_path):
+    mod = load_module()
+    calls = install_fake_ffmpeg(monkeypatch, [0.25] * 1600)
+    source = tmp_path / 'show.mp3'
+    source.write_bytes(b'mp3')
+    cache = mod.PcmCache(str(tmp_path / 'pcm'))
+
+    buffers = []
+    threads = [threading.Thread(target=lambda: buffers.append(cache.get(str(source)))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [str(source)]
+    assert {b.path for b in buffers} == {buffers[0].path}
+    assert buffers[0].duration == 0.1
+    assert (cache.hits, cache.misses) == (3, 1)
+    # the per-file decode locks are dropped once nobody waits for them
+    assert cache._decode_locks == {}
+    with buffers[0] as buffer:
+        assert buffer.samples[0] == 0.25
+    assert buffers[0]._mmap is None
+
+
+def test_pcm_cache_invalidates_on_source_change(monkeypatch, tmp_path):
+    mod = load_module()
+    calls = install_fake_ffmpeg(monkeypatch, [0.0] * 160)
+    source = tmp_path / 'show.mp3'
+    source.write_bytes(b'mp3')
+    cache = mod.PcmCache(str(tmp_path / 'pcm'))
+
+    first = cache.get(str(source)).path
+    source.write_bytes(b'edited mp3')
+    second = cache.get(str(source)).path
+
+    assert first != second
+    assert len(calls) == 2
+
+
+def test_pcm_cache_keeps_a_new_entry_over_the_limit(monkeypatch, tmp_path):
+    mod = load_module()
+    install_fake_ffmpeg(monkeypatch, [0.5] * 1600)
+    cache = mod.PcmCache(str(tmp_path / 'pcm'), max_bytes=1000)
+    sources = []
+    for name in ('a.mp3', 'b.mp3'):
+        sources.append(tmp_path / name)
+        sources[-1].write_bytes(name.encode())
+
+    first = cache.get(str(sources[0]))
+    second = cache.get(str(sources[1]))
+
+    # the older entry makes room, the one just decoded stays readable
+    assert second.samples[0] == 0.5
+    assert os.path.exists(second.path)
+    assert not os.path.exists(first.path)
+    first.close()
+    second.close()
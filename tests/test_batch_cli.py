@@ -0,0 +1,186 @@
+import io
+import os
+import sys
+import json
+import types
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module(monkeypatch):
+    mod = importlib.import_module('batch_cli')
+    mod = importlib.reload(mod)
+    monkeypatch.setattr(mod, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    return mod
+
+
+def test_collect_inputs_expands_folders_and_globs(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    for name in ['b.mp3', 'a.wav', 'notes.txt']:
+        (tmp_path / name).write_bytes(b'x')
+    sub = tmp_path / 'more'
+    sub.mkdir()
+    (sub / 'c.mp3').write_bytes(b'x')
+
+    inputs = mod.collect_inputs([str(tmp_path), str(sub / '*.mp3'), str(tmp_path / 'a.wav')])
+
+    assert inputs == [str(tmp_path / 'a.wav'), str(tmp_path / 'b.mp3'), str(sub / 'c.mp3')]
+
+
+def test_is_complete_requires_fresh_outputs(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    audio = tmp_path / 'show.mp3'
+    audio.write_bytes(b'x')
+    os.utime(audio, (1000, 1000))
+    assert not mod.is_complete(str(audio), ['txt', 'srt'])
+
+    for path in mod.output_paths(str(audio), ['txt', 'srt']).values():
+        open(path, 'w').close()
+    assert mod.is_complete(str(audio), ['txt', 'srt'])
+
+    os.utime(audio, None)
+    os.utime(tmp_path / 'show.txt', (1000, 1000))
+    assert not mod.is_complete(str(audio), ['txt', 'srt'])
+
+
+def test_process_file_runs_pipeline_and_writes_outputs(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+
+    class FakeTranscribeWorker:
+        def __init__(self, model, **kwargs):
+            self.model = model
+
+        def transcribe(self, path):
+            return [{'start': 0.0, 'end': 1.5, 'speaker': 'Speaker 1', 'text': 'hello'}]
+
+    class FakeDiarizer:
+        def __init__(self, **kwargs):
+            pass
+
+        def assign_speakers(self, path, segments):
+            return [dict(s, speaker='Host') for s in segments]
+
+    tw = types.ModuleType('transcribe_worker'); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType('diarizer'); dr.Diarizer = FakeDiarizer
+    monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
+    monkeypatch.setitem(sys.modules, 'diarizer', dr)
+    monkeypatch.setattr(importlib.import_module('audio_chunks'), 'probe_duration', lambda p: 90.0)
+
+    audio = tmp_path / 'show.mp3'
+    audio.write_bytes(b'x')
+    options = {'model': 'base', 'formats': ['txt', 'json'], 'processing': {}, 'cache_dir': None}
+    result = mod.process_file(str(audio), options)
+
+    assert result['audio_seconds'] == 90.0
+    assert result['segments'] == 1
+    assert (tmp_path / 'show.txt').read_text(encoding='utf-8') == 'hello'
+    data = json.loads((tmp_path / 'show.json').read_text(encoding='utf-8'))
+    assert data[0]['speaker'] == 'Host'
+    assert data[0]['file'] == str(audio)
+    assert not (tmp_path / 'show.srt').exists()
+
+    # a file whose length cannot be probed is still exported
+    def broken_probe(path):
+        raise RuntimeError('ffprobe missing')
+
+    monkeypatch.setattr(importlib.import_module('audio_chunks'), 'probe_duration', broken_probe)
+    other = tmp_path / 'other.mp3'
+    other.write_bytes(b'y')
+    result = mod.process_file(str(other), options)
+    assert result['audio_seconds'] == 0.0
+    assert (tmp_path / 'other.txt').read_text(encoding='utf-8') == 'hello'
+
+
+def test_run_batch_skips_done_files_and_reports(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    done = tmp_path / 'done.mp3'
+    todo = tmp_path / 'todo.mp3'
+    bad = tmp_path / 'bad.mp3'
+    for path in (done, todo, bad):
+        path.write_bytes(b'x')
+    (tmp_path / 'done.txt').write_text('old')
+
+    processed = []
+
+    def fake_process(path, options):
+        if path == str(bad):
+            raise RuntimeError('corrupt file')
+        processed.append(path)
+        return {'path': path, 'audio_seconds': 1800.0, 'seconds': 60.0, 'segments': 3}
+
+    monkeypatch.setattr(mod, 'process_file', fake_process)
+    out = io.StringIO()
+    options = {'model': 'base', 'formats': ['txt'], 'processing': {}, 'cache_dir': None}
+    summary = mod.run_batch([str(done), str(todo), str(bad)], options, workers=2, out=out)
+
+    assert processed == [str(todo)]
+    assert (summary['processed'], summary['skipped'], summary['failed']) == (1, 1, 1)
+    assert summary['audio_seconds'] == 1800.0
+    report = out.getvalue()
+    assert 'FAILED ' + str(bad) in report
+    assert 'Processed 1 files (1 skipped, 1 failed)' in report
+    assert 'Audio: 0.50 h' in report
+
+
+def test_run_batch_counts_missing_inputs_as_failed(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    todo = tmp_path / 'todo.mp3'
+    todo.write_bytes(b'x')
+    gone = tmp_path / 'gone.mp3'
+
+    processed = []
+
+    def fake_process(path, options):
+        processed.append(path)
+        return {'path': path, 'audio_seconds': 60.0, 'seconds': 1.0, 'segments': 1}
+
+    monkeypatch.setattr(mod, 'process_file', fake_process)
+    out = io.StringIO()
+    options = {'model': 'base', 'formats': ['txt'], 'processing': {}, 'cache_dir': None}
+    summary = mod.run_batch([str(gone), str(todo)], options, out=out)
+
+    assert processed == [str(todo)]
+    assert (summary['processed'], summary['skipped'], summary['failed']) == (1, 0, 1)
+    assert 'FAILED ' + str(gone) in out.getvalue()
+
+
+def test_run_batch_shortest_first(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    lengths = {'long.mp3': 7200.0, 'short.mp3': 60.0, 'mid.mp3': 900.0}
+    inputs = []
+    for name in lengths:
+        (tmp_path / name).write_bytes(name.encode())
+        inputs.append(str(tmp_path / name))
+    monkeypatch.setattr(
+        importlib.import_module('audio_chunks'), 'probe_duration',
+        lambda p: lengths[os.path.basename(p)],
+    )
+    processed = []
+
+    def fake_process(path, options):
+        processed.append(os.path.basename(path))
+        return {'path': path, 'audio_seconds': 1.0, 'seconds': 1.0, 'segments': 1}
+
+    monkeypatch.setattr(mod, 'process_file', fake_process)
+    options = {'formats': ['txt'], 'processing': {'schedule': 'shortest_first'}, 'cache_dir': None}
+    mod.run_batch(inputs, options, workers=1, out=io.StringIO())
+
+    assert processed == ['short.mp3', 'mid.mp3', 'long.mp3']
+
+
+def test_main_defaults_to_the_gui_model(tmp_path, monkeypatch):
+    mod = load_module(monkeypatch)
+    (tmp_path / 'a.mp3').write_bytes(b'x')
+    settings = types.SimpleNamespace(
+        processing={'transcribe_model': 'medium', 'batch_workers': 1}, cache_dir=str(tmp_path / 'cache')
+    )
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: settings
+    monkeypatch.setitem(sys.modules, 'settings', st)
+    runs = []
+    monkeypatch.setattr(mod, 'run_batch', lambda inputs, options, **k: runs.append(options) or {'failed': 0})
+
+    assert mod.main([str(tmp_path)]) == 0
+    assert mod.main([str(tmp_path), '--model', 'tiny']) == 0
+    assert [options['model'] for options in runs] == ['medium', 'tiny']
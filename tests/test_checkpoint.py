@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('checkpoint')
+    return importlib.reload(mod)
+
+
+def test_checkpoint_resumes_finished_stages(tmp_path):
+    mod = load_module()
+    paths = []
+    for name in ['a.wav', 'b.wav', 'c.wav']:
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+    directory = str(tmp_path / 'checkpoint')
+
+    run = mod.RunCheckpoint(directory)
+    assert run.pending_paths() is None
+    run.start(paths)
+    run.save_transcript(0, [{'start': 0.0, 'end': 1.0, 'text': 'hi'}])
+    run.save_tracks(0, [(0.0, 1.0, 'Spk1')])
+    run.mark_aggregated(0)
+    run.save_transcript(1, [{'start': 0.0, 'end': 2.0, 'text': 'yo'}])
+    run.save_tracks(2, [(0.0, 3.0, 'Spk2')])
+    run.flush()
+
+    # a new session after a crash
+    resumed = mod.RunCheckpoint(directory)
+    assert resumed.pending_paths() == paths
+    resumed.start(paths, resume=True)
+    assert [resumed.state(i) for i in range(3)] == ['aggregated', 'transcribed', 'queued']
+    assert resumed.transcript(1) == [{'start': 0.0, 'end': 2.0, 'text': 'yo'}]
+    assert resumed.tracks(1) is None
+    assert resumed.tracks(2) == [(0.0, 3.0, 'Spk2')]
+    assert not [n for n in os.listdir(directory) if n.endswith('.tmp')]
+
+    resumed.clear()
+    assert mod.RunCheckpoint(directory).pending_paths() is None
+
+
+def test_checkpoint_restarts_changed_files_and_other_runs(tmp_path):
+    mod = load_module()
+    a = tmp_path / 'a.wav'
+    b = tmp_path / 'b.wav'
+    a.write_bytes(b'a')
+    b.write_bytes(b'b')
+    paths = [str(a), str(b)]
+    directory = str(tmp_path / 'checkpoint')
+
+    run = mod.RunCheckpoint(directory)
+    run.start(paths)
+    run.save_transcript(0, [])
+    run.save_transcript(1, [])
+    run.flush()
+    b.write_bytes(b'edited')
+
+    resumed = mod.RunCheckpoint(directory)
+    resumed.start(paths, resume=True)
+    assert resumed.transcript(0) == []
+    assert resumed.transcript(1) is None
+
+    other = mod.RunCheckpoint(directory)
+    other.start([str(b)], resume=True)
+    assert other.state(0) == 'queued'
+
+
+def test_checkpoint_drops_stages_whose_options_changed(tmp_path):
+    mod = load_module()
+    audio = tmp_path / 'a.wav'
+    audio.write_bytes(b'a')
+    paths = [str(audio)]
+    directory = str(tmp_path / 'checkpoint')
+    base = {'transcribed': {'model': 'base', 'vad': False}}
+
+    run = mod.RunCheckpoint(directory)
+    run.start(paths, options=base)
+    run.save_transcript(0, [])
+    run.save_tracks(0, [])
+    run.flush()
+
+    resumed = mod.RunCheckpoint(directory)
+    resumed.start(paths, resume=True, options=base)
+    assert resumed.transcript(0) == []
+
+    # another model: the transcript is redone, the speaker tracks are kept
+    changed = mod.RunCheckpoint(directory)
+    changed.start(paths, resume=True, options={'transcribed': {'model': 'large', 'vad': False}})
+    assert changed.transcript(0) is None
+    assert changed.tracks(0) == []
+
+
+def test_checkpoint_drops_results_queued_before_clear(tmp_path, monkeypatch):
+    mod = load_module()
+    audio = tmp_path / 'a.wav'
+    audio.write_bytes(b'a')
+    directory = str(tmp_path / 'checkpoint')
+
+    run = mod.RunCheckpoint(directory)
+    run.start([str(audio)])
+    # hold the writer up until the run has been cleared
+    gate = threading.Event()
+    write_atomic = mod.write_atomic
+
+    def slow_write(path, data):
+        gate.wait()
+        write_atomic(path, data)
+
+    monkeypatch.setattr(mod, 'write_atomic', slow_write)
+    run.save_transcript(0, [])
+    run.clear()
+    gate.set()
+    run.flush()
+    assert run.pending_paths() is None
+    assert not os.path.exists(directory)
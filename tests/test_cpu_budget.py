@@ -0,0 +1,75 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('cpu_budget')
+    return importlib.reload(mod)
+
+
+def test_cpu_budget_splits_and_rebalances():
+    mod = load_module()
+    budget = mod.CpuBudget(total=12, weights={'transcribe': 2, 'diarize': 1})
+    transcribe_threads = []
+    diarize_threads = []
+
+    assert budget.threads_for('diarize') == 12
+    with budget.stage('transcribe', apply=transcribe_threads.append) as threads:
+        assert threads == 12
+        with budget.stage('diarize', apply=diarize_threads.append) as threads:
+            assert threads == 4
+            assert transcribe_threads == [12, 8]
+            with budget.stage('transcribe', apply=transcribe_threads.append):
+                # two transcription jobs split the stage's eight cores
+                assert transcribe_threads == [12, 8, 4, 4]
+        # diarization went idle, so the remaining job gets everything
+        assert transcribe_threads[-1] == 12
+    assert diarize_threads == [4]
+    assert budget.utilization()['transcribe']['threads'] == 0
+
+
+def test_cpu_budget_reports_utilization(monkeypatch):
+    mod = load_module()
+    clock = [100.0]
+    monkeypatch.setattr(mod.time, 'monotonic', lambda: clock[0])
+    budget = mod.CpuBudget(total=4, weights={'transcribe': 1, 'diarize': 1})
+
+    with budget.stage('transcribe'):
+        clock[0] += 10
+        with budget.stage('diarize'):
+            clock[0] += 10
+    clock[0] += 20
+
+    usage = budget.utilization()
+    assert usage['transcribe'] == {'busy': 0.5, 'cores': (10 * 4 + 10 * 2) / 40, 'threads': 0}
+    assert usage['diarize'] == {'busy': 0.25, 'cores': 0.5, 'threads': 0}
+
+
+def test_cpu_budget_sizes_a_shared_pool_once_per_stage():
+    mod = load_module()
+    budget = mod.CpuBudget(total=12, weights={'transcribe': 2, 'diarize': 1})
+    pool_threads = []
+
+    with budget.stage('transcribe') as threads:
+        with budget.stage('diarize', apply=pool_threads.append, pooled=True) as first:
+            with budget.stage('diarize', apply=pool_threads.append, pooled=True) as second:
+                # both jobs run on the same pool, which keeps the stage's share
+                assert first == second == 4
+                assert pool_threads == [4]
+        assert threads == 12
+    with budget.stage('diarize', apply=pool_threads.append, pooled=True):
+        pass
+    assert pool_threads == [4, 12]
+
+    # the cores left by rounding down go to the largest remainders
+    for total, weights in ((3, (1, 1)), (4, (2, 1)), (8, (2, 1)), (7, (5, 1)), (2, (100, 1))):
+        budget = mod.CpuBudget(total=total, weights={'transcribe': weights[0], 'diarize': weights[1]})
+        shares = budget._shares([mod._Job('transcribe', None), mod._Job('diarize', None)])
+        assert sum(shares.values()) == total
+        assert min(shares.values()) >= 1
+    budget = mod.CpuBudget(total=8, weights={'transcribe': 2, 'diarize': 1})
+    with budget.stage('transcribe'):
+        assert budget.threads_for('diarize') == 3
@@ -89,3 +89,171 @@ def test_assign_speakers_labels_segments(monkeypatch):
     assert labeled[1]['speaker'] == 'Beta'
     assert labeled[2]['speaker'] == 'Unknown'
     fake_pipeline_instance.assert_called_once_with('audio.wav')
+
+
+def test_diarizers_share_preloaded_pipeline_and_unload_when_idle(monkeypatch):
+    fake_pipeline_instance = MagicMock(return_value=FakeAnnotation())
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_class.from_pretrained.return_value = fake_pipeline_instance
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+
+    first = diarizer.Diarizer(idle_timeout=60)
+    first.preload().join()
+    assert first.pipeline is fake_pipeline_instance
+
+    second = diarizer.Diarizer()
+    segments = [{'start': 0.2, 'end': 0.8, 'speaker': '', 'text': 'Hi'}]
+    second.assign_speakers('a.wav', segments)
+    second.assign_speakers('b.wav', segments)
+    fake_pipeline_class.from_pretrained.assert_called_once()
+
+    second.shared.unload()
+    assert first.pipeline is None
+    second.assign_speakers('c.wav', segments)
+    assert fake_pipeline_class.from_pretrained.call_count == 2
+
+
+def test_shared_pipeline_unloads_after_idle_timeout(monkeypatch):
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_class.from_pretrained.return_value = MagicMock(return_value=FakeAnnotation())
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    worker = diarizer.Diarizer(idle_timeout=0.01)
+    worker.assign_speakers('a.wav', [])
+
+    timer = worker.shared._timer
+    assert timer is not None
+    timer.join(1)
+    assert worker.pipeline is None
+
+
+def test_diarize_returns_tracks_and_label_segments_merges(monkeypatch):
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_class.from_pretrained.return_value = MagicMock(return_value=FakeAnnotation2())
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    tracks = diarizer.Diarizer().diarize('audio.wav')
+    assert tracks == [(0.0, 0.5, 'Alpha'), (1.0, 1.5, 'Beta')]
+
+    segments = [
+        {'start': 1.1, 'end': 1.3, 'speaker': '', 'text': 'b'},
+        {'start': 0.6, 'end': 0.7, 'speaker': '', 'text': 'c'},
+    ]
+    labeled = diarizer.Diarizer.label_segments(segments, tracks)
+    assert [s['speaker'] for s in labeled] == ['Beta', 'Unknown']
+
+
+def test_pack_tracks_round_trip():
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    tracks = [(0.0, 1.25, 'SPEAKER_00'), (1.25, 3.5, 'Ünïcode'), (3.5, 4.0, 'SPEAKER_00')]
+
+    data = diarizer.pack_tracks(tracks)
+    assert diarizer.unpack_tracks(data) == tracks
+    assert diarizer.unpack_tracks(diarizer.pack_tracks([])) == []
+
+
+def test_diarize_reuses_cached_tracks(monkeypatch, tmp_path):
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_instance = MagicMock(return_value=FakeAnnotation2())
+    fake_pipeline_class.from_pretrained.return_value = fake_pipeline_instance
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    cache = importlib.import_module('disk_cache').DiskCache(str(tmp_path / 'cache'))
+    audio = tmp_path / 'ep.wav'
+    audio.write_bytes(b'audio')
+
+    first = diarizer.Diarizer(cache=cache).diarize(str(audio))
+    diarizer.get_shared_pipeline().unload()
+
+    segments = [{'start': 1.1, 'end': 1.2, 'speaker': '', 'text': 'x'}]
+    labeled = diarizer.Diarizer(cache=cache).assign_speakers(str(audio), segments)
+
+    assert labeled[0]['speaker'] == 'Beta'
+    assert diarizer.Diarizer(cache=cache).diarize(str(audio)) == first
+    fake_pipeline_class.from_pretrained.assert_called_once()
+    fake_pipeline_instance.assert_called_once()
+
+    # a damaged entry is diarized again and replaced
+    [entry] = [os.path.join(root, name) for root, _, names in os.walk(tmp_path / 'cache') for name in names]
+    data = open(entry, 'rb').read()
+    for damaged in (data[:-3], data[:5], data[:-2] + b'\xff\xff'):
+        with open(entry, 'wb') as fh:
+            fh.write(damaged)
+        assert diarizer.Diarizer(cache=cache).diarize(str(audio)) == first
+        assert open(entry, 'rb').read() == data
+    assert fake_pipeline_instance.call_count == 4
+
+
+def test_label_segments_overlap_mode():
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    tracks = [(0.0, 5.0, 'A'), (3.0, 10.0, 'B'), (2.0, 2.5, 'C')]
+    segments = [
+        {'start': 1.0, 'end': 8.0, 'speaker': '', 'text': 'x'},  # midpoint 4.5 hits A first
+        {'start': 11.0, 'end': 12.0, 'speaker': '', 'text': 'y'},
+    ]
+
+    by_mid = diarizer.Diarizer.label_segments([dict(s) for s in segments], tracks)
+    assert [s['speaker'] for s in by_mid] == ['A', 'Unknown']
+
+    by_overlap = diarizer.Diarizer.label_segments([dict(s) for s in segments], tracks, 'overlap')
+    assert [s['speaker'] for s in by_overlap] == ['B', 'Unknown']
+
+
+def test_diarize_feeds_shared_pcm_waveform(monkeypatch):
+    fake_pipeline = MagicMock(return_value=FakeAnnotation2())
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_class.from_pretrained.return_value = fake_pipeline
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+
+    waveform = {'waveform': object(), 'sample_rate': 16000}
+    pcm_cache = MagicMock()
+    pcm_cache.get.return_value.waveform.return_value = waveform
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    tracks = diarizer.Diarizer(pcm_cache=pcm_cache).diarize('audio.mp3')
+
+    assert tracks == [(0.0, 0.5, 'Alpha'), (1.0, 1.5, 'Beta')]
+    pcm_cache.get.assert_called_once_with('audio.mp3')
+    fake_pipeline.assert_called_once_with(waveform)
+    # the mapping is released once the pipeline is done with it
+    pcm_cache.get.return_value.__exit__.assert_called_once()
+
+
+def test_diarize_sizes_torch_threads_from_cpu_budget(monkeypatch):
+    fake_pipeline_class = MagicMock()
+    fake_pipeline_class.from_pretrained.return_value = MagicMock(return_value=FakeAnnotation2())
+    fake_pyannote = types.ModuleType('pyannote.audio')
+    fake_pyannote.Pipeline = fake_pipeline_class
+    monkeypatch.setitem(sys.modules, 'pyannote.audio', fake_pyannote)
+    fake_torch = types.ModuleType('torch')
+    fake_torch.set_num_threads = MagicMock()
+    monkeypatch.setitem(sys.modules, 'torch', fake_torch)
+
+    diarizer = importlib.import_module('diarizer')
+    diarizer = importlib.reload(diarizer)
+    budget = importlib.import_module('cpu_budget').CpuBudget(total=8)
+    diarizer.Diarizer(cpu_budget=budget).diarize('audio.wav')
+
+    fake_torch.set_num_threads.assert_called_once_with(8)
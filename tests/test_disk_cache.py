@@ -0,0 +1,76 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('disk_cache')
+    return importlib.reload(mod)
+
+
+def test_disk_cache_round_trip(tmp_path):
+    mod = load_module()
+    cache = mod.DiskCache(str(tmp_path / 'cache'))
+    key = cache.make_key('abc', 'large', {'beam': 5})
+
+    assert cache.get(key) is None
+    cache.put(key, b'payload')
+    assert cache.get(key) == b'payload'
+    assert cache.make_key('abc', 'large', {'beam': 5}) == key
+    assert cache.make_key('abc', 'base', {'beam': 5}) != key
+    cache.discard(key)
+    assert cache.get(key) is None
+    cache.discard(key)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    mod = load_module()
+    cache = mod.DiskCache(str(tmp_path / 'cache'), max_bytes=25)
+    keys = [cache.make_key(i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, b'x' * 10)
+        path = cache.path(key)
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+
+    cache.get(keys[0])  # touch the oldest entry so it becomes the newest
+    cache.put(keys[2], b'y' * 10)
+
+    assert cache.get(keys[0]) == b'x' * 10
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == b'y' * 10
+
+
+def test_disk_cache_eviction_skips_entries_it_cannot_remove(tmp_path, monkeypatch):
+    mod = load_module()
+    cache = mod.DiskCache(str(tmp_path / 'cache'), max_bytes=25)
+    keys = [cache.make_key(i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, b'x' * 10)
+        os.utime(cache.path(key), ns=(i * 10**9, i * 10**9))
+    locked = cache.path(keys[0])
+    real_remove = os.remove
+
+    def remove(path):
+        # a mapped file cannot be deleted on Windows
+        if path == locked:
+            raise PermissionError(path)
+        real_remove(path)
+
+    monkeypatch.setattr(mod.os, 'remove', remove)
+    cache.put(keys[2], b'y' * 10)
+
+    assert cache.get(keys[0]) == b'x' * 10
+    assert cache.get(keys[1]) is None
+
+
+def test_file_digest_tracks_content(tmp_path):
+    mod = load_module()
+    path = tmp_path / 'a.wav'
+    path.write_bytes(b'one')
+    first = mod.file_digest(str(path))
+    assert mod.file_digest(str(path)) == first
+
+    path.write_bytes(b'two!')
+    assert mod.file_digest(str(path)) != first
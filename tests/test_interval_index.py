@@ -0,0 +1,45 @@
+import os
+import sys
+import random
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('interval_index')
+    return importlib.reload(mod)
+
+
+def test_interval_index_matches_linear_scan():
+    mod = load_module()
+    rng = random.Random(7)
+    intervals = []
+    for i in range(300):
+        start = rng.uniform(0, 100)
+        intervals.append((start, start + rng.uniform(0, 5), i))
+    index = mod.IntervalIndex(intervals)
+    by_start = sorted(intervals, key=lambda iv: iv[0])
+
+    for _ in range(200):
+        point = rng.uniform(-1, 106)
+        expected = [p for s, e, p in by_start if s <= point < e]
+        assert index.at(point) == expected
+
+        lo = rng.uniform(-1, 106)
+        hi = lo + rng.uniform(0, 10)
+        expected = [p for s, e, p in by_start if s < hi and e > lo]
+        assert index.overlapping(lo, hi) == expected
+
+
+def test_interval_index_half_open_and_empty():
+    mod = load_module()
+    index = mod.IntervalIndex([(0.0, 1.0, 'a'), (1.0, 2.0, 'b')])
+    assert index.at(1.0) == ['b']
+    assert index.overlapping(1.0, 1.5) == ['b']
+    assert index.at(2.0) == []
+    assert len(index) == 2
+
+    empty = mod.IntervalIndex([])
+    assert empty.at(0.0) == []
+    assert empty.overlapping(0.0, 10.0) == []
@@ -0,0 +1,95 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from test_main_window import make_pyside6_stub
+
+
+class DeferredPool:
+    """QThreadPool stand-in that runs runnables only when told to."""
+
+    def __init__(self, *a, **kw):
+        self.started = []
+
+    def setMaxThreadCount(self, n):
+        self.max_threads = n
+
+    def start(self, runnable, priority=0):
+        self.started.append(runnable)
+
+    def run_next(self):
+        self.started.pop(0).run()
+
+
+def load_module(monkeypatch):
+    stubs = make_pyside6_stub()
+    stubs['PySide6.QtCore'].QThreadPool = DeferredPool
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    # import afresh against the stub and restore the previous module afterwards
+    monkeypatch.setitem(sys.modules, 'job_pool', None)
+    del sys.modules['job_pool']
+    return importlib.import_module('job_pool')
+
+
+def make_job(mod, name, log, steps=1, fail=False):
+    class StepJob(mod.Job):
+        def run(self):
+            for _ in range(steps):
+                self.check_cancelled()
+                log.append(name)
+            if fail:
+                raise RuntimeError('boom')
+
+    return StepJob(name)
+
+
+def test_jobs_run_by_priority_within_worker_limit(monkeypatch):
+    mod = load_module(monkeypatch)
+    pool = mod.JobPool(max_workers=1)
+    log = []
+
+    pool.submit(make_job(mod, 'a', log))
+    pool.submit(make_job(mod, 'low', log), priority=mod.JobPool.LOW)
+    pool.submit(make_job(mod, 'normal', log))
+    pool.submit(make_job(mod, 'high', log), priority=mod.JobPool.HIGH)
+
+    assert pool.running_count() == 1
+    assert pool.pending_count() == 3
+    while pool._pool.started:
+        pool._pool.run_next()
+
+    assert log == ['a', 'high', 'normal', 'low']
+    assert pool.jobs() == {}
+
+
+def test_cancel_drops_queued_and_stops_running_jobs(monkeypatch):
+    mod = load_module(monkeypatch)
+    pool = mod.JobPool(max_workers=1)
+    log = []
+    failures = []
+    ended = []
+
+    running = make_job(mod, 'running', log, steps=3)
+    running.failed.connect(failures.append)
+    running.ended.connect(ended.append)
+    running_id = pool.submit(running)
+    queued_id = pool.submit(make_job(mod, 'queued', log))
+    failing = make_job(mod, 'failing', log, fail=True)
+    failing.failed.connect(failures.append)
+    failing.ended.connect(ended.append)
+    failing_id = pool.submit(failing)
+
+    assert pool.cancel(queued_id) is True
+    assert pool.cancel(running_id) is True
+    assert pool.cancel(999) is False
+    while pool._pool.started:
+        pool._pool.run_next()
+
+    # a cancelled job ends quietly, a failing one reports its error
+    assert log == ['failing']
+    assert failures == ['boom']
+    # every job that ran ends with ``ended``, however it stopped
+    assert ended == [running_id, failing_id]
+    assert pool.jobs() == {}
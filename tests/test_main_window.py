@@ -41,6 +41,69 @@ def make_pyside6_stub():
             if hasattr(self, "run"):
                 self.run()
 
+    class QRunnable(StubObject):
+        pass
+
+    class QThreadPool(StubObject):
+        """Runs each runnable synchronously as soon as it is started."""
+
+        def start(self, runnable, priority=0):
+            runnable.run()
+
+        def waitForDone(self, msecs=-1):
+            return True
+
+    class TextBlock:
+        """Line ``number`` of a stub text edit, positioned like a QTextBlock."""
+
+        def __init__(self, edit, number):
+            self.edit = edit
+            self.number = number
+
+        def _lines(self):
+            return self.edit._text.split("\n")
+
+        def isValid(self):
+            return self.number < len(self._lines())
+
+        def position(self):
+            return sum(len(line) + 1 for line in self._lines()[:self.number])
+
+        def length(self):
+            return len(self._lines()[self.number]) + 1
+
+        def next(self):
+            return TextBlock(self.edit, self.number + 1)
+
+    class TextDocument:
+        def __init__(self, edit):
+            self.edit = edit
+
+        def findBlockByNumber(self, number):
+            return TextBlock(self.edit, number)
+
+    class QTextCursor:
+        MoveAnchor = 0
+        KeepAnchor = 1
+
+        def __init__(self, block):
+            self.edit = block.edit
+            self.anchor = self.pos = block.position()
+
+        def setPosition(self, pos, mode=0):
+            self.pos = pos
+            if mode == self.MoveAnchor:
+                self.anchor = pos
+
+        def removeSelectedText(self):
+            lo, hi = sorted((self.anchor, self.pos))
+            self.edit._text = self.edit._text[:lo] + self.edit._text[hi:]
+            self.anchor = self.pos = lo
+
+        def insertText(self, text):
+            self.edit._text = self.edit._text[:self.pos] + text + self.edit._text[self.pos:]
+            self.anchor = self.pos = self.pos + len(text)
+
     class QPlainTextEdit(StubObject):
         def __init__(self, *a, **kw):
             super().__init__(*a, **kw)
@@ -55,6 +118,12 @@ def make_pyside6_stub():
         def toPlainText(self):
             return self._text
 
+        def clear(self):
+            self._text = ""
+
+        def document(self):
+            return TextDocument(self)
+
         def textCursor(self):
             parent = self
 
@@ -147,6 +216,9 @@ def make_pyside6_stub():
         def setDragDropMode(self, mode):
             self.dragDropMode = mode
 
+        def clear(self):
+            self.items = []
+
     qtwidgets = types.ModuleType('PySide6.QtWidgets')
     for cls in [
         'QWidget',
@@ -168,15 +240,25 @@ def make_pyside6_stub():
 
     qtcore = types.ModuleType('PySide6.QtCore')
     qtcore.QThread = QThread
+    qtcore.QRunnable = QRunnable
+    qtcore.QThreadPool = QThreadPool
     qtcore.QObject = StubObject
     qtcore.Signal = Signal
     qtcore.Qt = types.SimpleNamespace(UserRole=0)
 
     qtwidgets.QAbstractItemView = types.SimpleNamespace(InternalMove=1)
+    qtgui = types.ModuleType('PySide6.QtGui')
+    qtgui.QTextCursor = QTextCursor
     pyside6 = types.ModuleType('PySide6')
     pyside6.QtWidgets = qtwidgets
     pyside6.QtCore = qtcore
-    return {'PySide6': pyside6, 'PySide6.QtWidgets': qtwidgets, 'PySide6.QtCore': qtcore}
+    pyside6.QtGui = qtgui
+    return {
+        'PySide6': pyside6,
+        'PySide6.QtWidgets': qtwidgets,
+        'PySide6.QtCore': qtcore,
+        'PySide6.QtGui': qtgui,
+    }
 
 
 def test_main_window_instantiates(monkeypatch):
@@ -213,16 +295,28 @@ def test_add_file_triggers_threads(monkeypatch):
         def __init__(self, *a, **k):
             pass
 
-        def transcribe(self, path):
-            return [{"start": 0.0, "end": 1.0, "speaker": "", "text": "hi"}]
+        def transcribe_stream(self, path, on_progress=None):
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": "hi"}
+            on_progress(0.5)
+            yield {"start": 1.0, "end": 2.0, "speaker": "", "text": "there"}
+            on_progress(1.0)
+
+    preloaded = []
 
     class FakeDiarizer:
         def __init__(self, *a, **k):
-            pass
+            self.idle_timeout = k.get("idle_timeout")
+
+        def preload(self):
+            preloaded.append(self.idle_timeout)
+
+        def diarize(self, audio_path):
+            return [(0.0, 10.0, "Spk1")]
 
-        def assign_speakers(self, audio_path, segments):
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
             for s in segments:
-                s["speaker"] = "Spk1"
+                s["speaker"] = tracks[0][2]
             return segments
 
     tw = types.ModuleType("transcribe_worker")
@@ -245,7 +339,11 @@ def test_add_file_triggers_threads(monkeypatch):
     window.add_file("a.wav")
     window.start_processing()
 
-    assert "[Spk1] hi" in window.transcript.toPlainText()
+    assert window.transcript.toPlainText() == "[Spk1] hi\n[Spk1] there"
+    assert [s["speaker"] for s in window.aggregator.get_transcript()] == ["Spk1", "Spk1"]
+    assert preloaded == [600.0]
+    # finished jobs do not linger in the pool
+    assert window.jobs.jobs() == {}
 
 
 def test_processing_respects_order(monkeypatch):
@@ -257,20 +355,34 @@ def test_processing_respects_order(monkeypatch):
         def __init__(self, *a, **k):
             pass
 
-        def transcribe(self, path):
-            return [{"start": 0.0, "end": 1.0, "speaker": "", "text": path}]
+        def transcribe_stream(self, path, on_progress=None):
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": path}
 
     class FakeDiarizer:
         def __init__(self, *a, **k):
             pass
 
-        def assign_speakers(self, audio_path, segments):
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return []
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
             return segments
 
     order = []
+    drafts = []
     class FakeAggregator:
+        def add_listener(self, listener):
+            pass
         def add_segments(self, path, segs):
+            drafts.append(path)
+            return []
+        def replace_segments(self, path, segs):
             order.append(path)
+            return [], []
         def get_transcript(self):
             return []
 
@@ -297,6 +409,457 @@ def test_processing_respects_order(monkeypatch):
     window.start_processing()
 
     assert order == ['b.wav', 'a.wav']
+    assert sorted(drafts) == ['a.wav', 'b.wav']
+
+
+def test_shortest_first_schedule_keeps_list_order_in_transcript(monkeypatch):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    started = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, *a, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            started.append(path)
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": path}
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return []
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return segments
+
+    order = []
+
+    class FakeAggregator:
+        def add_listener(self, listener):
+            pass
+        def add_segments(self, path, segs):
+            return []
+        def replace_segments(self, path, segs):
+            order.append(path)
+            return [], []
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    ta = types.ModuleType('transcript_aggregator'); ta.TranscriptAggregator = lambda: FakeAggregator()
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', processing={'schedule': 'shortest_first'})
+    ce = types.ModuleType('clip_exporter'); ce.ClipExporter = lambda: types.SimpleNamespace()
+    monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
+    monkeypatch.setitem(sys.modules, 'diarizer', dr)
+    monkeypatch.setitem(sys.modules, 'transcript_aggregator', ta)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+    monkeypatch.setitem(sys.modules, 'clip_exporter', ce)
+
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    lengths = {'long.wav': 14400.0, 'short.wav': 30.0, 'unknown.wav': None}
+
+    schedulers = []
+
+    def fake_duration(path, cache=None):
+        schedulers.append(window.scheduler)
+        if lengths[path] is None:
+            raise RuntimeError('ffprobe failed')
+        return lengths[path]
+
+    monkeypatch.setattr(m, 'cached_duration', fake_duration)
+    window = m.MainWindow()
+    for path in lengths:
+        window.add_file(path)
+    window.start_processing()
+
+    # the probe job runs first and the scheduler starts on its result
+    assert schedulers == [None, None, None]
+    assert started == ['short.wav', 'long.wav', 'unknown.wav']
+    assert order == ['long.wav', 'short.wav', 'unknown.wav']
+
+
+def test_failing_stage_and_refinement_jobs_do_not_stall_the_run(monkeypatch):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    refined = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, model, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": path}
+
+        def transcribe_windows(self, path, on_progress=None):
+            if path == 'a.wav':
+                raise RuntimeError('out of memory')
+            refined.append(path)
+            yield 0.0, float("inf"), [{"start": 0.0, "end": 1.0, "speaker": "S1", "text": path.upper()}]
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            if audio_path == 'bad.wav':
+                raise RuntimeError('corrupt file')
+            return [(0.0, 10.0, "S1")]
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return [dict(s, speaker=tracks[0][2]) for s in segments]
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', processing={'two_pass': True})
+    monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
+    monkeypatch.setitem(sys.modules, 'diarizer', dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    window = m.MainWindow()
+    for path in ['a.wav', 'bad.wav', 'c.wav']:
+        window.add_file(path)
+    window.start_processing()
+
+    assert not window.processing
+    # the failed file is dropped, drafts and all; the others are refined
+    assert window.transcript.toPlainText() == "[S1] a.wav\n[S1] C.WAV"
+    assert refined == ['c.wav']
+    assert window.refiner is None
+    assert window.jobs.jobs() == {}
+
+
+def test_memory_admission_uses_durations_probed_by_a_job(monkeypatch):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    class FakeTranscribeWorker:
+        def __init__(self, *a, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": path}
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return []
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return segments
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', processing={'memory_ceiling_mb': 64 * 1024})
+    monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
+    monkeypatch.setitem(sys.modules, 'diarizer', dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    probed = []
+    estimated = []
+
+    def fake_duration(path, cache=None):
+        probed.append(path)
+        return {'a.wav': 120.0, 'b.wav': 60.0}[path]
+
+    def fake_estimate(model, duration, model_loaded=False):
+        estimated.append(duration)
+        return 0
+
+    monkeypatch.setattr(m, 'cached_duration', fake_duration)
+    monkeypatch.setattr(m, 'estimate_job_memory', fake_estimate)
+    window = m.MainWindow()
+    window.add_file('a.wav')
+    window.add_file('b.wav')
+    window.start_processing()
+
+    # probed once each by the job, never by admission on the GUI thread
+    assert probed == ['a.wav', 'b.wav']
+    assert estimated == [120.0, 60.0]
+    assert not window.processing
+
+
+def test_resume_skips_checkpointed_stages(monkeypatch, tmp_path):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    transcribed = []
+    diarized = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, *a, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            transcribed.append(os.path.basename(path))
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": "new"}
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            diarized.append(os.path.basename(audio_path))
+            return [(0.0, 10.0, "New")]
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return [dict(s, speaker=tracks[0][2]) for s in segments]
+
+    class FakeMessageBox:
+        Yes = 1
+        asked = []
+
+        @staticmethod
+        def question(*a, **k):
+            FakeMessageBox.asked.append(a[2])
+            return FakeMessageBox.Yes
+
+    stubs['PySide6.QtWidgets'].QMessageBox = FakeMessageBox
+    timers = []
+    stubs['PySide6.QtCore'].QTimer = types.SimpleNamespace(singleShot=lambda ms, fn: timers.append(fn))
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', checkpoint_dir=checkpoint_dir)
+    monkeypatch.setitem(sys.modules, "transcribe_worker", tw)
+    monkeypatch.setitem(sys.modules, "diarizer", dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    paths = []
+    for name in ['a.wav', 'b.wav']:
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+    # the previous session transcribed a.wav and diarized b.wav, then died
+    cp = importlib.reload(importlib.import_module('checkpoint'))
+    run = cp.RunCheckpoint(checkpoint_dir)
+    options = {'transcribed': {'model': 'base', 'vad': False, 'chunked': False, 'stream_seconds': 60.0}}
+    run.start(paths, options=options)
+    run.save_transcript(0, [{"start": 0.0, "end": 1.0, "speaker": "", "text": "old"}])
+    run.save_tracks(1, [(0.0, 10.0, "Old")])
+    run.flush()
+
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    window = m.MainWindow()
+    # a file added before the question is asked is not part of the run
+    window.add_file(str(tmp_path / 'other.wav'))
+    timers.pop()()
+
+    assert len(FakeMessageBox.asked) == 1
+    assert [window.file_list.item(i).text() for i in range(window.file_list.count())] == paths
+    assert transcribed == ['b.wav']
+    assert diarized == ['a.wav']
+    assert window.transcript.toPlainText() == "[New] old\n[Old] new"
+    # the finished run leaves nothing to resume
+    assert cp.RunCheckpoint(checkpoint_dir).pending_paths() is None
+
+
+def test_project_saves_files_and_reloads_in_pages(monkeypatch, tmp_path):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    stubs['PySide6.QtCore'].QTimer = types.SimpleNamespace(singleShot=lambda ms, fn: fn())
+    stubs['PySide6.QtWidgets'].QInputDialog = types.SimpleNamespace(getText=lambda *a, **k: ("Host", True))
+
+    transcribed = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, *a, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            transcribed.append(os.path.basename(path))
+            for i in range(3):
+                yield {"start": float(i), "end": i + 1.0, "speaker": "", "text": f"{os.path.basename(path)} {i}"}
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return [(0.0, 10.0, "S1")]
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return [dict(s, speaker=tracks[0][2]) for s in segments]
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(keyword_path='kw.json')
+    monkeypatch.setitem(sys.modules, "transcribe_worker", tw)
+    monkeypatch.setitem(sys.modules, "diarizer", dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    project_path = str(tmp_path / 'show.pdproj')
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    window = m.MainWindow()
+    window.open_project(project_path)
+    window.add_file('a.wav')
+    window.add_file('b.wav')
+    window.start_processing()
+    window._on_rename_speakers()
+    expected = window.transcript.toPlainText()
+    assert '[Host] a.wav 0' in expected
+
+    # files are recorded as soon as they are added
+    window.add_file('c.wav')
+    assert window.project.files()[-1] == ('c.wav', 'queued')
+    # a project is not switched under a running batch
+    notices = []
+    stubs['PySide6.QtWidgets'].QMessageBox = types.SimpleNamespace(information=lambda *a: notices.append(a))
+    window.processing = True
+    window.open_project(str(tmp_path / 'other.pdproj'))
+    assert window.project.path == project_path and len(notices) == 1
+    window.processing = False
+    window.project.close()
+
+    timers = []
+    stubs['PySide6.QtCore'].QTimer = types.SimpleNamespace(singleShot=lambda ms, fn: timers.append(fn))
+    reopened = m.MainWindow()
+    inserted_at = []
+    insert_row = reopened._insert_transcript_row
+
+    def record_insert(row, text):
+        if reopened._project_pages is not None:
+            inserted_at.append((row, len(reopened._display_rows)))
+        insert_row(row, text)
+
+    reopened._insert_transcript_row = record_insert
+    reopened.open_project(project_path)
+    assert [reopened.file_list.item(i).text() for i in range(3)] == ['a.wav', 'b.wav', 'c.wav']
+    # a start requested while the transcripts load waits for them
+    reopened.start_processing()
+    assert not reopened.processing
+    while timers:
+        timers.pop(0)()
+    lines = reopened.transcript.toPlainText().split("\n")
+    assert [line for line in lines if 'c.wav' not in line] == expected.split("\n")
+    # the files were merged while loading, so every line went to the end
+    assert len(inserted_at) == 6 and all(row == end for row, end in inserted_at)
+    # files the project already holds are not transcribed again
+    assert transcribed == ['a.wav', 'b.wav', 'c.wav']
+    assert reopened.project.file_state('c.wav') == 'aggregated'
+
+
+def test_resume_with_project_reuses_checkpoint(monkeypatch, tmp_path):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    stubs['PySide6.QtCore'].QTimer = types.SimpleNamespace(singleShot=lambda ms, fn: fn())
+    stubs['PySide6.QtWidgets'].QMessageBox = types.SimpleNamespace(Yes=1, question=lambda *a, **k: 1)
+
+    transcribed = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, *a, **k):
+            pass
+
+        def transcribe_stream(self, path, on_progress=None):
+            transcribed.append(os.path.basename(path))
+            yield {"start": 0.0, "end": 1.0, "speaker": "", "text": os.path.basename(path)}
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return [(0.0, 10.0, "S1")]
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return [dict(s, speaker=tracks[0][2]) for s in segments]
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    project_path = str(tmp_path / 'show.pdproj')
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    st = types.ModuleType('settings'); st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', checkpoint_dir=checkpoint_dir, ui={'project': project_path})
+    monkeypatch.setitem(sys.modules, "transcribe_worker", tw)
+    monkeypatch.setitem(sys.modules, "diarizer", dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    paths = []
+    for name in ['a.wav', 'b.wav', 'c.wav']:
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    window = m.MainWindow()
+    window.open_project(project_path)
+    window.add_file(paths[0])
+    window.start_processing()
+    # a run over all three skipped a.wav, transcribed b.wav and then died
+    window.add_file(paths[1])
+    window.add_file(paths[2])
+    window.checkpoint.start(paths, options=window._checkpoint_options())
+    window.checkpoint.mark_aggregated(0)
+    window.checkpoint.save_transcript(1, [{"start": 0.0, "end": 1.0, "speaker": "", "text": "old"}])
+    window.checkpoint.flush()
+    window.project.close()
+    transcribed.clear()
+
+    timers = []
+    stubs['PySide6.QtCore'].QTimer = types.SimpleNamespace(singleShot=lambda ms, fn: timers.append(fn))
+    reopened = m.MainWindow()
+    while timers:
+        timers.pop(0)()
+
+    # the checkpoint matched the resumed list, so only c.wav is transcribed
+    assert transcribed == ['c.wav']
+    assert reopened.transcript.toPlainText() == "[S1] a.wav\n[S1] old\n[S1] c.wav"
+    assert [reopened.project.file_state(path) for path in paths] == ['aggregated'] * 3
+    assert reopened.checkpoint.pending_paths() is None
+    # without a refinement pass no speaker tracks are kept
+    assert reopened._tracks == {}
 
 
 def test_search_displays_results(monkeypatch):
@@ -479,7 +1042,7 @@ def test_export_segment_invokes_clip(monkeypatch):
     assert clip_calls['args'] == ('a.wav', 0.0, 1.0, 'seg.wav')
 
 
-def test_rename_speakers_updates_export(monkeypatch):
+def test_rename_speakers_updates_export(monkeypatch, tmp_path):
     stubs = make_pyside6_stub()
     for name, module in stubs.items():
         monkeypatch.setitem(sys.modules, name, module)
@@ -517,7 +1080,7 @@ def test_rename_speakers_updates_export(monkeypatch):
     monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
     monkeypatch.setitem(sys.modules, 'diarizer', dr)
 
-    monkeypatch.setattr(stubs['PySide6.QtWidgets'].QFileDialog, 'getSaveFileName', staticmethod(lambda *a, **k: ('out.json', '')))
+    monkeypatch.setattr(stubs['PySide6.QtWidgets'].QFileDialog, 'getSaveFileName', staticmethod(lambda *a, **k: (str(tmp_path / 'out.json'), '')))
 
     m = importlib.import_module('main_window'); m = importlib.reload(m)
     window = m.MainWindow()
@@ -568,3 +1131,79 @@ def test_settings_dialog_persists(monkeypatch, tmp_path):
     loaded = st_mod.Settings(str(path))
     assert loaded.keyword_path == str(tmp_path / 'kw.json')
     assert loaded.ui['theme'] == 'dark'
+
+
+def test_two_pass_refines_draft_segments_in_place(monkeypatch):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    def seg(start, end, text):
+        return {"start": start, "end": end, "speaker": "Speaker 1", "text": text}
+
+    models = []
+
+    class FakeTranscribeWorker:
+        def __init__(self, model, **k):
+            self.model = model
+            models.append(model)
+
+        def transcribe_stream(self, path, on_progress=None):
+            yield from [seg(0.0, 2.0, "helo"), seg(2.0, 4.0, "wrld"), seg(6.0, 8.0, "bye")]
+
+        def transcribe_windows(self, path, on_progress=None):
+            yield 0.0, 5.0, [seg(0.0, 4.0, "hello world")]
+            yield 5.0, float("inf"), [seg(6.0, 8.0, "goodbye")]
+
+    class FakeDiarizer:
+        def __init__(self, *a, **k):
+            pass
+
+        def preload(self):
+            pass
+
+        def diarize(self, audio_path):
+            return [(0.0, 10.0, "Host")]
+
+        @staticmethod
+        def label_segments(segments, tracks, mode="midpoint"):
+            return [dict(s, speaker=tracks[0][2]) for s in segments]
+
+    tw = types.ModuleType("transcribe_worker"); tw.TranscribeWorker = FakeTranscribeWorker
+    dr = types.ModuleType("diarizer"); dr.Diarizer = FakeDiarizer
+    kw = types.ModuleType('keyword_index'); kw.KeywordIndex = lambda path: types.SimpleNamespace(search=lambda s,q: [], find_all_editorial=lambda s: [])
+    st = types.ModuleType('settings')
+    st.Settings = lambda *a, **k: types.SimpleNamespace(
+        keyword_path='kw.json', processing={'two_pass': True, 'refine_model': 'large'}
+    )
+    monkeypatch.setitem(sys.modules, 'transcribe_worker', tw)
+    monkeypatch.setitem(sys.modules, 'diarizer', dr)
+    monkeypatch.setitem(sys.modules, 'keyword_index', kw)
+    monkeypatch.setitem(sys.modules, 'settings', st)
+
+    m = importlib.import_module('main_window'); m = importlib.reload(m)
+    window = m.MainWindow()
+
+    def no_full_refresh():
+        raise AssertionError("transcript pane rebuilt")
+
+    window._refresh_transcript_display = no_full_refresh
+    window.add_file('a.wav')
+    window.start_processing()
+
+    assert models == ['base', 'large']
+    assert window.transcript.toPlainText() == "[Host] hello world\n[Host] goodbye"
+    assert [s['text'] for s in window.aggregator.get_transcript()] == ['hello world', 'goodbye']
+    assert window.refiner is None
+    # superseded drafts were compacted away and the pane's ids renumbered
+    assert len(window.aggregator._store.starts) < 6
+    assert window._display_rows == [(s['start'], s.id) for s in window.aggregator.get_transcript()]
+    # the speaker tracks are dropped once the file is refined
+    assert window._tracks == {}
+
+    # a window refined after a rename keeps the new name
+    window._tracks['a.wav'] = [(0.0, 10.0, 'Host')]
+    window.aggregator.rename_speakers({'Host': 'Alice'})
+    window._on_refined('a.wav', 5.0, float('inf'), [seg(6.0, 8.0, "good bye")])
+    assert window.transcript.toPlainText() == "[Alice] hello world\n[Alice] good bye"
+    assert window.aggregator.speakers() == ['Alice']
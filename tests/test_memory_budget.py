@@ -0,0 +1,49 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+MB = 1024 * 1024
+
+
+def load_module():
+    mod = importlib.import_module('memory_budget')
+    return importlib.reload(mod)
+
+
+def test_estimate_job_memory_scales_with_model_and_duration():
+    mod = load_module()
+    short = mod.estimate_job_memory('base', 600)
+    long = mod.estimate_job_memory('base', 7200)
+    large = mod.estimate_job_memory('large', 600)
+
+    assert long - short == 6600 * (mod.PCM_BYTES_PER_SECOND + mod.DIARIZATION_BYTES_PER_SECOND)
+    assert large > short
+    assert mod.estimate_job_memory('large', 600, model_loaded=False) - large == 2900 * MB
+    assert mod.estimate_job_memory('base', None) == mod.estimate_job_memory('base', mod.DEFAULT_DURATION)
+    assert mod.estimate_job_memory('base', 600, diarize=False) < short
+
+
+def test_memory_admission_respects_ceiling():
+    mod = load_module()
+    rss = [1000 * MB]
+    admission = mod.MemoryAdmission(ceiling=4000 * MB, rss=lambda: rss[0])
+
+    # the first job is always admitted
+    assert admission.try_admit('a', 5000 * MB)
+    admission.release('a')
+
+    assert admission.try_admit('a', 1500 * MB)
+    # nothing allocated yet, but the reservation still counts
+    assert admission.in_use() == 2500 * MB
+    assert admission.try_admit('b', 1500 * MB)
+    assert not admission.try_admit('c', 1500 * MB)
+
+    # measured usage above the reservations counts too
+    admission.release('b')
+    rss[0] = 3500 * MB
+    assert not admission.try_admit('c', 1000 * MB)
+    rss[0] = 2000 * MB
+    assert admission.try_admit('c', 1000 * MB)
+    assert admission.stats()['waits'] == 2
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('model_registry')
+    return importlib.reload(mod)
+
+
+def test_registry_reuses_loaded_model_and_counts_hits():
+    mod = load_module()
+    registry = mod.ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append('base')
+        return object()
+
+    with registry.lease('base', loader) as first:
+        pass
+    with registry.lease('base', loader) as second:
+        pass
+
+    assert first is second
+    assert loads == ['base']
+    stats = registry.stats()
+    assert stats['loads'] == 1
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['models'] == ['base']
+
+
+def test_registry_keys_include_parameters():
+    mod = load_module()
+    registry = mod.ModelRegistry()
+
+    with registry.lease('base', object, threads=4) as a:
+        pass
+    with registry.lease('base', object, threads=8) as b:
+        pass
+
+    assert a is not b
+    assert registry.stats()['loads'] == 2
+
+
+def test_registry_evicts_least_recently_used_idle_model():
+    mod = load_module()
+    budget = mod.MODEL_SIZES['base'] + mod.MODEL_SIZES['tiny']
+    registry = mod.ModelRegistry(memory_budget=budget)
+
+    with registry.lease('base', object):
+        pass
+    with registry.lease('tiny', object):
+        pass
+    with registry.lease('base', object):
+        pass
+    # loading a third model pushes the least recently used one (tiny) out
+    with registry.lease('small', object):
+        assert 'tiny' not in registry.stats()['models']
+
+    stats = registry.stats()
+    assert stats['evictions'] >= 1
+    assert 'small' in stats['models']
+
+
+def test_registry_does_not_evict_leased_model():
+    mod = load_module()
+    registry = mod.ModelRegistry(memory_budget=1)
+
+    with registry.lease('base', object) as model:
+        assert registry.stats()['models'] == ['base']
+        with registry.lease('tiny', object):
+            assert 'base' in registry.stats()['models']
+        assert model is not None
+    # the most recently used model stays loaded even above the budget
+    assert registry.stats()['models'] == ['tiny']
+
+
+def test_registry_loads_once_for_concurrent_threads():
+    mod = load_module()
+    registry = mod.ModelRegistry()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    seen = []
+
+    def work():
+        with registry.lease('base', slow_loader) as model:
+            seen.append(model)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(seen) == 4 and all(m is seen[0] for m in seen)
+
+
+def test_estimate_model_size_from_name():
+    mod = load_module()
+    assert mod.estimate_model_size('ggml-large-v3.bin') == mod.MODEL_SIZES['large']
+    assert mod.estimate_model_size('base.en') == mod.MODEL_SIZES['base']
@@ -0,0 +1,230 @@
+import os
+import sys
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('pipeline_scheduler')
+    return importlib.reload(mod)
+
+
+class Recorder:
+    """Collects stage starts so tests can complete them in any order."""
+
+    def __init__(self):
+        self.transcribing = []
+        self.diarizing = []
+        self.ready = []
+        self.finished = False
+
+    def start_transcribe(self, index, path):
+        self.transcribing.append(index)
+
+    def start_diarize(self, index, path):
+        self.diarizing.append(index)
+
+    def on_ready(self, index, path, segments):
+        self.ready.append((path, segments))
+
+    def on_finished(self):
+        self.finished = True
+
+
+def merge(segments, tracks):
+    return [f'{s}:{tracks}' for s in segments]
+
+
+def make_scheduler(mod, rec, paths, **kw):
+    return mod.PipelineScheduler(
+        paths,
+        rec.start_transcribe,
+        rec.start_diarize,
+        rec.on_ready,
+        merge=merge,
+        on_finished=rec.on_finished,
+        **kw,
+    )
+
+
+def test_scheduler_runs_both_stages_of_a_file_together():
+    mod = load_module()
+    rec = Recorder()
+    sched = make_scheduler(mod, rec, ['a', 'b', 'c'])
+    sched.start()
+    assert rec.transcribing == [0]
+    assert rec.diarizing == [0]
+
+    sched.transcribed(0, ['a0'])
+    # file 1 is transcribed while file 0 is still diarized
+    assert rec.transcribing == [0, 1]
+    assert rec.diarizing == [0]
+    assert rec.ready == []
+
+    sched.diarized(0, 'A')
+    assert rec.ready == [('a', ['a0:A'])]
+    assert rec.diarizing == [0, 1]
+
+    sched.transcribed(1, ['b0'])
+    sched.transcribed(2, ['c0'])
+    sched.diarized(1, 'B')
+    sched.diarized(2, 'C')
+
+    assert rec.ready == [('a', ['a0:A']), ('b', ['b0:B']), ('c', ['c0:C'])]
+    assert rec.finished is True
+
+
+def test_scheduler_reorders_out_of_order_results():
+    mod = load_module()
+    rec = Recorder()
+    sched = make_scheduler(mod, rec, ['a', 'b'], transcribe_workers=2, diarize_workers=2)
+    sched.start()
+    assert rec.transcribing == [0, 1]
+    assert rec.diarizing == [0, 1]
+
+    sched.transcribed(1, ['x'])
+    sched.diarized(1, 'B')
+    assert rec.ready == []
+    sched.transcribed(0, ['y'])
+    sched.diarized(0, 'A')
+    assert [p for p, _ in rec.ready] == ['a', 'b']
+
+
+def test_scheduler_bounds_files_in_flight():
+    mod = load_module()
+    rec = Recorder()
+    sched = make_scheduler(mod, rec, list('abcdef'), queue_size=1)
+    sched.start()
+    sched.transcribed(0, [])
+    sched.transcribed(1, [])
+    # file 0 is still diarizing, so only one more file may be admitted
+    assert rec.transcribing == [0, 1]
+    sched.diarized(0, None)
+    assert rec.diarizing == [0, 1]
+    assert rec.transcribing == [0, 1, 2]
+
+
+def test_scheduler_handles_synchronous_workers():
+    mod = load_module()
+    ready = []
+    holder = {}
+
+    def start_transcribe(index, path):
+        holder['s'].transcribed(index, [path])
+
+    def start_diarize(index, path):
+        holder['s'].diarized(index, 'labeled')
+
+    holder['s'] = mod.PipelineScheduler(
+        ['x', 'y'], start_transcribe, start_diarize,
+        lambda i, p, s: ready.append(s),
+        merge=merge,
+    )
+    holder['s'].start()
+
+    assert ready == [['x:labeled'], ['y:labeled']]
+    assert holder['s'].done
+
+
+def test_scheduler_holds_files_back_until_admitted():
+    mod = load_module()
+    rec = Recorder()
+    admitted = set()
+    allow = {'room': True}
+
+    def admit(index, path):
+        if admitted and not allow['room']:
+            return False
+        admitted.add(index)
+        return True
+
+    def release(index, path):
+        admitted.discard(index)
+
+    sched = make_scheduler(mod, rec, ['a', 'b'], admit=admit, release=release)
+    allow['room'] = False
+    sched.start()
+    assert rec.transcribing == [0]
+
+    sched.transcribed(0, ['a0'])
+    # file 0 still holds its memory until both stages are done
+    assert rec.transcribing == [0]
+    sched.diarized(0, 'A')
+    assert admitted == {1}
+    assert rec.transcribing == [0, 1]
+    assert rec.ready == [('a', ['a0:A'])]
+
+
+def test_scheduler_admits_in_given_order_and_delivers_in_list_order():
+    mod = load_module()
+    rec = Recorder()
+    # the long file 0 goes last; shorter ones keep running past the queue limit
+    sched = make_scheduler(mod, rec, ['long', 'b', 'c', 'd'], order=[3, 1, 2, 0], queue_size=1)
+    sched.start()
+    assert rec.transcribing == [3]
+
+    for index, path in [(3, 'd'), (1, 'b'), (2, 'c')]:
+        sched.transcribed(index, [path])
+        sched.diarized(index, 'S')
+    assert rec.transcribing == [3, 1, 2, 0]
+    assert rec.ready == []
+
+    sched.transcribed(0, ['long'])
+    sched.diarized(0, 'S')
+    assert [path for path, _ in rec.ready] == ['long', 'b', 'c', 'd']
+    assert rec.finished
+
+
+def test_failed_stage_drops_the_file_without_holding_back_others():
+    mod = load_module()
+    rec = Recorder()
+    released = []
+    failures = []
+    sched = make_scheduler(
+        mod, rec, ['a', 'b', 'c'],
+        admit=lambda index, path: True,
+        release=lambda index, path: released.append(index),
+        on_failed=lambda index, path, error: failures.append((path, error)),
+    )
+    sched.start()
+    sched.failed(0, mod.PipelineScheduler.TRANSCRIBE, 'corrupt')
+    assert failures == [('a', 'corrupt')]
+    assert released == [0]
+
+    # the diarization still running for file 0 is ignored when it ends
+    sched.diarized(0, 'A')
+    for index, path in [(1, 'b'), (2, 'c')]:
+        sched.transcribed(index, [path])
+        sched.diarized(index, 'S')
+    assert rec.ready == [('b', ['b:S']), ('c', ['c:S'])]
+    assert rec.finished
+
+
+def test_stage_callback_that_raises_fails_only_its_file():
+    mod = load_module()
+    ready = []
+    failures = []
+    holder = {}
+
+    def start_transcribe(index, path):
+        if path == 'bad':
+            raise RuntimeError('no such file')
+        holder['s'].transcribed(index, [path])
+
+    def start_diarize(index, path):
+        holder['s'].diarized(index, 'S')
+
+    finished = []
+    holder['s'] = mod.PipelineScheduler(
+        ['bad', 'good'], start_transcribe, start_diarize,
+        lambda i, p, s: ready.append(s),
+        merge=merge,
+        on_finished=lambda: finished.append(True),
+        on_failed=lambda index, path, error: failures.append((path, error)),
+    )
+    holder['s'].start()
+
+    assert failures == [('bad', 'no such file')]
+    assert ready == [['good:S']]
+    assert finished == [True]
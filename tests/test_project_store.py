@@ -0,0 +1,81 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('project_store')
+    return importlib.reload(mod)
+
+
+def test_project_store_round_trips_files_in_pages(tmp_path):
+    mod = load_module()
+    path = str(tmp_path / 'show.pdproj')
+    project = mod.ProjectStore(path)
+    segments = [
+        {'start': float(i), 'end': i + 1.0, 'speaker': f'SPEAKER_0{i % 2}', 'text': f'line {i}'}
+        for i in range(5)
+    ]
+    segments.append({'start': 2.0, 'end': 2.5, 'text': 'no speaker', 'words': ['no', 'speaker']})
+    project.save_file('a.wav', list(reversed(segments)))
+    project.save_file('b.wav', [], state=mod.QUEUED)
+    project.close()
+
+    reopened = mod.ProjectStore(path)
+    assert reopened.files() == [('a.wav', 'aggregated'), ('b.wav', 'queued')]
+    pages = list(reopened.iter_pages('a.wav', page_size=4))
+    assert [len(p) for p in pages] == [4, 2]
+    loaded = [seg for page in pages for seg in page]
+    # ties on start keep the order the segments were saved in
+    assert [s['text'] for s in loaded] == ['line 0', 'line 1', 'no speaker', 'line 2', 'line 3', 'line 4']
+    assert loaded[2] == {'start': 2.0, 'end': 2.5, 'text': 'no speaker', 'words': ['no', 'speaker']}
+
+    # saving a file again replaces its segments in one go
+    reopened.save_file('a.wav', segments[:2], state=mod.REFINED)
+    assert reopened.segment_count('a.wav') == 2
+    assert reopened.file_state('a.wav') == 'refined'
+    assert reopened.file_state('missing.wav') is None
+    reopened.close()
+
+
+def test_project_store_renames_swaps_and_merges_speakers(tmp_path):
+    mod = load_module()
+    project = mod.ProjectStore(str(tmp_path / 'show.pdproj'))
+    project.save_file('a.wav', [
+        {'start': 0.0, 'speaker': 'A', 'text': 'a'},
+        {'start': 1.0, 'speaker': 'B', 'text': 'b'},
+        {'start': 2.0, 'speaker': 'C', 'text': 'c'},
+    ])
+    project.rename_speakers({'A': 'B', 'B': 'A'})
+    project.rename_speakers({'C': 'A'})
+
+    page = next(project.iter_pages('a.wav'))
+    assert [s['speaker'] for s in page] == ['B', 'A', 'A']
+    project.close()
+
+
+def test_project_store_rejects_newer_schema(tmp_path):
+    mod = load_module()
+    path = str(tmp_path / 'future.pdproj')
+    import sqlite3
+    db = sqlite3.connect(path)
+    db.execute(f'PRAGMA user_version={mod.SCHEMA_VERSION + 1}')
+    db.close()
+    with pytest.raises(ValueError):
+        mod.ProjectStore(path)
+
+
+def test_project_store_reads_segments_without_start_at_zero(tmp_path):
+    mod = load_module()
+    project = mod.ProjectStore(str(tmp_path / 'show.pdproj'))
+    project.save_file('a.wav', [{'start': 1.0, 'text': 'one'}, {'text': 'none'}, {'start': 0.0, 'text': 'zero'}])
+
+    pages = list(project.iter_pages('a.wav', page_size=1))
+    assert [page[0]['text'] for page in pages] == ['none', 'zero', 'one']
+    assert pages[0][0] == {'start': 0.0, 'text': 'none'}
+    assert list(project.iter_pages('missing.wav')) == []
+    project.close()
@@ -2,6 +2,8 @@ import os
 import sys
 import types
 import importlib
+
+import pytest
 from test_main_window import make_pyside6_stub
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -71,3 +73,46 @@ def test_run_app_starts_without_progress_dialog(monkeypatch):
 
     assert shown == ['app', 'show', 'exec']
 
+
+def test_run_app_dispatches_batch(monkeypatch):
+    stubs = make_pyside6_stub()
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    mw = types.ModuleType('main_window')
+    mw.MainWindow = lambda: None
+    monkeypatch.setitem(sys.modules, 'main_window', mw)
+
+    calls = []
+    bc = types.ModuleType('batch_cli')
+    bc.main = lambda argv: calls.append(argv) or 0
+    monkeypatch.setitem(sys.modules, 'batch_cli', bc)
+
+    monkeypatch.setattr(sys, 'argv', ['run_app.py', 'batch', 'shows/', '--workers', '2'])
+
+    mod = importlib.import_module('run_app')
+    mod = importlib.reload(mod)
+
+    with pytest.raises(SystemExit) as exc:
+        mod.main()
+    assert exc.value.code == 0
+    assert calls == [['shows/', '--workers', '2']]
+
+
+def test_run_app_batch_does_not_import_the_gui(monkeypatch):
+    for name in ('PySide6', 'PySide6.QtWidgets', 'main_window'):
+        # a None entry makes any import of the module fail
+        monkeypatch.setitem(sys.modules, name, None)
+
+    calls = []
+    bc = types.ModuleType('batch_cli')
+    bc.main = lambda argv: calls.append(argv) or 0
+    monkeypatch.setitem(sys.modules, 'batch_cli', bc)
+    monkeypatch.setattr(sys, 'argv', ['run_app.py', 'batch', 'shows/'])
+
+    mod = importlib.import_module('run_app')
+    mod = importlib.reload(mod)
+
+    with pytest.raises(SystemExit):
+        mod.main()
+    assert calls == [['shows/']]
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('segment_store')
+    return importlib.reload(mod)
+
+
+def test_segment_store_round_trips_segments():
+    mod = load_module()
+    store = mod.SegmentStore()
+    full = {'start': 1.0, 'end': 2.5, 'speaker': 'Host', 'text': 'Grüße', 'words': [1, 2]}
+    row = store.append('a.wav', full)
+    bare = store.append('b.wav', {'text': 'no times'})
+
+    view = store.view(row)
+    assert view == dict(full, file='a.wav')
+    assert json.loads(json.dumps(view.copy()))['text'] == 'Grüße'
+    assert store.view(bare) == {'text': 'no times', 'file': 'b.wav'}
+    assert store.view(bare).get('speaker') is None
+    assert 'start' not in store.view(bare)
+    # names are stored once however many rows use them
+    store.append('a.wav', {'speaker': 'Host', 'text': 'again'})
+    assert store.speaker_names.names == ['Host', '']
+    assert store.file_names.names == ['a.wav', 'b.wav']
+
+
+def test_segment_store_remove_keeps_row_numbers_until_compacted():
+    mod = load_module()
+    store = mod.SegmentStore()
+    rows = [
+        store.append('a.wav', {'start': float(i), 'end': i + 0.5, 'speaker': 'S', 'text': f'line {i}', 'n': i})
+        for i in range(4)
+    ]
+    store.remove(rows[1])
+    store.remove(rows[2])
+
+    assert len(store) == 2
+    assert list(store.rows()) == [0, 3]
+    assert rows[1] not in store
+    assert store.maybe_compact() is None
+    before = store.nbytes()
+    renumbered = store.compact()
+    assert store.nbytes() < before
+    # the live rows keep their order under their new numbers
+    assert (renumbered[rows[0]], renumbered[rows[3]]) == (0, 1)
+    assert store.view(renumbered[rows[3]]) == {'start': 3.0, 'end': 3.5, 'speaker': 'S', 'text': 'line 3', 'n': 3, 'file': 'a.wav'}
+    assert store.speaker_rows('S') == [0, 1]
+    assert store.speaker_totals() == {'S': {'segments': 2, 'seconds': 1.0}}
+    assert store.compact() is None
+    assert store.append('a.wav', {'text': 'new'}) == 2
@@ -42,3 +42,29 @@ def test_settings_keyword_path_property(tmp_path):
 
     new_settings = settings_mod.Settings(str(path))
     assert new_settings.keyword_path == str(tmp_path / 'new_kw.json')
+
+
+def test_settings_processing_defaults_and_overrides(tmp_path):
+    path = tmp_path / 'settings.json'
+    settings_mod = importlib.import_module('settings')
+    settings_mod = importlib.reload(settings_mod)
+    settings = settings_mod.Settings(str(path))
+    assert settings.processing == settings_mod.PROCESSING_DEFAULTS
+    # files stream out in windows unless streaming is turned off
+    assert settings.processing['stream_seconds'] > 0
+
+    settings.processing['diarization_idle_timeout'] = 30
+    settings.save()
+
+    loaded = settings_mod.Settings(str(path))
+    assert loaded.processing['diarization_idle_timeout'] == 30
+
+
+def test_settings_do_not_share_nested_defaults(tmp_path):
+    settings_mod = importlib.import_module('settings')
+    settings_mod = importlib.reload(settings_mod)
+    settings = settings_mod.Settings(str(tmp_path / 'settings.json'))
+    settings.processing['cpu_weights']['diarize'] = 5.0
+
+    assert settings_mod.PROCESSING_DEFAULTS['cpu_weights'] == {'transcribe': 2.0, 'diarize': 1.0}
+    assert settings_mod.Settings(str(tmp_path / 'other.json')).processing['cpu_weights']['diarize'] == 1.0
@@ -4,9 +4,20 @@ import types
 import importlib
 from unittest.mock import MagicMock
 
+import pytest
+
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    registry = importlib.import_module('model_registry').get_registry()
+    registry.clear()
+    yield
+    registry.clear()
+
+
 def test_transcribe_worker_returns_structured_segments(monkeypatch):
     fake_model = MagicMock()
     fake_model.transcribe.return_value = {
@@ -46,3 +57,284 @@ def test_transcribe_worker_custom_model(monkeypatch):
 
     fake_whispercpp.Whisper.assert_called_once_with('tiny.bin')
     fake_model.transcribe.assert_called_once_with('dummy.wav')
+
+
+def test_transcribe_workers_share_registry_model(monkeypatch):
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {"segments": []}
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=fake_model)
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    registry = importlib.import_module('model_registry').ModelRegistry()
+    first = transcribe_worker.TranscribeWorker('base', registry=registry)
+    second = transcribe_worker.TranscribeWorker('base', registry=registry)
+    first.transcribe('a.wav')
+    second.transcribe('b.wav')
+
+    fake_whispercpp.Whisper.assert_called_once_with('base')
+    assert fake_model.transcribe.call_count == 2
+    assert registry.stats()['hits'] == 1
+
+
+def test_transcribe_worker_cache_hit_skips_model_load(monkeypatch, tmp_path):
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {
+        "segments": [{"start": 0.0, "end": 1.0, "text": " Hello "}]
+    }
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=fake_model)
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    cache = importlib.import_module('disk_cache').DiskCache(str(tmp_path / 'cache'))
+    audio = tmp_path / 'a.wav'
+    audio.write_bytes(b'audio-bytes')
+
+    first = transcribe_worker.TranscribeWorker('base', cache=cache)
+    segments = first.transcribe(str(audio))
+
+    registry = importlib.import_module('model_registry').ModelRegistry()
+    second = transcribe_worker.TranscribeWorker('base', registry=registry, cache=cache)
+    assert second.transcribe(str(audio)) == segments
+    assert registry.stats()['loads'] == 0
+    fake_whispercpp.Whisper.assert_called_once_with('base')
+
+    other = transcribe_worker.TranscribeWorker('base', cache=cache, decode_params={'beam_size': 5})
+    other.transcribe(str(audio))
+    assert fake_model.transcribe.call_count == 2
+    fake_model.transcribe.assert_called_with(str(audio), beam_size=5)
+
+    # a damaged entry is transcribed again and replaced
+    key = second.cache_key(str(audio), None)
+    cache.put(key, b'[{"start": 0.0, "en')
+    assert second.transcribe(str(audio)) == segments
+    assert fake_model.transcribe.call_count == 3
+    assert cache.get(key) is not None and second.transcribe(str(audio)) == segments
+    assert fake_model.transcribe.call_count == 3
+
+
+def test_transcribe_worker_chunks_long_files(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    class FakeModel:
+        def transcribe(self, path):
+            name = os.path.basename(path)
+            return {"segments": [{"start": 0.0, "end": 2.0, "text": name}]}
+
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=FakeModel())
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    monkeypatch.setattr(transcribe_worker, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(transcribe_worker, 'detect_silences', lambda p: (1000.0, [(499.0, 501.0)]))
+    extracted = []
+
+    def fake_extract(path, start, end, dest):
+        extracted.append((start, end))
+        return dest
+
+    monkeypatch.setattr(transcribe_worker, 'extract_chunk', fake_extract)
+
+    worker = transcribe_worker.TranscribeWorker('base', chunk_workers=2, chunk_seconds=500.0)
+    segments = worker.transcribe('long.mp3')
+
+    assert extracted == [(0.0, 500.0), (500.0, 1000.0)]
+    assert segments == [
+        {"start": 0.0, "end": 2.0, "speaker": "Speaker 1", "text": "chunk0000.wav"},
+        {"start": 500.0, "end": 502.0, "speaker": "Speaker 1", "text": "chunk0001.wav"},
+    ]
+
+
+def test_transcribe_worker_vad_remaps_timestamps(monkeypatch):
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {
+        "segments": [
+            {"start": 0.0, "end": 4.0, "text": "intro"},
+            {"start": 4.0, "end": 8.0, "text": "after the break"},
+        ]
+    }
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=fake_model)
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    # 60 seconds of audio with speech at 10-14s and 40-44s
+    monkeypatch.setattr(transcribe_worker, 'decode_pcm', lambda p: [0.0] * (60 * 16000))
+    monkeypatch.setattr(transcribe_worker, 'detect_speech', lambda s: [(10.0, 14.0), (40.0, 44.0)])
+    monkeypatch.setattr(transcribe_worker, 'speech_only', lambda s, r: s[:8 * 16000])
+
+    worker = transcribe_worker.TranscribeWorker('base', vad=True)
+    segments = worker.transcribe('show.mp3')
+
+    assert [(s['start'], s['end']) for s in segments] == [(10.0, 14.0), (40.0, 44.0)]
+    assert worker.last_vad_stats == {"duration": 60.0, "speech": 8.0, "skipped": 52.0}
+    assert len(fake_model.transcribe.call_args[0][0]) == 8 * 16000
+
+
+class FakePcmBuffer:
+    path = 'cached.f32'
+    sample_rate = 16000
+
+    def __init__(self, seconds):
+        self.samples = [0.0] * int(seconds * 16000)
+        self.closed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed += 1
+
+    @property
+    def duration(self):
+        return len(self.samples) / 16000
+
+    def as_array(self):
+        return self.samples
+
+
+class FakePcmCache:
+    def __init__(self, seconds):
+        self.buffer = FakePcmBuffer(seconds)
+        self.requested = []
+
+    def get(self, path):
+        self.requested.append(path)
+        return self.buffer
+
+
+def test_transcribe_worker_reads_shared_pcm(monkeypatch):
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {"segments": [{"start": 0.0, "end": 1.0, "text": "hi"}]}
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=fake_model)
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    monkeypatch.setattr(transcribe_worker, 'decode_pcm', MagicMock(side_effect=AssertionError))
+    pcm = FakePcmCache(2.0)
+
+    worker = transcribe_worker.TranscribeWorker('base', pcm_cache=pcm)
+    assert worker.transcribe('show.mp3')[0]['text'] == 'hi'
+    assert pcm.requested == ['show.mp3']
+    assert fake_model.transcribe.call_args[0][0] is pcm.buffer.samples
+    assert pcm.buffer.closed == 1
+
+
+def test_transcribe_worker_chunks_slice_shared_pcm(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    class FakeModel:
+        def transcribe(self, samples):
+            return {"segments": [{"start": 0.0, "end": 2.0, "text": str(len(samples) // 16000)}]}
+
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=FakeModel())
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    pcm = FakePcmCache(1000.0)
+    monkeypatch.setattr(transcribe_worker, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(transcribe_worker, 'find_silences', lambda path, **opts: [(399.0, 401.0)])
+    monkeypatch.setattr(transcribe_worker, 'extract_chunk', MagicMock(side_effect=AssertionError))
+    monkeypatch.setattr(transcribe_worker, 'PcmBuffer', lambda path: pcm.buffer)
+
+    worker = transcribe_worker.TranscribeWorker('base', chunk_workers=2, chunk_seconds=500.0, pcm_cache=pcm)
+    segments = worker.transcribe('long.mp3')
+
+    assert [(s['start'], s['text']) for s in segments] == [(0.0, '400'), (400.0, '600')]
+
+
+def test_transcribe_stream_yields_segments_with_progress(monkeypatch, tmp_path):
+    class FakeModel:
+        def transcribe(self, path):
+            name = os.path.basename(path)
+            return {"segments": [{"start": 0.0, "end": 2.0, "text": name}]}
+
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=FakeModel())
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    monkeypatch.setattr(transcribe_worker, 'detect_silences', lambda p: (1000.0, [(399.0, 401.0)]))
+    monkeypatch.setattr(transcribe_worker, 'ProcessPoolExecutor', MagicMock(side_effect=AssertionError))
+
+    def fake_extract(path, start, end, dest):
+        open(dest, 'wb').close()
+        return dest
+
+    monkeypatch.setattr(transcribe_worker, 'extract_chunk', fake_extract)
+    audio = tmp_path / 'show.mp3'
+    audio.write_bytes(b'audio')
+    cache = importlib.import_module('disk_cache').DiskCache(str(tmp_path / 'cache'))
+
+    events = []
+    worker = transcribe_worker.TranscribeWorker('base', cache=cache, stream_seconds=500.0)
+    for seg in worker.transcribe_stream(str(audio), on_progress=events.append):
+        events.append((seg['start'], seg['text']))
+
+    assert events == [0.4, (0.0, 'chunk0000.wav'), 1.0, (400.0, 'chunk0001.wav'), 1.0]
+
+    events.clear()
+    cached = list(worker.transcribe_stream(str(audio), on_progress=events.append))
+    assert [s['start'] for s in cached] == [0.0, 400.0]
+    assert events == [1.0]
+
+
+def test_transcribe_worker_uses_cpu_budget_threads(monkeypatch):
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {"segments": []}
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=fake_model)
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    budget = importlib.import_module('cpu_budget').CpuBudget(total=6)
+
+    worker = transcribe_worker.TranscribeWorker('base', cpu_budget=budget, decode_params={'beam_size': 5})
+    with budget.stage('diarize'):
+        worker.transcribe('show.wav')
+
+    fake_model.transcribe.assert_called_once_with('show.wav', beam_size=5, n_threads=4)
+    assert budget.utilization()['transcribe']['threads'] == 0
+
+
+def test_transcribe_worker_sums_vad_stats_over_pool_chunks(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    class FakeModel:
+        def transcribe(self, samples):
+            return {"segments": [{"start": 0.0, "end": 2.0, "text": "speech"}]}
+
+    fake_whispercpp = types.ModuleType('whispercpp')
+    fake_whispercpp.Whisper = MagicMock(return_value=FakeModel())
+    monkeypatch.setitem(sys.modules, 'whispercpp', fake_whispercpp)
+
+    transcribe_worker = importlib.import_module('transcribe_worker')
+    transcribe_worker = importlib.reload(transcribe_worker)
+    pcm = FakePcmCache(1000.0)
+    monkeypatch.setattr(transcribe_worker, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(transcribe_worker, 'find_silences', lambda path, **opts: [(399.0, 401.0)])
+    monkeypatch.setattr(transcribe_worker, 'PcmBuffer', lambda path: pcm.buffer)
+    # ten seconds of speech at the start of each chunk
+    monkeypatch.setattr(transcribe_worker, 'detect_speech', lambda s: [(0.0, 10.0)])
+    monkeypatch.setattr(transcribe_worker, 'speech_only', lambda s, r: s[:10 * 16000])
+
+    worker = transcribe_worker.TranscribeWorker(
+        'base', chunk_workers=2, chunk_seconds=500.0, pcm_cache=pcm, vad=True
+    )
+    segments = worker.transcribe('long.mp3')
+
+    assert [s['start'] for s in segments] == [0.0, 400.0]
+    assert worker.last_vad_stats == {"duration": 1000.0, "speech": 20.0, "skipped": 980.0}
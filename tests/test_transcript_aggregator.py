@@ -46,3 +46,176 @@ def test_transcript_aggregator_rename_speaker():
 
     result = aggregator.get_transcript()
     assert result[0]['speaker'] == 'Host'
+
+
+def test_transcript_aggregator_replaces_draft_segments():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+
+    aggregator.add_segments('a.wav', [{'start': 0.0, 'end': 1.0, 'speaker': 'Speaker 1', 'text': 'Hi'}])
+    aggregator.add_segments('b.wav', [{'start': 0.5, 'end': 1.0, 'speaker': 'B', 'text': 'Yo'}])
+    aggregator.add_segments('a.wav', [{'start': 1.0, 'end': 2.0, 'speaker': 'Speaker 1', 'text': 'there'}])
+    aggregator.replace_segments('a.wav', [
+        {'start': 0.0, 'end': 1.0, 'speaker': 'Host', 'text': 'Hi'},
+        {'start': 1.0, 'end': 2.0, 'speaker': 'Guest', 'text': 'there'},
+    ])
+
+    result = aggregator.get_transcript()
+    assert [(s['file'], s['speaker']) for s in result] == [('a.wav', 'Host'), ('b.wav', 'B'), ('a.wav', 'Guest')]
+
+
+def test_transcript_aggregator_replace_span_reports_ids():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+
+    draft = aggregator.add_segments('a.wav', [
+        {'start': 0.0, 'end': 2.0, 'speaker': 'A', 'text': 'helo'},
+        {'start': 2.0, 'end': 4.0, 'speaker': 'A', 'text': 'wrld'},
+        {'start': 6.0, 'end': 8.0, 'speaker': 'A', 'text': 'bye'},
+    ])
+    other = aggregator.add_segments('b.wav', [{'start': 1.0, 'end': 3.0, 'speaker': 'B', 'text': 'b'}])
+    renumbered = []
+    aggregator.add_listener(
+        lambda change: change.kind == agg_module.TranscriptAggregator.RENUMBERED and renumbered.append(change.renumbered)
+    )
+
+    removed, added = aggregator.replace_span('a.wav', 0.0, 5.0, [
+        {'start': 0.0, 'end': 4.0, 'speaker': 'A', 'text': 'hello world'},
+    ])
+
+    assert removed == draft[:2]
+    assert aggregator.get_segment(added[0])['text'] == 'hello world'
+    # the removed text outweighed the rest, so the store dropped those rows
+    # and renumbered the others in order
+    [ids] = renumbered
+    assert (ids[draft[2]], ids[other[0]]) == (0, 1)
+    assert list(aggregator.transcript_ids()) == [added[0], ids[other[0]], ids[draft[2]]]
+    assert aggregator.get_segment(ids[draft[2]])['text'] == 'bye'
+    assert len(aggregator._store.starts) == 3
+
+
+def test_transcript_view_is_cached_until_segments_change():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+
+    aggregator.add_segments('a.wav', [{'start': 0.0, 'end': 1.0, 'text': 'a0'}, {'start': 5.0, 'end': 6.0, 'text': 'a5'}])
+    aggregator.add_segments('b.wav', [{'start': 3.0, 'end': 4.0, 'text': 'b3'}])
+    view = aggregator.get_transcript()
+    assert aggregator.get_transcript() is view
+    aggregator.rename_speaker('X', 'Y')
+    assert aggregator.get_transcript() is view
+
+    # a late, out-of-order segment lands in the right place
+    aggregator.add_segments('a.wav', [{'start': 2.0, 'end': 2.5, 'text': 'a2'}])
+    assert [s['text'] for s in aggregator.get_transcript()] == ['a0', 'a2', 'b3', 'a5']
+    aggregator.replace_span('a.wav', 1.0, 3.0, [])
+    assert [s['text'] for s in aggregator.get_transcript()] == ['a0', 'b3', 'a5']
+
+
+def test_rename_speakers_in_batch_and_talk_time():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+
+    aggregator.add_segments('a.wav', [
+        {'start': 0.0, 'end': 4.0, 'speaker': 'SPEAKER_00', 'text': 'hi'},
+        {'start': 4.0, 'end': 5.0, 'speaker': 'SPEAKER_01', 'text': 'hey'},
+        {'start': 5.0, 'end': 7.0, 'speaker': 'SPEAKER_00', 'text': 'so'},
+    ])
+    ids = aggregator.add_segments('b.wav', [{'start': 0.0, 'end': 3.0, 'speaker': 'SPEAKER_02', 'text': 'yo'}])
+    assert aggregator.speaker_stats()['SPEAKER_00'] == {'segments': 2, 'seconds': 6.0}
+
+    # swap two labels and merge a third into one of them
+    changed = aggregator.rename_speakers({'SPEAKER_00': 'Guest', 'SPEAKER_01': 'Host', 'SPEAKER_02': 'Host'})
+    assert changed == [0, 1, 2, 3]
+    assert aggregator.speakers() == ['Guest', 'Host']
+    assert aggregator.speaker_segments('Host') == [1, 3]
+    assert aggregator.speaker_stats()['Host'] == {'segments': 2, 'seconds': 4.0}
+    assert [s['speaker'] for s in aggregator.get_transcript()] == ['Guest', 'Host', 'Host', 'Guest']
+
+    aggregator.replace_segments('b.wav', [])
+    assert aggregator.speaker_stats() == {
+        'Guest': {'segments': 2, 'seconds': 6.0},
+        'Host': {'segments': 1, 'seconds': 1.0},
+    }
+    assert ids[0] not in aggregator.speaker_segments('Host')
+    assert aggregator.rename_speakers({'Nobody': 'X'}) == []
+
+
+def test_time_range_queries_per_file_and_global():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+
+    a = aggregator.add_segments('a.wav', [
+        {'start': 0.0, 'end': 10.0, 'text': 'intro'},
+        {'start': 750.0, 'end': 800.0, 'text': 'first'},
+        {'start': 790.0, 'end': 850.0, 'text': 'crosstalk'},
+        {'start': 900.0, 'end': 950.0, 'text': 'later'},
+    ])
+    b = aggregator.add_segments('b.wav', [{'start': 795.0, 'end': 805.0, 'text': 'other show'}])
+
+    assert aggregator.segments_between(750.0, 840.0, 'a.wav') == [a[1], a[2]]
+    assert aggregator.segments_at(795.0, 'a.wav') == [a[1], a[2]]
+    assert aggregator.segments_at(795.0) == [a[1], a[2], b[0]]
+    assert aggregator.segments_at(2000.0) == []
+
+    # the index follows changes to the file
+    aggregator.replace_span('a.wav', 780.0, 900.0, [{'start': 790.0, 'end': 820.0, 'text': 'refined'}])
+    refined = aggregator.segments_at(800.0, 'a.wav')
+    assert [aggregator.get_segment(i)['text'] for i in refined] == ['refined']
+    assert aggregator.segments_between(0.0, 5.0, 'b.wav') == []
+
+
+def test_listeners_receive_change_events():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+    events = []
+    listener = lambda change: events.append((change.kind, change.ids, change.starts, change.file, change.speakers))
+    aggregator.add_listener(listener)
+
+    aggregator.add_segments('a.wav', [
+        {'start': 0.0, 'end': 1.0, 'speaker': 'S1', 'text': 'one'},
+        {'start': 1.0, 'end': 2.0, 'speaker': 'S2', 'text': 'two'},
+    ])
+    aggregator.add_segments('a.wav', [])
+    aggregator.replace_span('a.wav', 1.0, 2.0, [{'start': 1.0, 'end': 2.0, 'speaker': 'S2', 'text': 'TWO'}])
+    aggregator.rename_speakers({'S2': 'Host'})
+    aggregator.rename_speakers({'Nobody': 'X'})
+
+    T = agg_module.TranscriptAggregator
+    assert events == [
+        (T.INSERTED, [0, 1], [0.0, 1.0], 'a.wav', {}),
+        (T.REMOVED, [1], [1.0], 'a.wav', {}),
+        (T.INSERTED, [2], [1.0], 'a.wav', {}),
+        (T.RENAMED, [2], [1.0], None, {'S2': 'Host'}),
+    ]
+
+    aggregator.remove_listener(listener)
+    aggregator.replace_segments('a.wav', [])
+    assert len(events) == 4
+
+
+def test_replace_span_finds_long_segments_and_keeps_renames():
+    agg_module = importlib.import_module('transcript_aggregator')
+    agg_module = importlib.reload(agg_module)
+    aggregator = agg_module.TranscriptAggregator()
+    aggregator.add_segments('a.wav', [
+        {'start': 0.0, 'end': 100.0, 'speaker': 'S1', 'text': 'long'},
+        {'start': 45.0, 'end': 46.0, 'speaker': 'S2', 'text': 'short'},
+        {'start': 70.0, 'end': 71.0, 'speaker': 'S2', 'text': 'after'},
+    ])
+    aggregator.rename_speakers({'S1': 'Host'})
+    aggregator.rename_speakers({'Host': 'Alice', 'S2': 'Bob'})
+
+    # the long segment starts well before the span but is centred in it
+    removed, _ = aggregator.replace_span('a.wav', 40.0, 60.0, [])
+    assert removed == [0, 1]
+    assert [s['text'] for s in aggregator.get_transcript()] == ['after']
+    assert aggregator.speaker_name('S1') == 'Alice'
+    assert aggregator.speaker_name('S2') == 'Bob'
+    assert aggregator.speaker_name('S3') == 'S3'
@@ -0,0 +1,132 @@
+import os
+import sys
+import importlib
+from array import array
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('transcript_archive')
+    return importlib.reload(mod)
+
+
+def make_aggregator():
+    agg_mod = importlib.reload(importlib.import_module('transcript_aggregator'))
+    agg = agg_mod.TranscriptAggregator()
+    agg.add_segments('b.wav', [
+        {'start': 2.0, 'end': 3.0, 'speaker': 'S1', 'text': 'b two'},
+        {'start': 0.0, 'end': 1.0, 'speaker': 'S2', 'text': 'b zero', 'words': [1, 2]},
+    ])
+    agg.add_segments('a.wav', [{'start': 1.0, 'end': 2.0, 'text': 'a one Grüße'}])
+    return agg_mod, agg
+
+
+def swap_byte_order(mod, path):
+    """Rewrite an archive as a machine with the other byte order would."""
+    data = bytearray(open(path, 'rb').read())
+    header = list(mod._HEADER.unpack_from(data))
+    header[2] = b'>' if header[2] == b'<' else b'<'
+    mod._HEADER.pack_into(data, 0, *header)
+    pos = mod._HEADER.size + mod._padding(mod._HEADER.size)
+    for typecode, itemsize in mod._COLUMNS:
+        size = header[3] * itemsize
+        column = array(typecode, bytes(data[pos:pos + size]))
+        column.byteswap()
+        data[pos:pos + size] = column.tobytes()
+        pos += size + mod._padding(size)
+    open(path, 'wb').write(bytes(data))
+
+
+def rewrite_column(mod, path, index, values):
+    """Overwrite the first values of column ``index`` of an archive."""
+    data = bytearray(open(path, 'rb').read())
+    count = mod._HEADER.unpack_from(data)[3]
+    pos = mod._HEADER.size + mod._padding(mod._HEADER.size)
+    for typecode, itemsize in mod._COLUMNS[:index]:
+        pos += count * itemsize + mod._padding(count * itemsize)
+    typecode = mod._COLUMNS[index][0]
+    packed = array(typecode, values).tobytes()
+    data[pos:pos + len(packed)] = packed
+    open(path, 'wb').write(bytes(data))
+
+
+def test_archive_round_trips_aggregator_without_copying(tmp_path):
+    load_module()
+    agg_mod, agg = make_aggregator()
+    path = str(tmp_path / 'show.pdta')
+
+    assert agg.save_archive(path) == 3
+    loaded = agg_mod.TranscriptAggregator.load_archive(path)
+
+    assert loaded.get_transcript() == agg.get_transcript()
+    assert loaded.file_segments('b.wav')[0]['words'] == [1, 2]
+    assert loaded.segments_between(0.5, 1.5) == [loaded.transcript_ids()[0], loaded.transcript_ids()[1]]
+    # reading, querying and renaming leave the columns in the mapped file
+    assert loaded.rename_speakers({'S1': 'Host', 'S2': 'S1'}) == [0, 1]
+    assert loaded.speaker_stats() == {'Host': {'segments': 1, 'seconds': 1.0}, 'S1': {'segments': 1, 'seconds': 1.0}}
+    assert loaded._store.backed
+    # the first write copies them into memory
+    loaded.add_segments('a.wav', [{'start': 5.0, 'end': 6.0, 'text': 'a five'}])
+    assert not loaded._store.backed
+    assert [seg['text'] for seg in loaded.file_segments('a.wav')] == ['a one Grüße', 'a five']
+
+    # saving over the archive it was loaded from
+    again = agg_mod.TranscriptAggregator.load_archive(path)
+    again.replace_segments('b.wav', [{'start': 0.0, 'end': 4.0, 'speaker': 'Host', 'text': 'b all'}])
+    again.save_archive(path)
+    texts = [seg['text'] for seg in agg_mod.TranscriptAggregator.load_archive(path).get_transcript()]
+    assert texts == ['b all', 'a one Grüße']
+
+
+def test_archive_reads_other_byte_order_and_rejects_bad_files(tmp_path):
+    mod = load_module()
+    agg_mod, agg = make_aggregator()
+    path = str(tmp_path / 'show.pdta')
+    agg.save_archive(path)
+    swap_byte_order(mod, path)
+
+    store = mod.open_archive(path)
+    assert not store.backed
+    # rows are stored file by file, each in start order
+    assert [store.view(row) for row in store.rows()] == [agg.get_segment(i) for i in (1, 0, 2)]
+
+    junk = tmp_path / 'junk.pdta'
+    junk.write_bytes(b'not an archive' * 10)
+    with pytest.raises(ValueError):
+        mod.open_archive(str(junk))
+    # cut anywhere: in the header, a column, the string table or the text
+    data = open(path, 'rb').read()
+    truncated = tmp_path / 'truncated.pdta'
+    for size in range(1, len(data)):
+        truncated.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            mod.open_archive(str(truncated))
+    # a header claiming more segments than the file holds
+    header = list(mod._HEADER.unpack_from(data))
+    header[3] += 1000
+    corrupt = tmp_path / 'corrupt.pdta'
+    corrupt.write_bytes(mod._HEADER.pack(*header) + data[mod._HEADER.size:])
+    with pytest.raises(ValueError):
+        mod.open_archive(str(corrupt))
+
+
+def test_archive_rejects_references_out_of_bounds(tmp_path):
+    mod = load_module()
+    agg_mod, agg = make_aggregator()
+    path = str(tmp_path / 'show.pdta')
+    # columns: starts, ends, speakers, files, offsets, lengths, flags
+    for index, values in ((2, [7]), (3, [0, 0, 5]), (4, [0, 0, 1000]), (5, [0, 0, 1000])):
+        agg.save_archive(path)
+        rewrite_column(mod, path, index, values)
+        with pytest.raises(ValueError):
+            mod.open_archive(path)
+
+    # the aggregator's runs need each file's rows together, in start order
+    agg.save_archive(path)
+    rewrite_column(mod, path, 0, [5.0])
+    assert len(mod.open_archive(path).starts) == 3
+    with pytest.raises(ValueError):
+        agg_mod.TranscriptAggregator.load_archive(path)
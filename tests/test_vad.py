@@ -0,0 +1,62 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def load_module():
+    mod = importlib.import_module('vad')
+    return importlib.reload(mod)
+
+
+def test_regions_from_flags_drops_blips_and_joins_short_gaps():
+    mod = load_module()
+    # 10 frames of 0.1s: blip at 1, speech 3-4, short pause, speech 6-7
+    flags = [False, True, False, True, True, False, True, True, False, False]
+    regions = mod.regions_from_flags(flags, frame_seconds=0.1, min_speech=0.2, min_gap=0.3, padding=0.05)
+
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert abs(start - 0.25) < 1e-9
+    assert abs(end - 0.85) < 1e-9
+
+
+def test_speech_map_restores_original_times():
+    mod = load_module()
+    speech_map = mod.SpeechMap([(10.0, 20.0), (50.0, 55.0)])
+
+    assert speech_map.speech_seconds == 15.0
+    assert speech_map.to_original(0.0) == 10.0
+    assert speech_map.to_original(9.5) == 19.5
+    assert speech_map.to_original(10.0) == 50.0
+    assert speech_map.to_original(10.0, is_end=True) == 20.0
+    assert speech_map.to_original(14.0) == 54.0
+
+
+def test_detect_speech_finds_voice_band_tone_between_silences():
+    np = pytest.importorskip('numpy')
+    mod = load_module()
+    rate = mod.SAMPLE_RATE
+    t = np.arange(rate) / rate
+    rng = np.random.default_rng(0)
+    quiet = rng.normal(0.0, 1e-4, rate).astype(np.float32)
+    voice = (0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+    hiss = (0.5 * np.sin(2 * np.pi * 7000 * t)).astype(np.float32)
+
+    level_db, ratio = mod.frame_features(np.concatenate([voice, hiss]))
+    frames = len(level_db) // 2
+    # leave out the frame straddling the change of tone
+    assert ratio[:frames - 1].min() > 0.9
+    assert ratio[frames + 1:].max() < 0.1
+    assert level_db.min() > -10
+
+    # a loud tone outside the voice band is not speech
+    regions = mod.detect_speech(np.concatenate([quiet, voice, quiet, hiss, quiet]))
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert 0.7 <= start <= 1.0
+    assert 2.0 <= end <= 2.3
+    assert mod.detect_speech(np.zeros(0, dtype=np.float32)) == []